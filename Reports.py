@@ -1,5 +1,4 @@
 from fpdf import FPDF
-from io import BytesIO
 import datetime
 
 import pandas as pd
@@ -7,6 +6,7 @@ from numpy.random import default_rng
 import streamlit as st
 
 from utils import apply_custom_theme
+from result_cache import RESULTS
 
 
 # ---------- PAGE SETUP ----------
@@ -109,7 +109,10 @@ st.caption("Generate comprehensive business reports and schedule automated analy
 
 
 # ---------- PDF GENERATION ----------
-def create_pdf():
+# Built once and kept in the result cache (memory, then disk) across reruns
+# and restarts
+@RESULTS.cached()
+def create_pdf() -> bytes:
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
@@ -123,7 +126,7 @@ def create_pdf():
     pdf_bytes = pdf.output(dest="S")
     if isinstance(pdf_bytes, str):
         pdf_bytes = pdf_bytes.encode("latin-1")
-    return BytesIO(pdf_bytes)
+    return bytes(pdf_bytes)
 
 
 # ---------- TABS ----------
@@ -1,8 +1,52 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from utils import apply_custom_theme
+from datetime import timedelta
+from utils import apply_custom_theme, render_table
+from data_service import (
+    shared_customer_sketch,
+    shared_dimensions,
+    shared_leaderboards,
+    shared_sql_database,
+    shared_transaction_cube,
+    shared_total_sketch,
+    shared_transaction_store,
+)
+from dimensions import (
+    DIMENSIONS,
+    attribute_dimension,
+    attribute_ranks,
+    order_rows,
+    with_attributes,
+)
+from rollups import (
+    TRANSACTION_KPIS,
+    band_split,
+    cube_kpis,
+    distinct_customers,
+    sketch_bounds,
+    sketch_quantile,
+)
+from storage import (
+    count_transactions,
+    read_transactions,
+    scan_transactions,
+    store_version,
+)
+from export import (
+    EXPORT_CHUNK_ROWS,
+    EXPORT_FORMATS,
+    EXPORT_MAX_ROWS,
+    export_chunks,
+    spool_export,
+)
+from ingestion import POLL_SECONDS, ingest_drop_dir
+from paging import page_rows
+from parallel import aggregate
+from result_cache import RESULTS
+from topk import top_rows
+from schema import MONEY_COLUMNS, to_cents, to_dollars
+import sql_backend
+from sql_backend import TRANSACTIONS_BACKEND
 
 apply_custom_theme()
 
@@ -13,195 +57,64 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# ---------- MOCK SODA TRANSACTIONS DATA ----------
-@st.cache_data
-def generate_mock_transactions(n_days: int = 90):
-    np.random.seed(123)
-
-    end_date = datetime.today().date()
-    start_date = end_date - timedelta(days=n_days - 1)
-    dates = pd.date_range(start_date, end_date, freq="D")
-
-    channels = ["Web", "Mobile App", "In-Store POS"]
-    payment_methods = ["Credit Card", "PayPal", "Apple Pay", "Google Pay"]
-    statuses = ["Completed", "Refunded", "Pending", "Failed", "Chargeback"]
-    shipping_methods = ["Standard", "Express", "Local Delivery", "Pickup"]
-
-    customers = [f"Customer #{i:04d}" for i in range(1, 201)]
-
-    # Soda SKUs – all mock but soda-specific
-    soda_skus = [
-        {
-            "sku": "CC-12C-24",
-            "product_name": "Coca-Cola Classic 12oz Cans (24-pack)",
-            "brand": "Coca-Cola",
-            "flavor": "Cola",
-            "category": "Regular Soda",
-            "pack_size": 24,
-            "unit_price": 1.10,   # per can
-        },
-        {
-            "sku": "CC-20B-12",
-            "product_name": "Coca-Cola Classic 20oz Bottles (12-pack)",
-            "brand": "Coca-Cola",
-            "flavor": "Cola",
-            "category": "Regular Soda",
-            "pack_size": 12,
-            "unit_price": 1.80,
-        },
-        {
-            "sku": "SP-20B-12",
-            "product_name": "Sprite Lemon-Lime 20oz Bottles (12-pack)",
-            "brand": "Sprite",
-            "flavor": "Lemon-Lime",
-            "category": "Citrus Soda",
-            "pack_size": 12,
-            "unit_price": 1.79,
-        },
-        {
-            "sku": "FA-12C-12",
-            "product_name": "Fanta Orange 12oz Cans (12-pack)",
-            "brand": "Fanta",
-            "flavor": "Orange",
-            "category": "Fruit Soda",
-            "pack_size": 12,
-            "unit_price": 1.29,
-        },
-        {
-            "sku": "DP-12C-6",
-            "product_name": "Dr Pepper 12oz Cans (6-pack)",
-            "brand": "Dr Pepper",
-            "flavor": "Cola",
-            "category": "Specialty Cola",
-            "pack_size": 6,
-            "unit_price": 1.39,
-        },
-        {
-            "sku": "MD-16B-6",
-            "product_name": "Mountain Dew 16oz Bottles (6-pack)",
-            "brand": "Mountain Dew",
-            "flavor": "Citrus",
-            "category": "Citrus Soda",
-            "pack_size": 6,
-            "unit_price": 1.59,
-        },
-        {
-            "sku": "CCZ-12C-12",
-            "product_name": "Coke Zero 12oz Cans (12-pack)",
-            "brand": "Coca-Cola",
-            "flavor": "Cola",
-            "category": "Zero Sugar",
-            "pack_size": 12,
-            "unit_price": 1.35,
-        },
-        {
-            "sku": "EN-MON-16",
-            "product_name": "Monster Energy 16oz Cans (4-pack)",
-            "brand": "Monster",
-            "flavor": "Energy",
-            "category": "Energy Drink",
-            "pack_size": 4,
-            "unit_price": 2.99,
-        },
-    ]
-
-    rows = []
-    order_counter = 10000
-
-    for date in dates:
-        # more weekend orders
-        day_factor = 1.3 if date.weekday() in [4, 5] else 1.0
-        num_orders = np.random.poisson(35 * day_factor)
-
-        for _ in range(num_orders):
-            order_id = f"ORD-{order_counter}"
-            order_counter += 1
-
-            customer = np.random.choice(customers)
-            channel = np.random.choice(channels, p=[0.5, 0.25, 0.25])
-            payment_method = np.random.choice(payment_methods)
-
-            # choose a primary soda SKU for this order
-            sku_info = np.random.choice(soda_skus)
-            pack_qty = np.random.randint(1, 6)  # 1–5 packs of that SKU
-
-            units = pack_qty * sku_info["pack_size"]
-            base_price_per_unit = sku_info["unit_price"]
-
-            subtotal = units * base_price_per_unit
-
-            # Discounts & fees
-            discount = np.random.choice([0, 0, 0, 5, 10])  # mostly no discount
-            shipping = np.random.choice(
-                [0, 3.99, 6.99, 9.99],
-                p=[0.25, 0.45, 0.2, 0.1],
-            )
-            tax = subtotal * 0.09
-
-            total = subtotal + tax + shipping - discount
-            total = max(1, total)
-
-            # Status
-            status = np.random.choice(
-                statuses,
-                p=[0.83, 0.06, 0.05, 0.04, 0.02],
-            )
-
-            is_refund = status in ["Refunded", "Chargeback"]
-
-            # Fulfilment timeliness
-            fulfillment_days = np.random.choice(
-                [1, 2, 3, 4, 5, 7],
-                p=[0.25, 0.3, 0.25, 0.1, 0.07, 0.03],
-            )
-            fulfillment_status = "Late" if fulfillment_days > 3 else "On-Time"
-
-            new_vs_returning = np.random.choice(["New", "Returning"], p=[0.3, 0.7])
-            shipping_method = np.random.choice(
-                shipping_methods,
-                p=[0.5, 0.2, 0.2, 0.1],
-            )
-
-            rows.append(
-                {
-                    "order_id": order_id,
-                    "date": date.date(),
-                    "customer_name": customer,
-                    "channel": channel,
-                    "payment_method": payment_method,
-                    "status": status,
-                    "items_count": units,              # total cans/bottles
-                    "packs": pack_qty,                 # number of packs
-                    "primary_sku": sku_info["sku"],
-                    "product_name": sku_info["product_name"],
-                    "brand": sku_info["brand"],
-                    "flavor": sku_info["flavor"],
-                    "category": sku_info["category"],
-                    "pack_size": sku_info["pack_size"],
-                    "subtotal": round(subtotal, 2),
-                    "discount": round(discount, 2),
-                    "shipping": round(shipping, 2),
-                    "tax": round(tax, 2),
-                    "total": round(total, 2),
-                    "is_refund": is_refund,
-                    "fulfillment_status": fulfillment_status,
-                    "fulfillment_days": fulfillment_days,
-                    "customer_type": new_vs_returning,
-                    "shipping_method": shipping_method,
-                }
-            )
-
-    df = pd.DataFrame(rows)
-    return df
-
-
-df = generate_mock_transactions()
+# ---------- SODA TRANSACTIONS DATA ----------
+# Raw orders stay on disk (month-partitioned Parquet); the sidebar and KPI
+# cards only need the shared daily cube and order-total sketch. Orders carry
+# integer customer and SKU keys; names and product attributes are joined on
+# only for the rows shown.
+store = shared_transaction_store()
+version = store_version(store)
+cube = shared_transaction_cube(version=version)
+dimensions = shared_dimensions(version=version)
+# Per-day order-total sketch: slider bounds and default without a scan
+total_sketch = shared_total_sketch(version=version).frame
+# Per-day × channel customer sketch: distinct customers without a scan
+customer_sketch = shared_customer_sketch(version=version)
+# All-time top customers / SKUs, updated in place from each ingested batch
+leaderboards = shared_leaderboards()
+
+
+# Pick up dropped order files every few seconds; once this or any other
+# session has ingested new orders, rerun the page so everything reflects them
+@st.fragment(run_every=POLL_SECONDS)
+def watch_new_orders():
+    results = []
+    ingest_drop_dir(root=store, on_ingested=results.append)
+    leaderboards.apply(results)
+    if store_version(store) != version:
+        st.rerun()
+
+
+watch_new_orders()
+
+# Columns the table, customer and SKU sections read from raw orders
+PAGE_COLUMNS = [
+    "order_id",
+    "date",
+    "customer_id",
+    "status",
+    "channel",
+    "sku_id",
+    "category",
+    "packs",
+    "items_count",
+    "subtotal",
+    "discount",
+    "shipping",
+    "tax",
+    "total",
+    "is_refund",
+    "fulfillment_status",
+    "fulfillment_days",
+    "customer_type",
+    "shipping_method",
+]
 
 # ---------- SIDEBAR FILTERS ----------
 st.sidebar.title("Soda Transaction Filters")
 
-min_date = df["date"].min()
-max_date = df["date"].max()
+min_date = cube.min_date
+max_date = cube.max_date
 default_start = max_date - timedelta(days=29)
 
 start_date, end_date = st.sidebar.date_input(
@@ -214,9 +127,9 @@ start_date, end_date = st.sidebar.date_input(
 if isinstance(start_date, (tuple, list)):
     start_date, end_date = start_date[0], start_date[1]
 
-status_options = sorted(df["status"].unique())
-channel_options = sorted(df["channel"].unique())
-category_options = sorted(df["category"].unique())
+status_options = sorted(cube.bitmaps["status"].values)
+channel_options = sorted(cube.bitmaps["channel"].values)
+category_options = sorted(cube.bitmaps["category"].values)
 
 selected_status = st.sidebar.multiselect(
     "Order Status",
@@ -236,25 +149,117 @@ selected_categories = st.sidebar.multiselect(
     default=category_options,
 )
 
+# Whole-dollar thresholds. The default (10th percentile over all orders)
+# comes from the sketch and stays put as the date range changes.
+lowest_total, highest_total = sketch_bounds(total_sketch)
 min_value = st.sidebar.slider(
     "Min Order Total ($)",
-    min_value=float(df["total"].min()),
-    max_value=float(df["total"].max()),
-    value=float(df["total"].quantile(0.1)),
+    min_value=float(lowest_total // 100),
+    max_value=float(np.ceil(highest_total / 100)),
+    value=float(sketch_quantile(total_sketch, 0.1) // 100),
     step=1.0,
 )
 
-# Filtered dataframe
-mask = (
-    (df["date"] >= start_date)
-    & (df["date"] <= end_date)
-    & (df["status"].isin(selected_status))
-    & (df["channel"].isin(selected_channels))
-    & (df["category"].isin(selected_categories))
-    & (df["total"] >= min_value)
-)
+selected_filters = {
+    "status": selected_status,
+    "channel": selected_channels,
+    "category": selected_categories,
+}
+
+
+def sql_summary(summary, query):
+    conn = sql_backend.connect(query[0], shared_sql_database(query[0]))
+    try:
+        return summary(conn, *query)
+    finally:
+        conn.close()
+
+
+# Customer and SKU summaries live in the result cache (memory, then disk)
+# per query, until new orders are ingested and the store version changes.
+# ``_filtered`` is the pandas backend's rows for the query (None for SQL).
+@RESULTS.cached(version=lambda: version)
+def customer_summary_for(query, _filtered):
+    if _filtered is None:
+        return sql_summary(sql_backend.customer_summary, query)
+    # Map-reduce over date partitions on a process pool at large volumes
+    return aggregate(
+        _filtered.assign(
+            net_spend=lambda d: np.where(d["is_refund"], -d["total"], d["total"])
+        ),
+        "customer_id",
+        {
+            "orders": ("order_id", "nunique"),
+            "net_spend": ("net_spend", "sum"),
+            "units_purchased": ("items_count", "sum"),
+        },
+        # An order has one date, so per-partition distinct counts add up
+        within_day=["order_id"],
+    )
+
 
-filtered = df[mask].copy()
+@RESULTS.cached(version=lambda: version)
+def sku_summary_for(query, _filtered):
+    if _filtered is None:
+        return sql_summary(sql_backend.sku_summary, query)
+    return aggregate(
+        _filtered[_filtered["status"] == "Completed"],
+        "sku_id",
+        {
+            "total_packs_sold": ("packs", "sum"),
+            "units_sold": ("items_count", "sum"),
+            "revenue": ("total", "sum"),
+        },
+    )
+
+
+# Raw-order sections: either pandas over the Parquet store, or the same
+# filters compiled to SQL for the embedded database
+query = (TRANSACTIONS_BACKEND, start_date, end_date, selected_filters, min_value)
+if TRANSACTIONS_BACKEND == "pandas":
+    # Only the month partitions, columns and values the sidebar selects
+    # are read from the store
+    window = read_transactions(
+        store, start_date, end_date, columns=PAGE_COLUMNS, filters=selected_filters
+    )
+    # Widen the downcast counts so grouped sums cannot overflow
+    filtered = window[window["total"] >= to_cents(min_value)].astype(
+        {"packs": np.int64, "items_count": np.int64}
+    )
+else:
+    filtered = None
+customer_summary = customer_summary_for(query, filtered)
+sku_summary = sku_summary_for(query, filtered)
+
+# KPI cards come from the daily cube's total bands above the threshold,
+# plus the raw orders in the band it cuts through
+_, band_edge = band_split(min_value)
+if band_edge == min_value:
+    boundary = None
+elif filtered is not None:
+    boundary = filtered
+    if band_edge is not None:
+        boundary = filtered[filtered["total"] < to_cents(band_edge)]
+else:
+    boundary = read_transactions(
+        store,
+        start_date,
+        end_date,
+        columns=TRANSACTION_KPIS.row_columns,
+        filters=selected_filters,
+        min_total=min_value,
+        max_total=band_edge,
+    )
+kpis = cube_kpis(
+    cube.select(start_date, end_date, selected_filters), min_value, boundary
+)
+# Distinct customers from the HyperLogLog sketch, keyed by date, channel and
+# customer_type; only the dates and channels are selected, so the status,
+# category and min-total filters do not apply (±3.3% for 95% of selections;
+# rollups.HLL_PRECISION)
+active_customers = distinct_customers(
+    customer_sketch.select(start_date, end_date, {"channel": selected_channels})
+)
 
 # ---------- PAGE HEADER ----------
 st.title("Transactions")
@@ -262,43 +267,32 @@ st.caption(
     "View and analyze orders, high-value customers, and stock pressure from recent sales."
 )
 
-if filtered.empty:
+if kpis["total_orders"] == 0:
     st.warning("No transactions for the selected filters. Try adjusting the date range or filters.")
     st.stop()
 
 # ---------- KPIs ----------
-completed = filtered[filtered["status"] == "Completed"]
-refunded = filtered[filtered["is_refund"]]
-
-gross_revenue = completed["total"].sum()
-refund_amount = refunded["total"].sum()
-net_revenue = gross_revenue - refund_amount
-
-total_orders = len(filtered)
-completed_orders = len(completed)
-refund_orders = len(refunded)
-
-refund_rate = refund_orders / completed_orders if completed_orders > 0 else 0
-avg_order_value = completed["total"].mean() if completed_orders > 0 else 0
-
-late_shipments = filtered[filtered["fulfillment_status"] == "Late"]
-late_rate = len(late_shipments) / len(filtered) if len(filtered) > 0 else 0
-
-new_customers_orders = filtered[filtered["customer_type"] == "New"]
-returning_customers_orders = filtered[filtered["customer_type"] == "Returning"]
-
-total_units_sold = completed["items_count"].sum()
+net_revenue = kpis["net_revenue"]
+total_orders = kpis["total_orders"]
+completed_orders = kpis["completed_orders"]
+refund_orders = kpis["refund_orders"]
+refund_rate = kpis["refund_rate"]
+avg_order_value = kpis["avg_order_value"]
+late_orders = kpis["late_orders"]
+late_rate = kpis["late_rate"]
+new_share = kpis["new_share"]
+total_units_sold = kpis["units_sold"]
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Net Revenue (Completed - Refunds)", f"${net_revenue:,.2f}")
+    st.metric("Net Revenue (Completed - Refunds)", f"${net_revenue / 100:,.2f}")
 
 with col2:
     st.metric("Total Orders", f"{total_orders:,}")
 
 with col3:
-    st.metric("Avg Order Value (Completed)", f"${avg_order_value:,.2f}")
+    st.metric("Avg Order Value (Completed)", f"${avg_order_value / 100:,.2f}")
 
 with col4:
     st.metric("Total Units Sold (Cans/Bottles)", f"{int(total_units_sold):,}")
@@ -316,126 +310,207 @@ with col_a:
 
 with col_b:
     st.write(
-        f"**Late Shipments:** {len(late_shipments):,} "
+        f"**Late Shipments:** {late_orders:,} "
         f"({late_rate*100:.1f}% of filtered orders)"
     )
 
 with col_c:
-    new_share = (
-        len(new_customers_orders) / len(filtered) * 100 if len(filtered) > 0 else 0
-    )
     st.write(
         f"**New vs Returning:** {new_share:.1f}% new / {100 - new_share:.1f}% returning"
     )
+    st.caption(
+        f"≈{active_customers:,.0f} distinct customers ordered in these dates "
+        "and channels, across both customer types (estimate, ±3.3% at 95%; "
+        "ignores the status, category and min-total filters)"
+    )
 
 st.markdown("### Recent Soda Transactions")
 
 # ---------- TRANSACTIONS TABLE ----------
-# Show newest first
-filtered_display = filtered.sort_values("date", ascending=False)
-
-# Format money columns
-for col in ["subtotal", "discount", "shipping", "tax", "total"]:
-    filtered_display[col] = filtered_display[col].map(lambda x: f"${x:,.2f}")
-
-st.dataframe(
-    filtered_display[
-        [
-            "order_id",
-            "date",
-            "customer_name",
-            "status",
-            "channel",
-            "product_name",
-            "category",
-            "flavor",
-            "packs",
-            "items_count",
-            "subtotal",
-            "discount",
-            "shipping",
-            "tax",
-            "total",
-            "fulfillment_status",
-            "fulfillment_days",
-            "customer_type",
-            "shipping_method",
-        ]
-    ].head(300),
-    width='stretch',
-    height=420,
-)
-
-# ---------- TOP CUSTOMERS ----------
-st.markdown("### Top Customers (by Net Spend on Soda)")
-
-customer_summary = (
-    filtered.assign(
-        effective_total=lambda d: np.where(
-            d["is_refund"], -d["total"], d["total"]
-        )
+TABLE_COLUMNS = [
+    "order_id",
+    "date",
+    "customer_name",
+    "status",
+    "channel",
+    "product_name",
+    "category",
+    "flavor",
+    "packs",
+    "items_count",
+    "subtotal",
+    "discount",
+    "shipping",
+    "tax",
+    "total",
+    "fulfillment_status",
+    "fulfillment_days",
+    "customer_type",
+    "shipping_method",
+]
+
+
+# Paging and sorting rerun only this fragment, not the KPIs above; only the
+# requested page is sorted and formatted
+@st.fragment
+def transactions_grid(filtered, query, dimensions):
+    col_sort, col_dir, col_size, col_page = st.columns(4)
+    sort_by = col_sort.selectbox(
+        "Sort by", TABLE_COLUMNS, index=TABLE_COLUMNS.index("date")
     )
-    .groupby("customer_name", as_index=False)
-    .agg(
-        {
-            "order_id": "nunique",
-            "effective_total": "sum",
-            "items_count": "sum",
-        }
+    descending = col_dir.selectbox("Order", ["Descending", "Ascending"]) == "Descending"
+    page_size = col_size.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    page = col_page.number_input("Page", min_value=1, value=1, step=1)
+
+    def clamp(n_rows):
+        """Page count, and the requested page (0-based) within it."""
+        n_pages = max(1, -(-n_rows // page_size))
+        return n_pages, min(int(page), n_pages) - 1
+
+    if TRANSACTIONS_BACKEND == "pandas":
+        n_rows = len(filtered)
+        n_pages, page = clamp(n_rows)
+        key = None
+        if sort_by not in filtered.columns:
+            # Dimension attribute: sort the keys by the attribute's rank
+            name = attribute_dimension(sort_by)
+            key_column, _ = DIMENSIONS[name]
+            ranks = attribute_ranks(dimensions[name], key_column, sort_by)
+            key = ranks[filtered[key_column].to_numpy()]
+        page_facts = page_rows(filtered, sort_by, descending, page, page_size, key)
+    else:
+        conn = sql_backend.connect(
+            TRANSACTIONS_BACKEND, shared_sql_database(TRANSACTIONS_BACKEND)
+        )
+        try:
+            n_rows = sql_backend.count_orders(conn, *query)
+            n_pages, page = clamp(n_rows)
+            page_facts = sql_backend.orders_page(
+                conn,
+                *query,
+                columns=PAGE_COLUMNS,
+                sort_by=sort_by,
+                descending=descending,
+                page=page,
+                page_size=page_size,
+            )
+        finally:
+            conn.close()
+
+    page_display = order_rows(page_facts, dimensions)
+    render_table(
+        page_display[TABLE_COLUMNS],
+        cents=MONEY_COLUMNS,
+        column_config={"date": st.column_config.DateColumn("date")},
+        width='stretch',
+        height=420,
     )
-    .rename(
-        columns={
-            "order_id": "orders",
-            "effective_total": "net_spend",
-            "items_count": "units_purchased",
-        }
+    first_row = page * page_size + 1 if n_rows else 0
+    st.caption(
+        f"Rows {first_row:,}–{min((page + 1) * page_size, n_rows):,} of {n_rows:,} "
+        f"(page {page + 1:,} of {n_pages:,})"
     )
-    .sort_values("net_spend", ascending=False)
-)
 
-top_customers = customer_summary.head(10).copy()
-top_customers["net_spend"] = top_customers["net_spend"].map(lambda x: f"${x:,.2f}")
 
-st.dataframe(
-    top_customers.reset_index(drop=True),
+transactions_grid(filtered, query, dimensions)
+
+
+# ---------- EXPORT ----------
+# Streams the filtered orders from the store in fixed-size chunks into a
+# temporary file, so encoding memory stays bounded. The download button
+# then serves the finished file from memory, hence the row limit.
+@st.fragment
+def export_section(query, dimensions):
+    with st.expander("Export filtered transactions"):
+        st.caption(f"Exports are limited to {EXPORT_MAX_ROWS:,} orders.")
+        fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+        if not st.button("Prepare export"):
+            return
+
+        _, start, end, filters, min_total = query
+        n_rows = count_transactions(store, start, end, filters, min_total)
+        if n_rows > EXPORT_MAX_ROWS:
+            st.warning(
+                f"{n_rows:,} orders match; exports are limited to "
+                f"{EXPORT_MAX_ROWS:,}. Narrow the date range or filters."
+            )
+            return
+        progress = st.progress(0.0, text=f"Exporting {n_rows:,} orders…")
+
+        def on_rows(done):
+            progress.progress(
+                min(done / max(n_rows, 1), 1.0),
+                text=f"Exported {done:,} of {n_rows:,} orders",
+            )
+
+        batches = scan_transactions(
+            store,
+            start,
+            end,
+            filters=filters,
+            min_total=min_total,
+            batch_rows=EXPORT_CHUNK_ROWS,
+        )
+        try:
+            orders = (to_dollars(order_rows(batch, dimensions)) for batch in batches)
+            file = spool_export(export_chunks(orders, fmt, on_rows))
+        except RuntimeError as exc:
+            st.error(str(exc))
+            return
+
+        extension, mime = EXPORT_FORMATS[fmt]
+        with file:
+            st.download_button(
+                f"Download {n_rows:,} orders ({fmt})",
+                data=file,
+                file_name=f"soda_transactions_{start}_{end}.{extension}",
+                mime=mime,
+                on_click="ignore",
+            )
+
+
+export_section(query, dimensions)
+
+# ---------- TOP CUSTOMERS ----------
+st.markdown("### Top Customers (by Net Spend on Soda)")
+
+render_table(
+    with_attributes(
+        top_rows(customer_summary, "net_spend", 10).reset_index(drop=True), dimensions
+    ),
+    cents=["net_spend"],
     width='stretch',
 )
 
 # ---------- TOP SODA SKUs (Sales Pressure on Inventory) ----------
 st.markdown("### Top Soda SKUs by Units Sold (Inventory Pressure)")
 
-sku_summary = (
-    completed.groupby(
-        ["primary_sku", "product_name", "brand", "flavor", "category", "pack_size"],
-        as_index=False,
-    )
-    .agg(
-        {
-            "packs": "sum",
-            "items_count": "sum",
-            "total": "sum",
-        }
-    )
-    .rename(
-        columns={
-            "packs": "total_packs_sold",
-            "items_count": "units_sold",
-            "total": "revenue",
-        }
-    )
-    .sort_values("units_sold", ascending=False)
-)
-
-sku_summary_display = sku_summary.copy()
-sku_summary_display["revenue"] = sku_summary_display["revenue"].map(
-    lambda x: f"${x:,.2f}"
-)
-
-st.dataframe(
-    sku_summary_display.head(10).reset_index(drop=True),
+render_table(
+    with_attributes(
+        top_rows(sku_summary, "units_sold", 10).reset_index(drop=True), dimensions
+    ),
+    cents=["revenue"],
     width='stretch',
 )
 
+# ---------- ALL-TIME LEADERS ----------
+# From the running totals ingestion keeps, so the sidebar filters do not apply
+st.markdown("### All-Time Leaders")
+st.caption("Across every stored order, regardless of the filters above.")
+
+leaders_left, leaders_right = st.columns(2)
+with leaders_left:
+    render_table(
+        with_attributes(leaderboards.top("customers"), dimensions),
+        cents=["net_spend"],
+        width='stretch',
+    )
+with leaders_right:
+    render_table(
+        with_attributes(leaderboards.top("skus"), dimensions),
+        width='stretch',
+    )
+
 # ---------- RECOMMENDED ACTIONS ----------
 st.markdown("### 💡 Recommended Actions Based on Soda Sales & Inventory Signals")
 
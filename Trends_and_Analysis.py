@@ -1,9 +1,16 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
-from datetime import datetime, timedelta
-from utils import apply_custom_theme
+from datetime import timedelta
+from utils import apply_custom_theme, render_table
+from data_service import (
+    shared_traffic,
+    shared_traffic_analytics,
+    shared_traffic_sums,
+    traffic_version,
+)
+from metrics import MetricPlan
+from result_cache import RESULTS
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
@@ -15,126 +22,18 @@ st.set_page_config(
 apply_custom_theme()
 
 # ---------- DATA GENERATION (MOCK – SODA BUSINESS) ----------
-@st.cache_data
-def generate_mock_data():
-    np.random.seed(42)
-
-    # Last 365 days
-    end_date = datetime.today().date()
-    start_date = end_date - timedelta(days=364)
-    dates = pd.date_range(start_date, end_date, freq="D")
-
-    # Soda-focused categories
-    categories = [
-        "Cola",
-        "Lemon-Lime",
-        "Citrus",
-        "Fruit Soda",
-        "Specialty Cola",
-        "Energy Drinks",
-    ]
-
-    traffic_sources = ["Organic Search", "Paid Ads", "Social", "Email", "Direct"]
-
-    # Soda products (SKUs / names)
-    products = [
-        "Coca-Cola Classic 12oz Cans (24-pack)",
-        "Coca-Cola Classic 20oz Bottles (12-pack)",
-        "Coke Zero 12oz Cans (12-pack)",
-        "Pepsi Cola 12oz Cans (12-pack)",
-        "Sprite Lemon-Lime 20oz Bottles (12-pack)",
-        "Fanta Orange 12oz Cans (12-pack)",
-        "Dr Pepper 12oz Cans (6-pack)",
-        "Mountain Dew 16oz Bottles (6-pack)",
-        "Monster Energy 16oz Cans (4-pack)",
-        "Red Bull 8.4oz Cans (4-pack)",
-    ]
-
-    rows = []
-    for date in dates:
-        for src in traffic_sources:
-            # Baseline demand by traffic source
-            if src == "Paid Ads":
-                base_sessions = 130
-            elif src == "Organic Search":
-                base_sessions = 110
-            elif src == "Social":
-                base_sessions = 85
-            elif src == "Email":
-                base_sessions = 60
-            else:  # Direct
-                base_sessions = 75
-
-            # Weekly seasonality: small early-week boost
-            weekday_boost = 1.1 if date.weekday() in [0, 1] else 0.95
-            # Weekend bump for soda runs
-            weekend_boost = 1.2 if date.weekday() in [4, 5] else 1.0
-
-            sessions = np.random.poisson(base_sessions * weekday_boost * weekend_boost)
-
-            # Conversion rate varies by source (typical ecommerce behavior)
-            if src == "Email":
-                base_cr = 0.055
-            elif src == "Paid Ads":
-                base_cr = 0.04
-            elif src == "Organic Search":
-                base_cr = 0.032
-            elif src == "Direct":
-                base_cr = 0.03
-            else:  # Social
-                base_cr = 0.024
-
-            cr = base_cr + np.random.normal(0, 0.004)
-            cr = max(0.006, min(cr, 0.13))  # clamp
-
-            orders = np.random.binomial(sessions, cr) if sessions > 0 else 0
-
-            # Pick a soda category & drive average ticket from that
-            category = np.random.choice(categories)
-
-            # Approximate cart values by category (multi-pack soda orders)
-            if category == "Energy Drinks":
-                avg_ticket = np.random.normal(45, 10)
-            elif category in ["Specialty Cola", "Fruit Soda"]:
-                avg_ticket = np.random.normal(38, 8)
-            elif category in ["Cola", "Lemon-Lime", "Citrus"]:
-                avg_ticket = np.random.normal(32, 7)
-            else:
-                avg_ticket = np.random.normal(30, 6)
-
-            avg_ticket = max(8, avg_ticket)
-            revenue = orders * avg_ticket
-
-            product_name = np.random.choice(products)
-
-            rows.append(
-                {
-                    "date": date.date(),
-                    "traffic_source": src,
-                    "category": category,
-                    "product_name": product_name,
-                    "sessions": sessions,
-                    "orders": orders,
-                    "revenue": revenue,
-                }
-            )
-
-    df = pd.DataFrame(rows)
-    df["conversion_rate"] = np.where(
-        df["sessions"] > 0, df["orders"] / df["sessions"], 0
-    )
-    df["aov"] = np.where(df["orders"] > 0, df["revenue"] / df["orders"], 0)
-
-    return df
-
-
-df = generate_mock_data()
+# Shared across sessions; pages only ever see slices / shallow copies
+data = shared_traffic()
+df = data.frame
+traffic_sums = shared_traffic_sums()
+# Tables run on the configured analytics engine (GURU_ANALYTICS_ENGINE)
+traffic = shared_traffic_analytics()
 
 # ---------- SIDEBAR FILTERS ----------
 st.sidebar.title("Trends Filters")
 
-min_date = df["date"].min()
-max_date = df["date"].max()
+min_date = data.min_date
+max_date = data.max_date
 
 default_start = max_date - timedelta(days=29)  # last 30 days by default
 start_date, end_date = st.sidebar.date_input(
@@ -163,48 +62,38 @@ selected_categories = st.sidebar.multiselect(
     default=category_options,
 )
 
-# Filtered dataframe
-mask = (
-    (df["date"] >= start_date)
-    & (df["date"] <= end_date)
-    & (df["traffic_source"].isin(selected_sources))
-    & (df["category"].isin(selected_categories))
-)
-
-filtered = df[mask]
+# Filtered dataframe: date range first (contiguous slice), then bitmaps
+selected_filters = {
+    "traffic_source": selected_sources,
+    "category": selected_categories,
+}
+filtered = traffic.select(start_date, end_date, selected_filters)
+window = (start_date, end_date, selected_filters)
 
-# ---------- HELPER: PREVIOUS PERIOD FOR KPI DELTAS ----------
-def compute_previous_period_metrics():
-    current_len = (end_date - start_date).days + 1
-    prev_end = start_date - timedelta(days=1)
-    prev_start = prev_end - timedelta(days=current_len - 1)
 
-    prev_mask = (
-        (df["date"] >= prev_start)
-        & (df["date"] <= prev_end)
-        & (df["traffic_source"].isin(selected_sources))
-        & (df["category"].isin(selected_categories))
-    )
+# Chart and table data live in the result cache (memory, then disk) per
+# filter window, until the traffic version stamp changes
+@RESULTS.cached(version=traffic_version)
+def window_grouped(window, by, agg, _filtered):
+    return _filtered.grouped(by, agg)
 
-    prev = df[prev_mask]
 
-    prev_rev = prev["revenue"].sum()
-    prev_orders = prev["orders"].sum()
-    prev_sessions = prev["sessions"].sum()
+@RESULTS.cached(version=traffic_version)
+def window_top(window, column, agg, order_by, k, _filtered):
+    return _filtered.top(column, agg, order_by=order_by, k=k)
 
-    prev_cr = prev_orders / prev_sessions if prev_sessions > 0 else 0
-    prev_aov = prev_rev / prev_orders if prev_orders > 0 else 0
-
-    return {
-        "revenue": prev_rev,
-        "orders": prev_orders,
-        "sessions": prev_sessions,
-        "conversion_rate": prev_cr,
-        "aov": prev_aov,
-    }
 
+# ---------- PERIOD TOTALS FOR KPI DELTAS ----------
+# Card definitions live in metrics.METRICS, shared with Transactions
+KPI_PLAN = MetricPlan(
+    ["gross_revenue", "total_orders", "sessions", "conversion_rate", "avg_order_value"],
+    "traffic",
+)
 
-prev_metrics = compute_previous_period_metrics()
+# Current, previous and year-ago totals are prefix-sum lookups
+period_totals = traffic_sums.compare(start_date, end_date, selected_filters)
+current_metrics = KPI_PLAN.from_columns(period_totals["current"], df.dtypes)
+prev_metrics = KPI_PLAN.from_columns(period_totals["previous"], df.dtypes)
 
 # ---------- METRICS (KPI CARDS) ----------
 st.title("Trends & Analysis")
@@ -212,18 +101,18 @@ st.caption(
     "Track traffic, orders, and revenue trends across flavors, categories, and channels."
 )
 
-if filtered.empty:
+if filtered.count() == 0:
     st.warning(
         "No data for the selected filters. Try expanding the date range or adjusting sources/categories."
     )
     st.stop()
 
-total_revenue = filtered["revenue"].sum()
-total_orders = filtered["orders"].sum()
-total_sessions = filtered["sessions"].sum()
+total_revenue = current_metrics["gross_revenue"]
+total_orders = current_metrics["total_orders"]
+total_sessions = current_metrics["sessions"]
 
-conversion_rate = total_orders / total_sessions if total_sessions > 0 else 0
-aov = total_revenue / total_orders if total_orders > 0 else 0
+conversion_rate = current_metrics["conversion_rate"]
+aov = current_metrics["avg_order_value"]
 
 
 def pct_delta(current, previous):
@@ -238,14 +127,14 @@ with col1:
     st.metric(
         "Soda Revenue",
         f"${total_revenue:,.0f}",
-        f"{pct_delta(total_revenue, prev_metrics['revenue']):+.1f}% vs prev.",
+        f"{pct_delta(total_revenue, prev_metrics['gross_revenue']):+.1f}% vs prev.",
     )
 
 with col2:
     st.metric(
         "Soda Orders",
         f"{total_orders:,}",
-        f"{pct_delta(total_orders, prev_metrics['orders']):+.1f}% vs prev.",
+        f"{pct_delta(total_orders, prev_metrics['total_orders']):+.1f}% vs prev.",
     )
 
 with col3:
@@ -259,7 +148,7 @@ with col4:
     st.metric(
         "Avg Order Value",
         f"${aov:,.2f}",
-        f"{pct_delta(aov, prev_metrics['aov']):+.1f}% vs prev.",
+        f"{pct_delta(aov, prev_metrics['avg_order_value']):+.1f}% vs prev.",
     )
 
 st.markdown("---")
@@ -269,10 +158,11 @@ left_col, right_col = st.columns((2, 1))
 
 with left_col:
     st.subheader("Revenue Trend")
-    daily = (
-        filtered.groupby("date", as_index=False)
-        .agg({"revenue": "sum", "orders": "sum"})
-        .sort_values("date")
+    daily = window_grouped(
+        window,
+        "date",
+        {"revenue": ("revenue", "sum"), "orders": ("orders", "sum")},
+        filtered,
     )
     fig_revenue = px.line(
         daily,
@@ -287,11 +177,9 @@ with left_col:
 
 with right_col:
     st.subheader("Revenue by Soda Category")
-    by_cat = (
-        filtered.groupby("category", as_index=False)["revenue"]
-        .sum()
-        .sort_values("revenue", ascending=False)
-    )
+    by_cat = window_grouped(
+        window, "category", {"revenue": ("revenue", "sum")}, filtered
+    ).sort_values("revenue", ascending=False)
     fig_cat = px.bar(
         by_cat,
         x="category",
@@ -305,11 +193,9 @@ with right_col:
 # ---------- MIDDLE SECTION: TRAFFIC SOURCES ----------
 st.subheader("Traffic Source Breakdown (Soda Shoppers)")
 
-by_source = (
-    filtered.groupby("traffic_source", as_index=False)["sessions"]
-    .sum()
-    .sort_values("sessions", ascending=False)
-)
+by_source = window_grouped(
+    window, "traffic_source", {"sessions": ("sessions", "sum")}, filtered
+).sort_values("sessions", ascending=False)
 fig_source = px.pie(
     by_source,
     names="traffic_source",
@@ -323,41 +209,37 @@ st.plotly_chart(fig_source, width='stretch')
 # ---------- BOTTOM SECTION: TOP PRODUCTS ----------
 st.subheader("Top Soda Products by Revenue")
 
-product_perf = (
-    filtered.groupby("product_name", as_index=False)
-    .agg(
-        {
-            "orders": "sum",
-            "revenue": "sum",
-            "sessions": "sum",
-        }
-    )
-)
-product_perf["conversion_rate"] = np.where(
-    product_perf["sessions"] > 0,
-    product_perf["orders"] / product_perf["sessions"],
-    0,
-)
-product_perf["aov"] = np.where(
-    product_perf["orders"] > 0,
-    product_perf["revenue"] / product_perf["orders"],
-    0,
+top_products = window_top(
+    window,
+    "product_name",
+    {
+        "orders": ("orders", "sum"),
+        "revenue": ("revenue", "sum"),
+        "sessions": ("sessions", "sum"),
+    },
+    "revenue",
+    10,
+    filtered,
 )
-
-top_products = product_perf.sort_values("revenue", ascending=False).head(10)
-top_products_display = top_products.assign(
-    revenue=top_products["revenue"].map(lambda x: f"${x:,.0f}"),
-    conversion_rate=(top_products["conversion_rate"] * 100).map(
-        lambda x: f"{x:.2f}%"
+# New columns on a new frame: the cached one is shared
+top_products = top_products.assign(
+    conversion_rate=np.where(
+        top_products["sessions"] > 0,
+        top_products["orders"] / top_products["sessions"],
+        0,
+    ),
+    aov=np.where(
+        top_products["orders"] > 0,
+        top_products["revenue"] / top_products["orders"],
+        0,
     ),
-    aov=top_products["aov"].map(lambda x: f"${x:,.2f}"),
 )
 
-st.dataframe(
-    top_products_display[
+render_table(
+    top_products[
         ["product_name", "orders", "revenue", "conversion_rate", "aov"]
     ].reset_index(drop=True),
+    currency={"revenue": 0, "aov": 2},
+    percent=["conversion_rate"],
     width='stretch',
 )
-
-
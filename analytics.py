@@ -0,0 +1,340 @@
+# analytics.py
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from indexing import DatePartitionedFrame
+from parallel import aggregate, check_aggregations
+from topk import top_rows
+
+# "pandas", "polars" (lazy) or "duckdb"; polars and duckdb are optional
+ANALYTICS_ENGINE = os.getenv("GURU_ANALYTICS_ENGINE", "pandas").lower()
+ANALYTICS_ENGINES = ["pandas", "polars", "duckdb"]
+
+
+def _day(value) -> pd.Timestamp:
+    return pd.Timestamp(value).normalize()
+
+
+def _normalise(
+    result: pd.DataFrame, by: list[str], agg: dict, dtypes: pd.Series
+) -> pd.DataFrame:
+    """Give every engine's result pandas' dtypes: keys as in the source
+    frame, counts int64, sums int64 / float64 like the summed column."""
+    types = {key: dtypes[key] for key in by}
+    for out, (col, func) in agg.items():
+        source = dtypes[col]
+        if func in ("size", "count", "nunique"):
+            types[out] = np.int64
+        elif func == "mean":
+            types[out] = np.float64
+        elif func == "sum":
+            types[out] = np.int64 if source.kind in "biu" else np.float64
+        else:
+            types[out] = source
+    return result.astype(types)
+
+
+def _totals(row: dict, agg: dict, dtypes: pd.Series) -> dict:
+    """One row of totals as plain numbers typed like :func:`_normalise`;
+    aggregates of no rows are 0."""
+    row = {out: 0 if pd.isna(value) else value for out, value in row.items()}
+    frame = _normalise(pd.DataFrame([row]), [], agg, dtypes)
+    return {out: frame[out].iloc[0].item() for out in agg}
+
+
+# ---------- ENGINES ----------
+class AnalyticsFrame(ABC):
+    """The operations pages run on a frame of rows, whatever executes them.
+
+    :meth:`select` narrows to a date range and categorical selections (a
+    column mapped to its selected values, like
+    :meth:`indexing.DatePartitionedFrame.select`) and returns another frame
+    of the same engine; :meth:`grouped`, :meth:`top` and :meth:`totals`
+    aggregate with ``agg = {"out": (column, func)}``, ``func`` one of
+    :data:`parallel.AGGREGATIONS`. Results are pandas, identical across
+    engines up to float rounding.
+    """
+
+    @abstractmethod
+    def select(self, start, end, filters: dict | None = None) -> "AnalyticsFrame":
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def grouped(self, by: str | list[str], agg: dict) -> pd.DataFrame:
+        """Aggregates per group, one row per group, sorted by ``by``."""
+
+    @abstractmethod
+    def top(
+        self,
+        by: str | list[str],
+        agg: dict,
+        order_by: str,
+        k: int = 10,
+        largest: bool = True,
+    ) -> pd.DataFrame:
+        """The ``k`` groups with the largest (or smallest) ``order_by``
+        aggregate, best first; ties rank the smaller group key first."""
+
+    @abstractmethod
+    def totals(self, agg: dict) -> dict:
+        """Aggregates over every row, as plain numbers."""
+
+    def compare(self, start, end, agg: dict, filters: dict | None = None) -> dict:
+        """:meth:`totals` for the range, the equally long period right
+        before it, and the same dates one year earlier."""
+        start, end = _day(start), _day(end)
+        one_day = pd.Timedelta(days=1)
+        length = end - start + one_day
+        year = pd.DateOffset(years=1)
+        periods = {
+            "current": (start, end),
+            "previous": (start - length, start - one_day),
+            "year_ago": (start - year, end - year),
+        }
+        return {
+            name: self.select(lo, hi, filters).totals(agg)
+            for name, (lo, hi) in periods.items()
+        }
+
+
+class PandasFrame(AnalyticsFrame):
+    """pandas, with date-partition slicing, bitmap filters and the
+    process-pool map-reduce of :func:`parallel.aggregate`."""
+
+    def __init__(
+        self,
+        data: DatePartitionedFrame | pd.DataFrame,
+        bitmap_columns: list[str] | None = None,
+    ):
+        if isinstance(data, DatePartitionedFrame):
+            self.data, self.rows = data, data.frame
+            bitmap_columns = list(data.bitmaps)
+        else:
+            self.data, self.rows = None, data
+        self.bitmap_columns = bitmap_columns or []
+
+    def select(self, start, end, filters=None):
+        filters = filters or {}
+        if self.data is None:
+            # Rows of an earlier select: still date-sorted, so partitioning
+            # them is one pass; bitmaps are rebuilt for the same columns
+            self.data = DatePartitionedFrame(
+                self.rows, bitmap_columns=self.bitmap_columns
+            )
+        data = self.data
+        indexed = {c: v for c, v in filters.items() if c in data.bitmaps}
+        rows = data.select(start, end, indexed)
+        for col, selected in filters.items():
+            if col not in indexed:
+                rows = rows[rows[col].isin(list(selected))]
+        return PandasFrame(rows, self.bitmap_columns)
+
+    def count(self):
+        return len(self.rows)
+
+    def grouped(self, by, agg):
+        check_aggregations(agg)
+        by = [by] if isinstance(by, str) else list(by)
+        return _normalise(aggregate(self.rows, by, agg), by, agg, self.rows.dtypes)
+
+    def top(self, by, agg, order_by, k=10, largest=True):
+        return top_rows(self.grouped(by, agg), order_by, k, largest).reset_index(
+            drop=True
+        )
+
+    def totals(self, agg):
+        check_aggregations(agg)
+        rows = self.rows
+        row = {
+            out: len(rows) if func == "size" else getattr(rows[col], func)()
+            for out, (col, func) in agg.items()
+        }
+        return _totals(row, agg, rows.dtypes)
+
+
+class PolarsFrame(AnalyticsFrame):
+    """Polars lazy queries: :meth:`select` only adds to the plan, which
+    runs (multi-threaded) when a result is asked for."""
+
+    def __init__(self, data, dtypes: pd.Series | None = None):
+        try:
+            import polars as pl
+        except ImportError as exc:
+            raise ImportError(
+                "GURU_ANALYTICS_ENGINE=polars needs the polars package "
+                "(pip install polars)"
+            ) from exc
+        self.pl = pl
+        if isinstance(data, DatePartitionedFrame):
+            data = data.frame
+        if isinstance(data, pd.DataFrame):
+            # Enums keep pandas' category order, which groups sort by
+            enums = {
+                col: pl.Enum(list(dtype.categories))
+                for col, dtype in data.dtypes.items()
+                if isinstance(dtype, pd.CategoricalDtype)
+            }
+            dtypes, data = data.dtypes, pl.from_pandas(data).lazy().cast(enums)
+        self.plan = data
+        self.dtypes = dtypes
+
+    def select(self, start, end, filters=None):
+        pl = self.pl
+        plan = self.plan.filter(
+            pl.col("date").is_between(_day(start), _day(end), closed="both")
+        )
+        for col, selected in (filters or {}).items():
+            plan = plan.filter(pl.col(col).cast(pl.String).is_in(list(selected)))
+        return PolarsFrame(plan, self.dtypes)
+
+    def count(self):
+        return self.plan.select(self.pl.len()).collect().item()
+
+    def _exprs(self, agg: dict) -> list:
+        check_aggregations(agg)
+        pl = self.pl
+        exprs = []
+        for out, (col, func) in agg.items():
+            if func == "size":
+                expr = pl.len()
+            elif func == "nunique":
+                expr = pl.col(col).n_unique()
+            else:
+                expr = getattr(pl.col(col), func)()
+            exprs.append(expr.alias(out))
+        return exprs
+
+    def _result(self, plan, by: list[str], agg: dict) -> pd.DataFrame:
+        return _normalise(plan.collect().to_pandas(), by, agg, self.dtypes)
+
+    def grouped(self, by, agg):
+        by = [by] if isinstance(by, str) else list(by)
+        plan = self.plan.group_by(by).agg(self._exprs(agg)).sort(by)
+        return self._result(plan, by, agg)
+
+    def top(self, by, agg, order_by, k=10, largest=True):
+        by = [by] if isinstance(by, str) else list(by)
+        plan = (
+            self.plan.group_by(by)
+            .agg(self._exprs(agg))
+            .sort([order_by, *by], descending=[largest] + [False] * len(by))
+            .head(k)
+        )
+        return self._result(plan, by, agg)
+
+    def totals(self, agg):
+        row = self.plan.select(self._exprs(agg)).collect().row(0, named=True)
+        return _totals(row, agg, self.dtypes)
+
+
+class DuckDBFrame(AnalyticsFrame):
+    """DuckDB SQL over an in-memory copy of the rows. :meth:`select` only
+    collects WHERE terms; each result is one query on its own cursor, so
+    sessions can query the shared database concurrently."""
+
+    TABLE = "rows"
+
+    def __init__(self, data, conn=None, dtypes=None, where=(), params=()):
+        if conn is None:
+            try:
+                import duckdb
+            except ImportError as exc:
+                raise ImportError(
+                    "GURU_ANALYTICS_ENGINE=duckdb needs the duckdb package "
+                    "(pip install duckdb)"
+                ) from exc
+            if isinstance(data, DatePartitionedFrame):
+                data = data.frame
+            conn = duckdb.connect()
+            conn.register("source", data)
+            conn.execute(f"CREATE TABLE {self.TABLE} AS SELECT * FROM source")
+            conn.unregister("source")
+            dtypes = data.dtypes
+        self.conn = conn
+        self.dtypes = dtypes
+        self.where = list(where)
+        self.params = list(params)
+
+    def select(self, start, end, filters=None):
+        where = [*self.where, '"date" BETWEEN ? AND ?']
+        params = [*self.params, *(_day(d).to_pydatetime() for d in (start, end))]
+        for col, selected in (filters or {}).items():
+            selected = [str(value) for value in selected]
+            if selected:
+                marks = ", ".join("?" * len(selected))
+                where.append(f'CAST("{col}" AS VARCHAR) IN ({marks})')
+                params.extend(selected)
+            else:
+                where.append("FALSE")
+        return DuckDBFrame(None, self.conn, self.dtypes, where, params)
+
+    def _query(self, select: str, tail: str = "") -> pd.DataFrame:
+        where = f" WHERE {' AND '.join(self.where)}" if self.where else ""
+        sql = f"SELECT {select} FROM {self.TABLE}{where} {tail}"
+        return self.conn.cursor().execute(sql, self.params).df()
+
+    def _exprs(self, agg: dict) -> str:
+        check_aggregations(agg)
+        sql = {
+            "sum": "SUM({})",
+            "size": "COUNT(*)",
+            "count": "COUNT({})",
+            "nunique": "COUNT(DISTINCT {})",
+            "min": "MIN({})",
+            "max": "MAX({})",
+            "mean": "AVG({})",
+        }
+        exprs = []
+        for out, (col, func) in agg.items():
+            quoted = f'"{col}"'
+            exprs.append(f'{sql[func].format(quoted)} AS "{out}"')
+        return ", ".join(exprs)
+
+    def count(self):
+        return int(self._query("COUNT(*) AS n")["n"].iloc[0])
+
+    def grouped(self, by, agg):
+        by = [by] if isinstance(by, str) else list(by)
+        keys = ", ".join(f'"{key}"' for key in by)
+        rows = self._query(
+            f"{keys}, {self._exprs(agg)}", f"GROUP BY {keys} ORDER BY {keys}"
+        )
+        return _normalise(rows, by, agg, self.dtypes)
+
+    def top(self, by, agg, order_by, k=10, largest=True):
+        by = [by] if isinstance(by, str) else list(by)
+        keys = ", ".join(f'"{key}"' for key in by)
+        direction = "DESC" if largest else "ASC"
+        rows = self._query(
+            f"{keys}, {self._exprs(agg)}",
+            f'GROUP BY {keys} ORDER BY "{order_by}" {direction}, {keys} '
+            f"LIMIT {int(k)}",
+        )
+        return _normalise(rows, by, agg, self.dtypes)
+
+    def totals(self, agg):
+        row = self._query(self._exprs(agg)).iloc[0].to_dict()
+        return _totals(row, agg, self.dtypes)
+
+
+ENGINE_FRAMES = {"pandas": PandasFrame, "polars": PolarsFrame, "duckdb": DuckDBFrame}
+
+
+def analytics_frame(
+    data: DatePartitionedFrame | pd.DataFrame, engine: str | None = None
+) -> AnalyticsFrame:
+    """``data`` behind the analytics API, run by ``engine`` (default
+    :data:`ANALYTICS_ENGINE`)."""
+    engine = (engine or ANALYTICS_ENGINE).lower()
+    if engine not in ENGINE_FRAMES:
+        raise ValueError(
+            f"Unknown analytics engine {engine!r}; expected one of {ANALYTICS_ENGINES}"
+        )
+    return ENGINE_FRAMES[engine](data)
@@ -0,0 +1,191 @@
+# data_service.py
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import AnalyticsFrame, analytics_frame
+from dimensions import split_orders
+from indexing import DatePartitionedFrame
+from ingestion import RunningLeaderboards
+from mock_data import generate_mock_traffic, generate_mock_transactions
+from rollups import (
+    HLL_DIMENSIONS,
+    PrefixSums,
+    build_customer_totals,
+    build_customer_sketch,
+    build_daily_cube,
+    build_sku_totals,
+    build_total_sketch,
+)
+from schema import apply_traffic_schema, apply_transaction_schema
+from sql_backend import build_database, database_path
+from storage import (
+    CUSTOMER_SKETCH_FILE,
+    CUSTOMERS_FILE,
+    SKETCH_FILE,
+    SKUS_FILE,
+    TRANSACTIONS_DIR,
+    bump_version,
+    read_cube,
+    read_dimensions,
+    read_rollup,
+    read_transactions,
+    store_exists,
+    write_cube,
+    write_dimensions,
+    write_rollup,
+    write_transactions,
+)
+
+# Every session reads the same in-memory objects (st.cache_resource hands
+# out references, not pickled copies). Copy-on-write is what keeps page
+# code like ``filtered["x"] = ...`` from reaching the shared frames: every
+# frame a page gets is a slice or shallow copy, and pandas copies on the
+# first write. It is always on from pandas 3; turn it on for pandas 2.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _read_only(*arrays: np.ndarray) -> None:
+    """Make the shared index arrays immutable so a stray write raises."""
+    for array in arrays:
+        array.flags.writeable = False
+
+
+def _freeze_partitions(data: DatePartitionedFrame) -> DatePartitionedFrame:
+    _read_only(data.days, data.day_starts)
+    for index in data.bitmaps.values():
+        _read_only(*index.bitmaps.values())
+    return data
+
+
+# ---------- TRANSACTIONS ----------
+def _write_rollups(df: pd.DataFrame, root: Path) -> None:
+    write_cube(build_daily_cube(df), root)
+    write_rollup(build_customer_totals(df), root, CUSTOMERS_FILE)
+    write_rollup(build_sku_totals(df), root, SKUS_FILE)
+    write_rollup(build_total_sketch(df), root, SKETCH_FILE)
+    write_rollup(build_customer_sketch(df), root, CUSTOMER_SKETCH_FILE)
+
+
+@st.cache_resource(show_spinner="Preparing transaction store…")
+def shared_transaction_store(n_days: int = 90) -> Path:
+    """Root of the Parquet transaction store, seeded with mock orders
+    (and their dimension tables, daily cube and running totals) the first
+    time it is needed."""
+    if not store_exists(TRANSACTIONS_DIR):
+        orders = apply_transaction_schema(generate_mock_transactions(n_days=n_days))
+        facts, dimensions = split_orders(orders)
+        write_transactions(facts, TRANSACTIONS_DIR)
+        write_dimensions(dimensions, TRANSACTIONS_DIR)
+        _write_rollups(facts, TRANSACTIONS_DIR)
+        # A fresh stamp, so results cached for an earlier store never match
+        bump_version(TRANSACTIONS_DIR)
+    return TRANSACTIONS_DIR
+
+
+# The loaders below take the store version (storage.store_version) so that
+# ingesting new orders makes the next rerun load fresh copies; only the
+# latest couple of versions are kept in memory.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_transaction_cube(n_days: int = 90, version: int = 0) -> DatePartitionedFrame:
+    root = shared_transaction_store(n_days)
+    cube = read_cube(root)
+    if cube is None:
+        cube = build_daily_cube(read_transactions(root))
+        write_cube(cube, root)
+    return _freeze_partitions(
+        DatePartitionedFrame(cube, bitmap_columns=["status", "channel", "category"])
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_total_sketch(n_days: int = 90, version: int = 0) -> DatePartitionedFrame:
+    """Per-day order-total sketch (rollups.build_total_sketch); any date
+    range is a slice, for quantiles and bounds without scanning orders."""
+    root = shared_transaction_store(n_days)
+    sketch = read_rollup(root, SKETCH_FILE)
+    if sketch is None:
+        sketch = build_total_sketch(read_transactions(root, columns=["date", "total"]))
+        write_rollup(sketch, root, SKETCH_FILE)
+    return DatePartitionedFrame(sketch)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_customer_sketch(n_days: int = 90, version: int = 0) -> DatePartitionedFrame:
+    """Per day × channel × customer_type HyperLogLog sketch of customers
+    (rollups.build_customer_sketch). Pass ``select(start, end, filters)``
+    of it to rollups.distinct_customers for a distinct count of any range."""
+    root = shared_transaction_store(n_days)
+    sketch = read_rollup(root, CUSTOMER_SKETCH_FILE)
+    if sketch is None:
+        sketch = build_customer_sketch(
+            read_transactions(root, columns=["customer_id", *HLL_DIMENSIONS])
+        )
+        write_rollup(sketch, root, CUSTOMER_SKETCH_FILE)
+    return _freeze_partitions(
+        DatePartitionedFrame(sketch, bitmap_columns=["channel", "customer_type"])
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_dimensions(n_days: int = 90, version: int = 0) -> dict:
+    """The customer and SKU dimension tables, for joining attributes onto
+    the rows a page shows."""
+    return read_dimensions(shared_transaction_store(n_days))
+
+
+@st.cache_resource(show_spinner=False)
+def shared_leaderboards(n_days: int = 90) -> RunningLeaderboards:
+    """All-time top customers and SKUs. Not keyed by version: pages keep
+    the one instance current with ``apply`` (ingestion.RunningLeaderboards)
+    instead of re-ranking every key after each batch."""
+    return RunningLeaderboards(shared_transaction_store(n_days))
+
+
+@st.cache_resource(show_spinner="Building SQL transaction table…")
+def shared_sql_database(engine: str, n_days: int = 90) -> Path:
+    """Path of the embedded ``engine`` database, built from the Parquet
+    store the first time it is needed (ingestion keeps it up to date)."""
+    path = database_path(engine)
+    if not path.exists():
+        root = shared_transaction_store(n_days)
+        build_database(read_transactions(root), engine, path, read_dimensions(root))
+    return path
+
+
+# ---------- TRAFFIC ----------
+@st.cache_resource(show_spinner="Loading traffic…")
+def shared_traffic(n_days: int = 365) -> DatePartitionedFrame:
+    return _freeze_partitions(
+        DatePartitionedFrame(
+            apply_traffic_schema(generate_mock_traffic(n_days=n_days)),
+            bitmap_columns=["traffic_source", "category"],
+        )
+    )
+
+
+def traffic_version(n_days: int = 365) -> tuple:
+    """Data-version stamp for results computed from the traffic rows: the
+    mock traffic is regenerated (same seed) for the window ending today."""
+    return ("traffic", n_days, shared_traffic(n_days).max_date.isoformat())
+
+
+@st.cache_resource(show_spinner=False)
+def shared_traffic_analytics(n_days: int = 365) -> AnalyticsFrame:
+    """The traffic rows behind the analytics API, on the engine chosen by
+    GURU_ANALYTICS_ENGINE (pandas, polars or duckdb)."""
+    return analytics_frame(shared_traffic(n_days))
+
+
+@st.cache_resource(show_spinner=False)
+def shared_traffic_sums(n_days: int = 365) -> PrefixSums:
+    sums = PrefixSums(
+        shared_traffic(n_days).frame,
+        dims=["traffic_source", "category"],
+        measures=["revenue", "orders", "sessions"],
+    )
+    _read_only(sums.prefix, sums.days)
+    return sums
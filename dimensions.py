@@ -0,0 +1,139 @@
+# dimensions.py
+import numpy as np
+import pandas as pd
+
+from mock_data import SODA_SKUS
+from schema import ORDER_COLUMNS, TRANSACTION_COLUMNS, apply_transaction_schema
+
+# Order ids look like "ORD-10000"; the store keeps only the number (int64)
+ORDER_PREFIX = "ORD-"
+
+# Dimension tables: name -> (integer key stored on each order, attributes
+# the key stands for). The first attribute is the natural key.
+DIMENSIONS = {
+    "customers": ("customer_id", ["customer_name"]),
+    "skus": (
+        "sku_id",
+        ["primary_sku", "product_name", "brand", "flavor", "category", "pack_size"],
+    ),
+}
+
+
+# ---------- ORDER IDS ----------
+def order_numbers(order_ids: pd.Series) -> pd.Series:
+    """Order numbers from ``ORD-<number>`` ids (bare numbers are accepted
+    too); missing where an id has neither form."""
+    text = order_ids.astype(str).str.strip().str.removeprefix(ORDER_PREFIX)
+    return text.where(text.str.fullmatch(r"\d{1,18}")).astype("Int64")
+
+
+def order_labels(numbers: pd.Series) -> pd.Series:
+    return ORDER_PREFIX + numbers.astype(str)
+
+
+# ---------- DIMENSION TABLES ----------
+def sku_catalog() -> pd.DataFrame:
+    """The SKU catalog with the attribute names orders use."""
+    return pd.DataFrame(SODA_SKUS).rename(columns={"sku": "primary_sku"})
+
+
+def extend_dimension(
+    name: str, dimension: pd.DataFrame | None, candidates: pd.DataFrame
+) -> pd.DataFrame:
+    """``dimension`` plus a row for each entity in ``candidates`` it lacks
+    (matched on the natural key). New rows are numbered on from the largest
+    key, in natural-key order; existing keys never change."""
+    key, attributes = DIMENSIONS[name]
+    natural = attributes[0]
+    new = candidates.drop_duplicates(natural)
+    if dimension is not None:
+        new = new[~new[natural].isin(dimension[natural])]
+    if dimension is not None and new.empty:
+        return dimension
+
+    first = 0 if dimension is None or dimension.empty else int(dimension[key].max()) + 1
+    new = new.sort_values(natural, ignore_index=True)
+    new.insert(0, key, np.arange(first, first + len(new)))
+    extended = pd.concat([dimension, new[[key, *attributes]]], ignore_index=True)
+    return apply_transaction_schema(extended, sort=False)
+
+
+def _keys(dimension: pd.DataFrame, key: str, natural: str, values: pd.Series) -> np.ndarray:
+    """Key of each natural-key value (looked up once per distinct value)."""
+    codes, uniques = pd.factorize(values)
+    known = pd.Index(np.asarray(dimension[natural], dtype=object))
+    positions = known.get_indexer(np.asarray(uniques, dtype=object))
+    return dimension[key].to_numpy()[positions[codes]]
+
+
+def split_orders(
+    orders: pd.DataFrame, dimensions: dict | None = None
+) -> tuple[pd.DataFrame, dict]:
+    """Split full orders (:data:`schema.ORDER_COLUMNS`) into fact rows
+    (:data:`schema.TRANSACTION_COLUMNS`) and the dimension tables they refer
+    to. ``dimensions`` (as returned by an earlier call) are extended with
+    any customers or SKUs they do not have yet."""
+    dimensions = dict(dimensions or {})
+    dimensions["customers"] = extend_dimension(
+        "customers",
+        dimensions.get("customers"),
+        pd.DataFrame({"customer_name": orders["customer_name"].unique()}),
+    )
+    dimensions["skus"] = extend_dimension("skus", dimensions.get("skus"), sku_catalog())
+
+    keys = {}
+    for name, (key, attributes) in DIMENSIONS.items():
+        natural = attributes[0]
+        keys[key] = _keys(dimensions[name], key, natural, orders[natural])
+    facts = orders.assign(
+        order_id=order_numbers(orders["order_id"]).astype(np.int64), **keys
+    )
+    return apply_transaction_schema(facts[TRANSACTION_COLUMNS], sort=False), dimensions
+
+
+# ---------- JOINS FOR DISPLAY ----------
+def with_attributes(rows: pd.DataFrame, dimensions: dict) -> pd.DataFrame:
+    """``rows`` with each dimension key replaced, in place, by the
+    attributes it stands for (those ``rows`` does not already have).
+
+    Meant for the rows about to be shown or exported: the join is one
+    lookup per row, so aggregate on the keys first and join the top rows.
+    """
+    for name, dimension in dimensions.items():
+        key, attributes = DIMENSIONS[name]
+        if key not in rows.columns:
+            continue
+        attributes = [a for a in attributes if a not in rows.columns]
+        joined = dimension.set_index(key)[attributes].reindex(rows[key].to_numpy())
+        at = rows.columns.get_loc(key)
+        rows = rows.drop(columns=key)
+        for offset, attribute in enumerate(attributes):
+            rows.insert(at + offset, attribute, joined[attribute].array)
+    return rows
+
+
+def order_rows(facts: pd.DataFrame, dimensions: dict) -> pd.DataFrame:
+    """Fact rows as full orders: attributes joined back on, order numbers
+    shown as ``ORD-`` ids, columns in :data:`schema.ORDER_COLUMNS` order."""
+    rows = with_attributes(facts, dimensions)
+    if "order_id" in rows.columns:
+        rows = rows.assign(order_id=order_labels(rows["order_id"]))
+    return rows[[c for c in ORDER_COLUMNS if c in rows.columns]]
+
+
+def attribute_dimension(attribute: str) -> str | None:
+    """Name of the dimension table holding ``attribute``, if any."""
+    for name, (_, attributes) in DIMENSIONS.items():
+        if attribute in attributes:
+            return name
+    return None
+
+
+def attribute_ranks(dimension: pd.DataFrame, key: str, attribute: str) -> np.ndarray:
+    """Rank of each key's ``attribute`` value (equal values share a rank),
+    indexed by key: ``ranks[facts[key]]`` orders fact rows by the attribute
+    without joining it."""
+    _, dense = np.unique(np.asarray(dimension[attribute]), return_inverse=True)
+    ranks = np.zeros(int(dimension[key].max()) + 1, dtype=np.int64)
+    ranks[dimension[key].to_numpy()] = dense
+    return ranks
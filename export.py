@@ -0,0 +1,150 @@
+# export.py
+import io
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows encoded per chunk; encoding memory is bounded by this, not the
+# export size
+EXPORT_CHUNK_ROWS = 100_000
+# Largest export offered; override with GURU_EXPORT_MAX_ROWS.
+# st.download_button serves a file from one in-memory bytes object, so
+# the finished file (unlike its encoding) is held in memory whole
+EXPORT_MAX_ROWS = int(os.getenv("GURU_EXPORT_MAX_ROWS", 500_000))
+# Bytes per chunk when an encoder can only produce its file at the end
+FILE_CHUNK_BYTES = 1 << 20
+# Excel's sheet limit, less the header row; longer exports continue on
+# further sheets
+EXCEL_SHEET_ROWS = 1_048_575
+
+# label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": (
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
+
+
+# ---------- ENCODERS ----------
+def csv_chunks(batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for batch in batches:
+        yield batch.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _Spool(io.RawIOBase):
+    """Write-only sink whose bytes are handed out after each write."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_chunks(batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """One Parquet file, a row group per batch, emitted as it is written."""
+    sink, writer = _Spool(), None
+    for batch in batches:
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def excel_chunks(batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """An .xlsx workbook written with xlsxwriter's constant-memory mode.
+
+    Rows are flushed to disk as they are written; the finished workbook
+    (a zip file, only complete once closed) is then read back in chunks.
+    """
+    try:
+        import xlsxwriter
+    except ImportError as exc:
+        raise RuntimeError(
+            "Excel export needs the xlsxwriter package (pip install xlsxwriter)"
+        ) from exc
+
+    with tempfile.TemporaryFile() as out:
+        workbook = xlsxwriter.Workbook(
+            out, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"}
+        )
+        sheet, row = None, EXCEL_SHEET_ROWS
+        for batch in batches:
+            for values in batch.itertuples(index=False, name=None):
+                if row == EXCEL_SHEET_ROWS:
+                    sheet, row = workbook.add_worksheet(), 0
+                    sheet.write_row(0, 0, list(batch.columns))
+                row += 1
+                sheet.write_row(row, 0, values)
+        if sheet is None:
+            workbook.add_worksheet()
+        workbook.close()
+
+        out.seek(0)
+        while chunk := out.read(FILE_CHUNK_BYTES):
+            yield chunk
+
+
+ENCODERS = {"CSV": csv_chunks, "Parquet": parquet_chunks, "Excel": excel_chunks}
+
+
+# ---------- EXPORT ----------
+def export_chunks(
+    batches: Iterable[pd.DataFrame],
+    fmt: str,
+    on_rows: Callable[[int], None] | None = None,
+) -> Iterator[bytes]:
+    """Encode ``batches`` as ``fmt`` (a key of :data:`EXPORT_FORMATS`),
+    yielding the file piece by piece. ``on_rows`` is called with the
+    running row count as each batch is consumed (e.g. for a progress bar)."""
+
+    def counted():
+        done = 0
+        for batch in batches:
+            yield batch
+            done += len(batch)
+            if on_rows is not None:
+                on_rows(done)
+
+    return ENCODERS[fmt](counted())
+
+
+def spool_export(chunks: Iterable[bytes]):
+    """Write ``chunks`` to an anonymous temporary file, rewound for reading.
+
+    The file is unbuffered (a raw file object, which ``st.download_button``
+    accepts, reading it into memory whole); the caller closes it, which
+    deletes it.
+    """
+    out = tempfile.TemporaryFile(buffering=0)
+    for chunk in chunks:
+        out.write(chunk)
+    out.seek(0)
+    return out
@@ -0,0 +1,148 @@
+# indexing.py
+import numpy as np
+import pandas as pd
+
+
+def _to_day(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+# ---------- BITMAP INDEXES ----------
+class BitmapIndex:
+    """One packed bitmap per distinct value of a low-cardinality column.
+
+    Bit ``i`` of ``bitmaps[value]`` is set when row ``i`` holds ``value``.
+    Bitmaps are stored with ``np.packbits`` (8 rows per byte), so OR-ing a
+    multiselect and AND-ing across columns touches ``n / 8`` bytes.
+    """
+
+    def __init__(self, values: pd.Series):
+        codes, categories = pd.factorize(values)
+        self.size = len(codes)
+        self.bitmaps = {
+            value: np.packbits(codes == i) for i, value in enumerate(categories)
+        }
+
+    @property
+    def values(self) -> list:
+        return list(self.bitmaps)
+
+    def covers(self, selected) -> bool:
+        """True when ``selected`` includes every value, i.e. the filter is a no-op."""
+        return set(self.bitmaps) <= set(selected)
+
+    def packed(self, selected, byte_lo: int = 0, byte_hi: int | None = None) -> np.ndarray:
+        """OR of the bitmaps for ``selected`` over bytes ``[byte_lo, byte_hi)``."""
+        if byte_hi is None:
+            byte_hi = -(-self.size // 8)
+        acc = np.zeros(byte_hi - byte_lo, dtype=np.uint8)
+        for value in selected:
+            bitmap = self.bitmaps.get(value)
+            if bitmap is not None:
+                acc |= bitmap[byte_lo:byte_hi]
+        return acc
+
+
+def bitmap_mask(
+    indexes: dict,
+    selections: dict,
+    lo: int = 0,
+    hi: int | None = None,
+) -> np.ndarray | None:
+    """Boolean mask for rows ``[lo, hi)`` matching every column selection.
+
+    Selections are OR-ed within a column and AND-ed across columns, all on
+    packed bytes. Returns ``None`` when no selection actually filters.
+    """
+    active = [
+        (indexes[col], selected)
+        for col, selected in selections.items()
+        if not indexes[col].covers(selected)
+    ]
+    if not active:
+        return None
+
+    hi = active[0][0].size if hi is None else hi
+    byte_lo, byte_hi = lo // 8, -(-hi // 8)
+    acc = None
+    for index, selected in active:
+        bits = index.packed(selected, byte_lo, byte_hi)
+        acc = bits if acc is None else acc & bits
+    offset = lo - byte_lo * 8
+    return np.unpackbits(acc, count=offset + hi - lo)[offset:].view(bool)
+
+
+# ---------- DATE PARTITIONS ----------
+class DatePartitionedFrame:
+    """A date-sorted frame with the row offset where each day starts.
+
+    A date range resolves to one contiguous ``iloc`` slice through two
+    binary searches over the day list, so the cost of a range lookup does
+    not depend on how much history the frame holds. ``bitmap_columns`` get
+    a :class:`BitmapIndex` each for multiselect filters.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        date_col: str = "date",
+        bitmap_columns: list[str] | None = None,
+    ):
+        if not df[date_col].is_monotonic_increasing:
+            df = df.sort_values(date_col, kind="stable", ignore_index=True)
+        self._frame = df
+        self.date_col = date_col
+
+        day = df[date_col].to_numpy().astype("datetime64[D]")
+        change = np.flatnonzero(day[1:] != day[:-1]) + 1
+        # day_starts[i] is the first row of days[i]; the last entry is len(df)
+        # (an empty frame has no days, only that last entry)
+        starts = [[0], change] if len(day) else []
+        self.day_starts = np.concatenate([*starts, [len(day)]]).astype(np.int64)
+        self.days = day[self.day_starts[:-1]]
+
+        self.bitmaps = {col: BitmapIndex(df[col]) for col in bitmap_columns or []}
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The whole frame as a shallow (copy-on-write) copy.
+
+        Callers can modify what they get back without touching the shared
+        underlying data, and no column data is copied until they do.
+        """
+        return self._frame.copy(deep=False)
+
+    @property
+    def min_date(self):
+        return pd.Timestamp(self.days[0]).date()
+
+    @property
+    def max_date(self):
+        return pd.Timestamp(self.days[-1]).date()
+
+    def bounds(self, start, end) -> tuple[int, int]:
+        """Row offsets ``[lo, hi)`` covering ``start`` through ``end`` inclusive."""
+        first = np.searchsorted(self.days, _to_day(start), side="left")
+        last = np.searchsorted(self.days, _to_day(end), side="right")
+        if last <= first:
+            return 0, 0
+        return int(self.day_starts[first]), int(self.day_starts[last])
+
+    def slice(self, start, end) -> pd.DataFrame:
+        """Rows dated ``start`` through ``end`` inclusive, without a full-frame mask."""
+        lo, hi = self.bounds(start, end)
+        return self._frame.iloc[lo:hi]
+
+    def select(self, start, end, filters: dict | None = None) -> pd.DataFrame:
+        """Rows in the date range whose bitmap columns match ``filters``.
+
+        ``filters`` maps a bitmap column to its selected values; a column
+        with every value selected is skipped.
+        """
+        lo, hi = self.bounds(start, end)
+        window = self._frame.iloc[lo:hi]
+        mask = bitmap_mask(self.bitmaps, filters or {}, lo, hi)
+        return window if mask is None else window[mask]
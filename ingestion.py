@@ -0,0 +1,497 @@
+# ingestion.py
+import argparse
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from dimensions import DIMENSIONS, order_numbers, split_orders
+from mock_data import FULFILLMENT_STATUSES, REFUND_STATUSES, SODA_SKUS
+from rollups import (
+    CUSTOMER_MEASURES,
+    SKU_MEASURES,
+    build_customer_sketch,
+    build_customer_totals,
+    build_daily_cube,
+    build_sku_totals,
+    build_total_sketch,
+    merge_cube,
+    merge_customer_sketch,
+    merge_rollups,
+    merge_total_sketch,
+)
+from schema import (
+    MONEY_COLUMNS,
+    ORDER_COLUMNS,
+    TRANSACTION_CATEGORIES,
+    TRANSACTION_INT_DTYPES,
+    apply_transaction_schema,
+    to_cents,
+)
+from sql_backend import SQL_ENGINES, append_rows, database_path
+from storage import (
+    CUBE_FILE,
+    CUSTOMER_SKETCH_FILE,
+    CUSTOMERS_FILE,
+    DATA_DIR,
+    SKETCH_FILE,
+    SKUS_FILE,
+    TRANSACTIONS_DIR,
+    append_transactions,
+    bump_version,
+    read_dimensions,
+    read_rollup,
+    read_transactions,
+    store_exists,
+    store_version,
+    transaction_schema,
+    write_dimensions,
+    write_rollup,
+)
+from topk import Leaderboard
+
+# Order files (``*.jsonl`` or ``*.csv``) dropped here are picked up by
+# ingest_drop_dir. Write them under another name and rename them into
+# place, so a half-written file is never read.
+DROP_DIR = Path(os.getenv("GURU_DROP_DIR", DATA_DIR / "incoming"))
+DROP_SUFFIXES = (".jsonl", ".csv")
+POLL_SECONDS = 5
+
+# Every incoming order needs these (money in dollars, order ids as
+# ``ORD-<number>`` or a bare number); the remaining columns are derived
+# (SKU attributes from the catalog, items_count, is_refund,
+# fulfillment_status and, when absent, customer_type)
+REQUIRED_COLUMNS = [
+    "order_id",
+    "date",
+    "customer_name",
+    "channel",
+    "payment_method",
+    "status",
+    "primary_sku",
+    "packs",
+    "subtotal",
+    "discount",
+    "shipping",
+    "tax",
+    "total",
+    "fulfillment_days",
+    "shipping_method",
+]
+SKU_ATTRIBUTES = ["product_name", "brand", "flavor", "category", "pack_size"]
+
+LOCK_FILE = "_ingest.lock"
+STALE_LOCK_SECONDS = 120
+
+
+# ---------- VALIDATION ----------
+def _integer_columns(root: Path) -> set:
+    schema = transaction_schema(root)
+    if schema is None:
+        return set(TRANSACTION_INT_DTYPES)
+    return {f.name for f in schema if pa.types.is_integer(f.type)}
+
+
+def validate_orders(
+    batch: pd.DataFrame,
+    root: Path = TRANSACTIONS_DIR,
+    customers: pd.DataFrame | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Split ``batch`` into complete orders (order ids as numbers, ready
+    for :func:`dimensions.split_orders`) and rejected rows.
+
+    Rejected rows keep their original columns plus an ``error`` column
+    naming the first problem found. ``customers`` (the customer dimension
+    table) decides New vs Returning when ``customer_type`` is not given.
+    Raises ``ValueError`` when a required column is missing altogether.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in batch.columns]
+    if missing:
+        raise ValueError(f"Incoming orders are missing columns: {missing}")
+
+    batch = batch.reset_index(drop=True)
+    error = pd.Series(None, index=batch.index, dtype=object)
+
+    def flag(mask, message: str) -> None:
+        error[np.asarray(mask, dtype=bool) & error.isna().to_numpy()] = message
+
+    for col in REQUIRED_COLUMNS:
+        flag(batch[col].isna(), f"missing {col}")
+
+    clean = {
+        "order_id": order_numbers(batch["order_id"]),
+        "customer_name": batch["customer_name"].astype(str).str.strip(),
+    }
+    flag(clean["order_id"].isna(), "invalid order_id")
+
+    date = pd.to_datetime(batch["date"], errors="coerce", format="mixed")
+    if date.dt.tz is not None:
+        date = date.dt.tz_localize(None)
+    clean["date"] = date.dt.normalize()
+    flag(clean["date"].isna(), "invalid date")
+
+    labelled = ["channel", "payment_method", "status", "shipping_method", "primary_sku"]
+    if "customer_type" in batch.columns:
+        labelled.append("customer_type")
+    for col in labelled:
+        known = batch[col].isna() | batch[col].isin(TRANSACTION_CATEGORIES[col])
+        flag(~known, f"unknown {col}")
+        clean[col] = batch[col]
+
+    integer_columns = _integer_columns(root)
+    for col in MONEY_COLUMNS + ["packs", "fulfillment_days"]:
+        values = pd.to_numeric(batch[col], errors="coerce")
+        flag(values.isna(), f"invalid {col}")
+        flag(values < 0, f"negative {col}")
+        if col in integer_columns and col not in MONEY_COLUMNS:
+            flag(values % 1 != 0, f"non-integer {col}")
+        clean[col] = values
+    flag(clean["packs"] < 1, "packs must be at least 1")
+
+    flag(clean["order_id"].duplicated(), "duplicate order_id in batch")
+    if store_exists(root):
+        ids = [int(i) for i in clean["order_id"].dropna().unique()]
+        stored = read_transactions(root, columns=["order_id"], filters={"order_id": ids})
+        flag(clean["order_id"].isin(stored["order_id"]), "order_id already stored")
+
+    ok = error.isna().to_numpy()
+    rejected = batch[~ok].assign(error=error[~ok])
+    valid = pd.DataFrame(clean)[ok]
+    valid[MONEY_COLUMNS] = valid[MONEY_COLUMNS].apply(to_cents)
+
+    # Derived columns, the same way the generator fills them
+    catalog = pd.DataFrame(SODA_SKUS).set_index("sku")
+    for attr in SKU_ATTRIBUTES:
+        valid[attr] = valid["primary_sku"].map(catalog[attr]).to_numpy()
+    valid["items_count"] = valid["packs"] * valid["pack_size"]
+    valid["is_refund"] = valid["status"].isin(REFUND_STATUSES)
+    valid["fulfillment_status"] = np.where(
+        valid["fulfillment_days"] > 3, FULFILLMENT_STATUSES[1], FULFILLMENT_STATUSES[0]
+    )
+
+    # New = no stored orders and this is the customer's first order in the batch
+    seen = set() if customers is None else set(customers["customer_name"])
+    first = valid.groupby("customer_name")["date"].rank(method="first") == 1
+    derived = pd.Series(
+        np.where(first & ~valid["customer_name"].isin(seen), "New", "Returning"),
+        index=valid.index,
+    )
+    if "customer_type" in valid.columns:
+        valid["customer_type"] = valid["customer_type"].fillna(derived)
+    else:
+        valid["customer_type"] = derived
+
+    valid = valid[ORDER_COLUMNS].astype(
+        {col: np.int64 for col in integer_columns if col in valid.columns}
+    )
+    return apply_transaction_schema(valid), rejected
+
+
+# ---------- STORE UPDATE ----------
+@contextmanager
+def _store_lock(root: Path, timeout: float = 30.0):
+    """One writer at a time per store, across threads and processes."""
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / LOCK_FILE
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime > STALE_LOCK_SECONDS:
+                    path.unlink(missing_ok=True)  # left behind by a crashed writer
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        path.unlink(missing_ok=True)
+
+
+def _stored_rollup(root: Path, name: str, build) -> pd.DataFrame | None:
+    """A stored rollup; built once from the raw orders if the store predates
+    it."""
+    rollup = read_rollup(root, name)
+    if rollup is None and store_exists(root):
+        rollup = build(read_transactions(root))
+    return rollup
+
+
+def _added_rows(dimensions: dict, extended: dict) -> dict:
+    """Rows of each ``extended`` dimension table that ``dimensions`` lacks
+    (only tables that gained rows)."""
+    added = {}
+    for name, table in extended.items():
+        key, _ = DIMENSIONS[name]
+        stored = dimensions.get(name)
+        rows = table if stored is None else table[~table[key].isin(stored[key])]
+        if len(rows):
+            added[name] = rows
+    return added
+
+
+def ingest_orders(batch: pd.DataFrame, root: Path = TRANSACTIONS_DIR) -> dict:
+    """Validate ``batch`` and add its valid orders to the store.
+
+    The valid orders are appended as new Parquet files and inserted into
+    SQL databases that have already been built; customers seen for the
+    first time get the next free ``customer_id``. The daily cube, the
+    order-total and distinct-customer sketches and the customer / SKU
+    running totals are merged with rollups of the batch and rewritten
+    whole, so that part costs in proportion to the rollups (days times
+    cube cells, customers, SKUs) rather than the batch; of the stored
+    orders, only the batch's order ids are looked up. The store version
+    is bumped last, which makes cached readers reload.
+
+    Returns ``{"ingested": n, "rejected": DataFrame}``; when orders were
+    added, also ``"totals"`` (the batch's customer and SKU totals, by
+    :data:`LEADERBOARD_TOTALS` name) and ``"versions"`` (the store version
+    before and after), for :class:`RunningLeaderboards`.
+    """
+    with _store_lock(root):
+        dimensions = read_dimensions(root)
+        valid, rejected = validate_orders(batch, root, dimensions.get("customers"))
+        if valid.empty:
+            return {"ingested": 0, "rejected": rejected}
+        previous = store_version(root)
+        facts, extended = split_orders(valid, dimensions)
+        added = _added_rows(dimensions, extended)
+        totals = {
+            "customers": build_customer_totals(facts),
+            "skus": build_sku_totals(facts),
+        }
+
+        cube = merge_cube(
+            _stored_rollup(root, CUBE_FILE, build_daily_cube),
+            build_daily_cube(facts),
+        )
+        customers = merge_rollups(
+            _stored_rollup(root, CUSTOMERS_FILE, build_customer_totals),
+            totals["customers"],
+            ["customer_id"],
+            CUSTOMER_MEASURES,
+        )
+        skus = merge_rollups(
+            _stored_rollup(root, SKUS_FILE, build_sku_totals),
+            totals["skus"],
+            ["sku_id"],
+            SKU_MEASURES,
+        )
+        sketch = merge_total_sketch(
+            _stored_rollup(root, SKETCH_FILE, build_total_sketch),
+            build_total_sketch(facts),
+        )
+        customer_sketch = merge_customer_sketch(
+            _stored_rollup(root, CUSTOMER_SKETCH_FILE, build_customer_sketch),
+            build_customer_sketch(facts),
+        )
+
+        # New customers / SKUs first, so every stored key can be looked up
+        write_dimensions({name: extended[name] for name in added}, root)
+        append_transactions(facts, root)
+        write_rollup(cube, root, CUBE_FILE)
+        write_rollup(customers, root, CUSTOMERS_FILE)
+        write_rollup(skus, root, SKUS_FILE)
+        write_rollup(sketch, root, SKETCH_FILE)
+        write_rollup(customer_sketch, root, CUSTOMER_SKETCH_FILE)
+        for engine in SQL_ENGINES:
+            path = database_path(engine, root.parent)
+            if path.exists():
+                append_rows(facts, engine, path, added)
+        version = bump_version(root)
+
+    return {
+        "ingested": len(valid),
+        "rejected": rejected,
+        "totals": totals,
+        "versions": (previous, version),
+    }
+
+
+# ---------- LEADERBOARDS ----------
+# Running totals ranked for the all-time leaderboards:
+# name -> (rollup file, builder, key, ranked measure)
+LEADERBOARD_TOTALS = {
+    "customers": (CUSTOMERS_FILE, build_customer_totals, "customer_id", "net_spend"),
+    "skus": (SKUS_FILE, build_sku_totals, "sku_id", "units_sold"),
+}
+
+
+def _dense_totals(
+    totals: pd.DataFrame | None, key: str, measure: str
+) -> np.ndarray:
+    """``measure`` indexed by the dense integer ``key`` (zero for gaps;
+    empty for a store with no orders yet)."""
+    if totals is None:
+        return np.zeros(0, dtype=np.int64)
+    keys = totals[key].to_numpy(np.int64)
+    values = np.zeros(keys.max() + 1 if len(keys) else 0, dtype=np.int64)
+    values[keys] = totals[measure].to_numpy()
+    return values
+
+
+class RunningLeaderboards:
+    """All-time top customers and SKUs by the store's running totals.
+
+    Built once from the stored totals, then kept current by
+    :meth:`apply`, which folds in the batch totals of
+    :func:`ingest_orders` results, so a new batch re-ranks only the leaders
+    and the keys it touched. When the store has moved on some other way
+    (e.g. another process ingested), the stored totals are read again.
+    Safe to share between threads.
+    """
+
+    def __init__(self, root: Path = TRANSACTIONS_DIR, k: int = 10):
+        self.root = root
+        self.k = k
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self) -> None:
+        # Under the store lock, so the totals match the version read
+        with _store_lock(self.root):
+            self.version = store_version(self.root)
+            self.boards = {
+                name: Leaderboard(
+                    _dense_totals(_stored_rollup(self.root, file, build), key, measure),
+                    self.k,
+                )
+                for name, (file, build, key, measure) in LEADERBOARD_TOTALS.items()
+            }
+
+    def apply(self, results=()) -> None:
+        """Fold in ``ingest_orders`` results, oldest first; reload if the
+        store version still differs afterwards."""
+        with self._lock:
+            for result in results:
+                if result.get("versions", (None,))[0] != self.version:
+                    continue  # already reflected, or follows a batch we missed
+                for name, (_, _, key, measure) in LEADERBOARD_TOTALS.items():
+                    delta = result["totals"][name]
+                    self.boards[name].update(
+                        delta[key].to_numpy(), delta[measure].to_numpy()
+                    )
+                self.version = result["versions"][1]
+            if self.version != store_version(self.root):
+                self._reload()
+
+    def top(self, name: str) -> pd.DataFrame:
+        """Leaders of board ``name`` with their totals, best first."""
+        _, _, key, measure = LEADERBOARD_TOTALS[name]
+        with self._lock:
+            board = self.boards[name].top()
+        return board.rename(columns={"key": key, "total": measure})
+
+
+# ---------- DROP DIRECTORY ----------
+def _move(path: Path, folder: Path) -> Path | None:
+    """Move ``path`` into ``folder``; ``None`` if it is already gone."""
+    folder.mkdir(parents=True, exist_ok=True)
+    target = folder / path.name
+    try:
+        os.replace(path, target)
+    except FileNotFoundError:
+        return None
+    return target
+
+
+def read_order_file(path: Path) -> pd.DataFrame:
+    if path.suffix == ".jsonl":
+        return pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+    return pd.read_csv(path, dtype={"order_id": str, "customer_name": str})
+
+
+def ingest_drop_dir(
+    drop_dir: Path = DROP_DIR, root: Path = TRANSACTIONS_DIR, on_ingested=None
+) -> dict:
+    """Ingest every order file waiting in ``drop_dir``, in name order.
+
+    A file is claimed by moving it into ``processing/``, so concurrent
+    pollers never load it twice, and ends up in ``done/``. Rejected rows
+    go to ``rejected/<name>.csv`` with an ``error`` column; a file that
+    cannot be read or stored at all is moved to ``rejected/`` unchanged,
+    next to ``<name>.error.txt``. When the store stays locked by another
+    writer, the file goes back to ``drop_dir`` and the pass ends early.
+    ``on_ingested``, if given, is called with each file's
+    :func:`ingest_orders` result.
+    """
+    summary = {"files": 0, "ingested": 0, "rejected": 0, "failed": 0}
+    if not drop_dir.is_dir():
+        return summary
+
+    waiting = sorted(
+        p for p in drop_dir.iterdir() if p.is_file() and p.suffix in DROP_SUFFIXES
+    )
+    for path in waiting:
+        claimed = _move(path, drop_dir / "processing")
+        if claimed is None:
+            continue
+        try:
+            result = ingest_orders(read_order_file(claimed), root)
+        except TimeoutError:
+            # Another writer holds the store: hand the file back for the
+            # next pass
+            _move(claimed, drop_dir)
+            break
+        except Exception as exc:
+            failed = _move(claimed, drop_dir / "rejected")
+            failed.with_name(f"{failed.name}.error.txt").write_text(f"{exc!r}\n")
+            summary["failed"] += 1
+            continue
+
+        if len(result["rejected"]):
+            (drop_dir / "rejected").mkdir(exist_ok=True)
+            result["rejected"].to_csv(
+                drop_dir / "rejected" / f"{path.stem}.csv", index=False
+            )
+        _move(claimed, drop_dir / "done")
+        if on_ingested is not None:
+            on_ingested(result)
+        summary["files"] += 1
+        summary["ingested"] += result["ingested"]
+        summary["rejected"] += len(result["rejected"])
+    return summary
+
+
+def watch(
+    drop_dir: Path = DROP_DIR,
+    root: Path = TRANSACTIONS_DIR,
+    interval: float = POLL_SECONDS,
+) -> None:
+    """Poll ``drop_dir`` forever, for ingesting outside the Streamlit app."""
+    while True:
+        summary = ingest_drop_dir(drop_dir, root)
+        if summary["files"] or summary["failed"]:
+            print(
+                f"{summary['files']} file(s): {summary['ingested']} orders ingested, "
+                f"{summary['rejected']} rejected, {summary['failed']} failed file(s)"
+            )
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest dropped order files.")
+    parser.add_argument("--drop-dir", type=Path, default=DROP_DIR)
+    parser.add_argument("--store", type=Path, default=TRANSACTIONS_DIR)
+    parser.add_argument(
+        "--watch", action="store_true", help="keep polling instead of one pass"
+    )
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS)
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.drop_dir, args.store, args.interval)
+    else:
+        print(ingest_drop_dir(args.drop_dir, args.store))
@@ -0,0 +1,169 @@
+# metrics.py
+import numpy as np
+import pandas as pd
+
+from mock_data import REFUND_STATUSES
+
+# ---------- MEASURES ----------
+# A measure sums one column (``None``: counts orders) over the rows that
+# meet every ``where`` condition (column -> accepted values). Each data
+# source binds the measure names to its own columns, so a metric built on
+# them means the same thing on every page.
+COMPLETED = {"status": ["Completed"]}
+REFUNDED = {"status": REFUND_STATUSES}
+
+MEASURES = {
+    # Order rows, or the daily cube with its "orders" count column
+    "transactions": {
+        "orders": (None, {}),
+        "completed_orders": (None, COMPLETED),
+        "refund_orders": (None, REFUNDED),
+        "gross_revenue": ("total", COMPLETED),
+        "refunded_revenue": ("total", REFUNDED),
+        "late_orders": (None, {"fulfillment_status": ["Late"]}),
+        "new_orders": (None, {"customer_type": ["New"]}),
+        "units_sold": ("items_count", COMPLETED),
+    },
+    # Traffic rows hold daily sessions and the completed orders and
+    # revenue they led to
+    "traffic": {
+        "orders": ("orders", {}),
+        "completed_orders": ("orders", {}),
+        "gross_revenue": ("revenue", {}),
+        "sessions": ("sessions", {}),
+    },
+}
+
+# ---------- METRICS ----------
+# Every KPI, declared once: a measure, or ``(op, a, b)`` with ``op`` one of
+# "-", "/" and "%" (a / b * 100) and ``a`` / ``b`` measures or expressions.
+# Ratios with a zero denominator are 0.
+METRICS = {
+    "total_orders": "orders",
+    "completed_orders": "completed_orders",
+    "refund_orders": "refund_orders",
+    "late_orders": "late_orders",
+    "units_sold": "units_sold",
+    "sessions": "sessions",
+    "gross_revenue": "gross_revenue",
+    "net_revenue": ("-", "gross_revenue", "refunded_revenue"),
+    "avg_order_value": ("/", "gross_revenue", "completed_orders"),
+    "refund_rate": ("/", "refund_orders", "completed_orders"),
+    "late_rate": ("/", "late_orders", "orders"),
+    "new_share": ("%", "new_orders", "orders"),
+    "conversion_rate": ("/", "orders", "sessions"),
+}
+
+
+def _measures(expression) -> list[str]:
+    if isinstance(expression, str):
+        return [expression]
+    _, a, b = expression
+    return _measures(a) + _measures(b)
+
+
+def _evaluate(expression, sums: dict):
+    if isinstance(expression, str):
+        return sums[expression]
+    op, a, b = expression
+    a, b = _evaluate(a, sums), _evaluate(b, sums)
+    if op == "-":
+        return a - b
+    ratio = a / b if b > 0 else 0
+    return ratio * 100 if op == "%" else ratio
+
+
+def _matches(values: pd.Series, accepted) -> np.ndarray:
+    """``values.isin(accepted)`` as a numpy mask; categoricals test each
+    category once and look the answer up by code."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        hit = np.append(values.cat.categories.isin(accepted), False)  # code -1
+        return hit[values.cat.codes.to_numpy()]
+    return values.isin(accepted).to_numpy()
+
+
+class MetricPlan:
+    """``metrics`` (names in :data:`METRICS`) compiled for one ``source``
+    of :data:`MEASURES` into a single fused aggregation.
+
+    Every distinct condition among the measures is tested once and becomes
+    one bit of a per-row class code; every distinct summed column is summed
+    per class with one ``np.bincount``. Each measure then adds up the
+    classes meeting its conditions, so measures sharing a column or a
+    filter share the work, and no filtered copies are built. Conditions
+    are few (2**n classes), like the status / late / new split of the
+    Transactions cards.
+    """
+
+    def __init__(self, metrics: list[str], source: str):
+        self.metrics = {name: METRICS[name] for name in metrics}
+        needed = dict.fromkeys(m for e in self.metrics.values() for m in _measures(e))
+        bindings = MEASURES[source]
+        missing = [m for m in needed if m not in bindings]
+        if missing:
+            raise ValueError(f"{source} has no measure(s) {missing} for {metrics}")
+        self.measures = {m: bindings[m] for m in needed}
+
+        self.conditions = []
+        self.columns = []
+        self.required = {}
+        for name, (column, where) in self.measures.items():
+            bits = 0
+            for condition in ((col, tuple(values)) for col, values in where.items()):
+                if condition not in self.conditions:
+                    self.conditions.append(condition)
+                bits |= 1 << self.conditions.index(condition)
+            self.required[name] = bits
+            if column not in self.columns:
+                self.columns.append(column)
+
+    @property
+    def row_columns(self) -> list[str]:
+        """Columns :meth:`sums` reads from order rows."""
+        conditioned = [col for col, _ in self.conditions]
+        return list(dict.fromkeys([*filter(None, self.columns), *conditioned]))
+
+    def sums(self, frame: pd.DataFrame, count_col: str | None = None) -> dict:
+        """Every measure over ``frame`` in one pass. ``count_col`` names a
+        column of pre-aggregated order counts (e.g. the daily cube);
+        without it each row is one order. Counts and sums of integer
+        columns come back as ints (exact below 2**53)."""
+        code_dtype = np.uint8 if len(self.conditions) <= 8 else np.int64
+        code = np.zeros(len(frame), dtype=code_dtype)
+        for bit, (col, values) in enumerate(self.conditions):
+            code |= _matches(frame[col], values).astype(code_dtype) << code_dtype(bit)
+        n_classes = 1 << len(self.conditions)
+        classes = np.arange(n_classes)
+
+        per_class, integer = {}, {}
+        for column in self.columns:
+            source = count_col if column is None else column
+            weights = None if source is None else frame[source].to_numpy(dtype=float)
+            per_class[column] = np.bincount(code, weights=weights, minlength=n_classes)
+            integer[column] = source is None or frame[source].dtype.kind in "biu"
+
+        sums = {}
+        for name, (column, _) in self.measures.items():
+            bits = self.required[name]
+            total = per_class[column][(classes & bits) == bits].sum()
+            sums[name] = int(round(total)) if integer[column] else float(total)
+        return sums
+
+    def derive(self, sums: dict) -> dict:
+        """The metrics from measure values (e.g. from :meth:`sums`)."""
+        return {name: _evaluate(e, sums) for name, e in self.metrics.items()}
+
+    def evaluate(self, frame: pd.DataFrame, count_col: str | None = None) -> dict:
+        return self.derive(self.sums(frame, count_col))
+
+    def from_columns(self, totals: dict, dtypes: pd.Series) -> dict:
+        """The metrics from precomputed column totals (e.g.
+        :meth:`rollups.PrefixSums.totals`); only for unfiltered column
+        measures. Totals of ``dtypes`` integer columns are rounded to ints."""
+        sums = {}
+        for name, (column, where) in self.measures.items():
+            if column is None or where:
+                raise ValueError(f"{name} needs the rows, not column totals")
+            total = totals[column]
+            sums[name] = int(round(total)) if dtypes[column].kind in "biu" else total
+        return self.derive(sums)
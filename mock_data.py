@@ -0,0 +1,331 @@
+# mock_data.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+# ---------- SODA CATALOG ----------
+CHANNELS = ["Web", "Mobile App", "In-Store POS"]
+PAYMENT_METHODS = ["Credit Card", "PayPal", "Apple Pay", "Google Pay"]
+STATUSES = ["Completed", "Refunded", "Pending", "Failed", "Chargeback"]
+REFUND_STATUSES = ["Refunded", "Chargeback"]
+SHIPPING_METHODS = ["Standard", "Express", "Local Delivery", "Pickup"]
+CUSTOMER_TYPES = ["New", "Returning"]
+FULFILLMENT_STATUSES = ["On-Time", "Late"]
+
+# Soda SKUs – all mock but soda-specific
+SODA_SKUS = [
+    {
+        "sku": "CC-12C-24",
+        "product_name": "Coca-Cola Classic 12oz Cans (24-pack)",
+        "brand": "Coca-Cola",
+        "flavor": "Cola",
+        "category": "Regular Soda",
+        "pack_size": 24,
+        "unit_price": 1.10,   # per can
+    },
+    {
+        "sku": "CC-20B-12",
+        "product_name": "Coca-Cola Classic 20oz Bottles (12-pack)",
+        "brand": "Coca-Cola",
+        "flavor": "Cola",
+        "category": "Regular Soda",
+        "pack_size": 12,
+        "unit_price": 1.80,
+    },
+    {
+        "sku": "SP-20B-12",
+        "product_name": "Sprite Lemon-Lime 20oz Bottles (12-pack)",
+        "brand": "Sprite",
+        "flavor": "Lemon-Lime",
+        "category": "Citrus Soda",
+        "pack_size": 12,
+        "unit_price": 1.79,
+    },
+    {
+        "sku": "FA-12C-12",
+        "product_name": "Fanta Orange 12oz Cans (12-pack)",
+        "brand": "Fanta",
+        "flavor": "Orange",
+        "category": "Fruit Soda",
+        "pack_size": 12,
+        "unit_price": 1.29,
+    },
+    {
+        "sku": "DP-12C-6",
+        "product_name": "Dr Pepper 12oz Cans (6-pack)",
+        "brand": "Dr Pepper",
+        "flavor": "Cola",
+        "category": "Specialty Cola",
+        "pack_size": 6,
+        "unit_price": 1.39,
+    },
+    {
+        "sku": "MD-16B-6",
+        "product_name": "Mountain Dew 16oz Bottles (6-pack)",
+        "brand": "Mountain Dew",
+        "flavor": "Citrus",
+        "category": "Citrus Soda",
+        "pack_size": 6,
+        "unit_price": 1.59,
+    },
+    {
+        "sku": "CCZ-12C-12",
+        "product_name": "Coke Zero 12oz Cans (12-pack)",
+        "brand": "Coca-Cola",
+        "flavor": "Cola",
+        "category": "Zero Sugar",
+        "pack_size": 12,
+        "unit_price": 1.35,
+    },
+    {
+        "sku": "EN-MON-16",
+        "product_name": "Monster Energy 16oz Cans (4-pack)",
+        "brand": "Monster",
+        "flavor": "Energy",
+        "category": "Energy Drink",
+        "pack_size": 4,
+        "unit_price": 2.99,
+    },
+]
+
+
+def _labels(values, codes: np.ndarray) -> pd.Categorical:
+    """Expand integer ``codes`` into a categorical over the distinct ``values``."""
+    value_codes, categories = pd.factorize(pd.Index(values))
+    return pd.Categorical.from_codes(value_codes[codes], categories=categories)
+
+
+def _pick(rng: np.random.Generator, values, n: int, p=None) -> pd.Categorical:
+    """Draw ``n`` labels from ``values``, optionally weighted by ``p``."""
+    return _labels(values, rng.choice(len(values), n, p=p))
+
+
+# ---------- MOCK SODA TRANSACTIONS DATA ----------
+def generate_mock_transactions(
+    n_days: int = 90,
+    orders_per_day: float = 35,
+    seed: int = 123,
+    n_customers: int = 200,
+) -> pd.DataFrame:
+    """Generate one row per soda order over the last ``n_days`` days.
+
+    Every column is drawn for the whole horizon at once, so the cost is a
+    handful of NumPy calls regardless of how many orders are produced.
+    """
+    rng = np.random.default_rng(seed)
+
+    end_date = datetime.today().date()
+    start_date = end_date - timedelta(days=n_days - 1)
+    dates = pd.date_range(start_date, end_date, freq="D")
+
+    # more weekend orders
+    day_factor = np.where(dates.weekday.isin([4, 5]), 1.3, 1.0)
+    orders_by_day = rng.poisson(orders_per_day * day_factor)
+    n = int(orders_by_day.sum())
+
+    order_dates = np.repeat(dates.to_numpy(), orders_by_day)
+
+    customers = [f"Customer #{i:04d}" for i in range(1, n_customers + 1)]
+    customer = pd.Index(customers).take(rng.integers(0, n_customers, n))
+    channel = _pick(rng, CHANNELS, n, p=[0.5, 0.25, 0.25])
+    payment_method = _pick(rng, PAYMENT_METHODS, n)
+
+    # choose a primary soda SKU for each order
+    skus = pd.DataFrame(SODA_SKUS)
+    sku_idx = rng.integers(0, len(skus), n)
+    pack_qty = rng.integers(1, 6, n)  # 1–5 packs of that SKU
+
+    pack_size = skus["pack_size"].to_numpy()[sku_idx]
+    units = pack_qty * pack_size
+
+    # Money in integer cents (schema.MONEY_COLUMNS)
+    unit_price = np.round(skus["unit_price"].to_numpy() * 100).astype(np.int64)
+    subtotal = units * unit_price[sku_idx]
+
+    # Discounts & fees
+    discount = rng.choice([0, 0, 0, 500, 1000], n)  # mostly no discount
+    shipping = rng.choice([0, 399, 699, 999], n, p=[0.25, 0.45, 0.2, 0.1])
+    tax = np.round(subtotal * 0.09).astype(np.int64)
+    total = np.maximum(100, subtotal + tax + shipping - discount)
+
+    status = _pick(rng, STATUSES, n, p=[0.83, 0.06, 0.05, 0.04, 0.02])
+    is_refund = np.asarray(status.isin(REFUND_STATUSES))
+
+    # Fulfilment timeliness
+    fulfillment_days = rng.choice(
+        [1, 2, 3, 4, 5, 7],
+        n,
+        p=[0.25, 0.3, 0.25, 0.1, 0.07, 0.03],
+    )
+    fulfillment_status = _labels(
+        FULFILLMENT_STATUSES, (fulfillment_days > 3).astype(int)
+    )
+
+    new_vs_returning = _pick(rng, CUSTOMER_TYPES, n, p=[0.3, 0.7])
+    shipping_method = _pick(rng, SHIPPING_METHODS, n, p=[0.5, 0.2, 0.2, 0.1])
+
+    order_id = "ORD-" + pd.Series(np.arange(10000, 10000 + n)).astype(str)
+
+    df = pd.DataFrame(
+        {
+            "order_id": order_id,
+            "date": order_dates,
+            "customer_name": customer,
+            "channel": channel,
+            "payment_method": payment_method,
+            "status": status,
+            "items_count": units,              # total cans/bottles
+            "packs": pack_qty,                 # number of packs
+            "primary_sku": _labels(skus["sku"], sku_idx),
+            "product_name": _labels(skus["product_name"], sku_idx),
+            "brand": _labels(skus["brand"], sku_idx),
+            "flavor": _labels(skus["flavor"], sku_idx),
+            "category": _labels(skus["category"], sku_idx),
+            "pack_size": pack_size,
+            "subtotal": subtotal,
+            "discount": discount,
+            "shipping": shipping,
+            "tax": tax,
+            "total": total,
+            "is_refund": is_refund,
+            "fulfillment_status": fulfillment_status,
+            "fulfillment_days": fulfillment_days,
+            "customer_type": new_vs_returning,
+            "shipping_method": shipping_method,
+        }
+    )
+    return df
+
+
+# ---------- MOCK SODA TRAFFIC DATA ----------
+# Soda-focused categories
+TRAFFIC_CATEGORIES = [
+    "Cola",
+    "Lemon-Lime",
+    "Citrus",
+    "Fruit Soda",
+    "Specialty Cola",
+    "Energy Drinks",
+]
+
+TRAFFIC_SOURCES = ["Organic Search", "Paid Ads", "Social", "Email", "Direct"]
+
+# Soda products (SKUs / names)
+TRAFFIC_PRODUCTS = [
+    "Coca-Cola Classic 12oz Cans (24-pack)",
+    "Coca-Cola Classic 20oz Bottles (12-pack)",
+    "Coke Zero 12oz Cans (12-pack)",
+    "Pepsi Cola 12oz Cans (12-pack)",
+    "Sprite Lemon-Lime 20oz Bottles (12-pack)",
+    "Fanta Orange 12oz Cans (12-pack)",
+    "Dr Pepper 12oz Cans (6-pack)",
+    "Mountain Dew 16oz Bottles (6-pack)",
+    "Monster Energy 16oz Cans (4-pack)",
+    "Red Bull 8.4oz Cans (4-pack)",
+]
+
+# Baseline demand by traffic source; unknown sources get the default
+SOURCE_BASE_SESSIONS = {
+    "Paid Ads": 130,
+    "Organic Search": 110,
+    "Social": 85,
+    "Email": 60,
+    "Direct": 75,
+}
+DEFAULT_BASE_SESSIONS = 75
+
+# Conversion rate varies by source (typical ecommerce behavior)
+SOURCE_BASE_CR = {
+    "Email": 0.055,
+    "Paid Ads": 0.04,
+    "Organic Search": 0.032,
+    "Direct": 0.03,
+    "Social": 0.024,
+}
+DEFAULT_BASE_CR = 0.024
+
+# Approximate cart values by category (multi-pack soda orders): (mean, std)
+CATEGORY_TICKET = {
+    "Energy Drinks": (45, 10),
+    "Specialty Cola": (38, 8),
+    "Fruit Soda": (38, 8),
+    "Cola": (32, 7),
+    "Lemon-Lime": (32, 7),
+    "Citrus": (32, 7),
+}
+DEFAULT_TICKET = (30, 6)
+
+
+def generate_mock_traffic(
+    n_days: int = 365,
+    traffic_sources: list[str] | None = None,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Generate one row per day × traffic source over the last ``n_days`` days.
+
+    Per-source and per-category parameters come from lookup tables and
+    each column is drawn in a single batched call.
+    """
+    rng = np.random.default_rng(seed)
+    sources = list(traffic_sources or TRAFFIC_SOURCES)
+
+    end_date = datetime.today().date()
+    start_date = end_date - timedelta(days=n_days - 1)
+    dates = pd.date_range(start_date, end_date, freq="D")
+    n = len(dates) * len(sources)
+
+    # Rows are date-major: every source for day 0, then day 1, ...
+    weekday = np.repeat(dates.weekday, len(sources))
+    base_sessions = np.tile(
+        [SOURCE_BASE_SESSIONS.get(s, DEFAULT_BASE_SESSIONS) for s in sources],
+        len(dates),
+    )
+    base_cr = np.tile(
+        [SOURCE_BASE_CR.get(s, DEFAULT_BASE_CR) for s in sources],
+        len(dates),
+    )
+
+    # Weekly seasonality: small early-week boost
+    weekday_boost = np.where(np.isin(weekday, [0, 1]), 1.1, 0.95)
+    # Weekend bump for soda runs
+    weekend_boost = np.where(np.isin(weekday, [4, 5]), 1.2, 1.0)
+
+    sessions = rng.poisson(base_sessions * weekday_boost * weekend_boost)
+
+    cr = np.clip(base_cr + rng.normal(0, 0.004, n), 0.006, 0.13)
+    orders = rng.binomial(sessions, cr)
+
+    # Pick a soda category & drive average ticket from that
+    category_idx = rng.integers(0, len(TRAFFIC_CATEGORIES), n)
+    ticket_mean, ticket_std = np.array(
+        [CATEGORY_TICKET.get(c, DEFAULT_TICKET) for c in TRAFFIC_CATEGORIES],
+        dtype=float,
+    ).T
+    avg_ticket = np.maximum(
+        8, rng.normal(ticket_mean[category_idx], ticket_std[category_idx])
+    )
+    revenue = orders * avg_ticket
+
+    product_idx = rng.integers(0, len(TRAFFIC_PRODUCTS), n)
+
+    df = pd.DataFrame(
+        {
+            "date": np.repeat(dates.to_numpy(), len(sources)),
+            "traffic_source": _labels(
+                sources, np.tile(np.arange(len(sources)), len(dates))
+            ),
+            "category": _labels(TRAFFIC_CATEGORIES, category_idx),
+            "product_name": _labels(TRAFFIC_PRODUCTS, product_idx),
+            "sessions": sessions,
+            "orders": orders,
+            "revenue": revenue,
+        }
+    )
+    df["conversion_rate"] = np.where(
+        df["sessions"] > 0, df["orders"] / df["sessions"], 0
+    )
+    df["aov"] = np.where(df["orders"] > 0, df["revenue"] / df["orders"], 0)
+
+    return df
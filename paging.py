@@ -0,0 +1,77 @@
+# paging.py
+import numpy as np
+import pandas as pd
+
+
+def sort_key(values: pd.Series) -> np.ndarray:
+    """A NumPy array that orders the same way as ``values`` is displayed.
+
+    Categoricals order by label (not by category position), datetimes and
+    booleans become integers; anything else is used as is.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        labels = np.asarray(values.cat.categories.astype(str), dtype=object)
+        label_rank = np.argsort(np.argsort(labels, kind="stable"))
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes < 0, -1, label_rank[codes])
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy().view(np.int64)
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=np.int8)
+    return values.to_numpy()
+
+
+def ranked_positions(key: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Positions of the rows ranked ``start`` to ``stop - 1`` when ``key``
+    is sorted ascending, ties broken by position.
+
+    Only the two boundary order statistics are found (``np.argpartition``)
+    and only the rows between them are sorted, so the cost is a few linear
+    passes plus sorting one page, regardless of which page is asked for.
+    """
+    n = len(key)
+    stop = min(stop, n)
+    if start >= stop:
+        return np.empty(0, dtype=np.int64)
+
+    part = np.argpartition(key, [start, stop - 1])
+    lo_val, hi_val = key[part[start]], key[part[stop - 1]]
+
+    # Rows equal to a boundary value are split by position, so a page
+    # boundary never falls differently between calls
+    below = np.count_nonzero(key < lo_val)
+    ties_lo = np.flatnonzero(key == lo_val)
+    if lo_val == hi_val:
+        return ties_lo[start - below : stop - below]
+
+    inside = np.flatnonzero((key > lo_val) & (key < hi_val))
+    inside = inside[np.argsort(key[inside], kind="stable")]
+    ties_hi = np.flatnonzero(key == hi_val)
+    before_hi = below + len(ties_lo) + len(inside)
+    return np.concatenate(
+        [ties_lo[start - below :], inside, ties_hi[: stop - before_hi]]
+    )
+
+
+def page_rows(
+    frame: pd.DataFrame,
+    sort_by: str,
+    descending: bool = False,
+    page: int = 0,
+    page_size: int = 50,
+    key: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """Rows on ``page`` (0-based) of ``frame`` sorted by ``sort_by``, or by
+    a precomputed per-row ``key`` (e.g. ranks of a dimension attribute).
+
+    Only that page is ever sorted; the rest of ``frame`` is left alone.
+    """
+    n = len(frame)
+    start, stop = page * page_size, min((page + 1) * page_size, n)
+    if key is None:
+        key = sort_key(frame[sort_by])
+    if descending:
+        positions = ranked_positions(key, n - stop, n - start)[::-1]
+    else:
+        positions = ranked_positions(key, start, stop)
+    return frame.iloc[positions]
@@ -0,0 +1,319 @@
+# parallel.py
+import argparse
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+# Worker processes for aggregate(); override with GURU_WORKERS. On a
+# single CPU, workers only add start-up and copying, so aggregate() stays
+# in-process whatever WORKERS says
+CPUS = os.cpu_count() or 1
+WORKERS = int(os.getenv("GURU_WORKERS", CPUS))
+# Smaller frames are aggregated in-process: below this, starting the
+# partitions and shipping results back costs more than the groupby
+PARALLEL_MIN_ROWS = int(os.getenv("GURU_PARALLEL_MIN_ROWS", 2_000_000))
+
+# How each partition's partial result combines into the final one.
+# ``nunique`` partials add up exactly only when every value lies in a
+# single partition, i.e. on a single date (partitions split between days):
+# see ``within_day`` in aggregate(). ``mean`` travels as a sum and a count.
+COMBINE = {
+    "sum": "sum",
+    "size": "sum",
+    "count": "sum",
+    "nunique": "sum",
+    "min": "min",
+    "max": "max",
+}
+AGGREGATIONS = [*COMBINE, "mean"]
+
+
+# ---------- PARTITIONS ----------
+def date_partitions(dates: np.ndarray, parts: int) -> list[tuple[int, int]]:
+    """Row ranges ``[lo, hi)`` splitting date-sorted ``dates`` into about
+    ``parts`` equal pieces, each cut moved to the next day boundary so a
+    day never spans two partitions."""
+    n = len(dates)
+    cuts = np.searchsorted(dates, dates[np.arange(1, parts) * n // parts], side="left")
+    bounds = np.unique(np.concatenate([[0], cuts, [n]]))
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+# ---------- SHARED-MEMORY COLUMNS ----------
+def _share(df: pd.DataFrame, columns: list[str]) -> tuple[list, list[SharedMemory]]:
+    """Copy ``columns`` into shared-memory blocks, once, so workers read
+    them without pickling. Returns a picklable spec per column and the
+    blocks (the caller unlinks them)."""
+    specs, blocks = [], []
+    for col in columns:
+        series = df[col]
+        labels = None
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values, labels = series.cat.codes.to_numpy(), series.cat.categories
+        elif series.dtype.kind in "biufMm":
+            values = series.to_numpy()
+        else:  # strings and other objects travel as codes
+            values, labels = pd.factorize(series)
+            labels = pd.Index(labels)
+        block = SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        categorical = isinstance(series.dtype, pd.CategoricalDtype)
+        specs.append(
+            (col, block.name, values.dtype.str, len(values), labels, categorical)
+        )
+    return specs, blocks
+
+
+def _attach(specs: list, lo: int, hi: int) -> tuple[pd.DataFrame, list[SharedMemory]]:
+    """Rows ``[lo, hi)`` of the shared columns as a frame (numeric columns
+    are views of the shared blocks)."""
+    columns, blocks = {}, []
+    for col, name, dtype, n, labels, categorical in specs:
+        block = SharedMemory(name=name)
+        blocks.append(block)
+        values = np.ndarray((n,), np.dtype(dtype), buffer=block.buf)[lo:hi]
+        if labels is None:
+            columns[col] = values
+        elif categorical:
+            columns[col] = pd.Categorical.from_codes(values, labels)
+        else:
+            columns[col] = labels.take(values)
+    return pd.DataFrame(columns, copy=False), blocks
+
+
+# ---------- MAP / REDUCE ----------
+def _aggregate(df: pd.DataFrame, by: list[str], agg: dict) -> pd.DataFrame:
+    return df.groupby(by, observed=True, sort=True).agg(**agg).reset_index()
+
+
+def _partial(specs: list, lo: int, hi: int, by: list[str], agg: dict) -> pd.DataFrame:
+    frame, blocks = _attach(specs, lo, hi)
+    try:
+        # Copy the (small) result out before the shared views are released
+        return _aggregate(frame, by, agg).copy(deep=True)
+    finally:
+        del frame
+        for block in blocks:
+            block.close()
+
+
+def _ready() -> None:
+    pass
+
+
+def _mapped(agg: dict) -> dict:
+    """``agg`` with each ``mean`` split into a partial sum and count."""
+    mapped = {}
+    for out, (col, func) in agg.items():
+        if func == "mean":
+            mapped[f"{out}__sum"] = (col, "sum")
+            mapped[f"{out}__count"] = (col, "count")
+        else:
+            mapped[out] = (col, func)
+    return mapped
+
+
+def _combine(partials: list[pd.DataFrame], by: list[str], agg: dict) -> pd.DataFrame:
+    mapped = _mapped(agg)
+    combined = (
+        pd.concat(partials, ignore_index=True)
+        .groupby(by, observed=True, sort=True)
+        .agg({out: COMBINE[func] for out, (_, func) in mapped.items()})
+    )
+    for out, (_, func) in agg.items():
+        if func == "mean":
+            combined[out] = combined.pop(f"{out}__sum") / combined.pop(
+                f"{out}__count"
+            ).replace(0, np.nan)
+    return combined[list(agg)].reset_index()
+
+
+@contextmanager
+def _bare_main():
+    """Streamlit runs each page as ``__main__``, and a spawned process
+    re-runs its parent's ``__main__`` on start-up; hide the page meanwhile.
+    Used with ``_pool_lock`` held."""
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+# Sessions run on their own threads: one at a time may replace the pool
+# and, while its workers start, swap out ``__main__``
+_pool_lock = threading.Lock()
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    """A process pool kept across calls (and Streamlit reruns). Workers
+    are spawned rather than forked from the multi-threaded app server,
+    and all started at once here."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+            _pool_size = workers
+            with _bare_main():
+                for future in [_pool.submit(_ready) for _ in range(workers)]:
+                    future.result()
+        return _pool
+
+
+def _discard_pool() -> None:
+    """Drop a pool whose worker died, so the next call starts a new one."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_size = None, 0
+
+
+def check_aggregations(agg: dict) -> None:
+    """Raise ``ValueError`` for an ``agg`` entry whose ``func`` is not one
+    of :data:`AGGREGATIONS`."""
+    for out, (_, func) in agg.items():
+        if func not in AGGREGATIONS:
+            raise ValueError(f"{out}: unsupported aggregation {func!r}")
+
+
+def aggregate(
+    df: pd.DataFrame,
+    by: str | list[str],
+    agg: dict,
+    workers: int | None = None,
+    min_rows: int | None = None,
+    within_day: list[str] | tuple = (),
+) -> pd.DataFrame:
+    """``df.groupby(by).agg(**agg)`` as a flat frame sorted by ``by``,
+    computed as a map-reduce over date partitions of ``df``.
+
+    ``agg`` maps each output column to ``(column, func)`` with ``func`` one
+    of :data:`AGGREGATIONS`. The columns used are copied once into shared
+    memory, each worker aggregates a range of whole days, and the partial
+    results are combined with :data:`COMBINE`. Frames under ``min_rows``
+    rows (default :data:`PARALLEL_MIN_ROWS`), a single worker or a single
+    CPU use one in-process groupby instead.
+
+    ``nunique`` is only split across partitions for ``date`` and the
+    ``within_day`` columns, whose every value occurs on a single date (e.g.
+    ``order_id``), or when ``by`` includes ``date``; otherwise the whole
+    groupby runs in-process.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    check_aggregations(agg)
+    workers = WORKERS if workers is None else workers
+    min_rows = PARALLEL_MIN_ROWS if min_rows is None else min_rows
+    exact = "date" in by or all(
+        col == "date" or col in within_day
+        for col, func in agg.values()
+        if func == "nunique"
+    )
+    if workers <= 1 or CPUS == 1 or df.empty or len(df) < min_rows or not exact:
+        return _aggregate(df, by, agg)
+
+    if not df["date"].is_monotonic_increasing:
+        df = df.sort_values("date", kind="stable", ignore_index=True)
+    used = list(dict.fromkeys([*by, *(col for col, _ in agg.values())]))
+    partitions = date_partitions(df["date"].to_numpy(), workers)
+
+    specs, blocks = _share(df, used)
+    try:
+        pool = _executor(workers)
+        futures = [
+            pool.submit(_partial, specs, lo, hi, by, _mapped(agg))
+            for lo, hi in partitions
+        ]
+        partials = [future.result() for future in futures]
+    except BrokenProcessPool:
+        _discard_pool()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return _combine(partials, by, agg)
+
+
+# ---------- BENCHMARK ----------
+def _benchmark_frame(rows: int, days: int = 1095, seed: int = 0) -> pd.DataFrame:
+    """Synthetic date-sorted orders shaped like the transaction store."""
+    rng = np.random.default_rng(seed)
+    day = np.sort(rng.integers(0, days, rows))
+    return pd.DataFrame(
+        {
+            "date": np.datetime64("2024-01-01", "ns") + day.astype("timedelta64[D]"),
+            "order_id": np.arange(rows, dtype=np.int64),
+            "customer_id": rng.integers(0, rows // 20 + 1, rows, dtype=np.int32),
+            "sku_id": rng.integers(0, 40, rows, dtype=np.int32),
+            "total": rng.integers(100, 20_000, rows, dtype=np.int64),
+            "items_count": rng.integers(1, 48, rows, dtype=np.int64),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time aggregate() against a single pandas groupby "
+        "(the Transactions customer summary) at several worker counts."
+    )
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = _benchmark_frame(args.rows)
+    agg = {
+        "orders": ("order_id", "nunique"),
+        "net_spend": ("total", "sum"),
+        "units_purchased": ("items_count", "sum"),
+    }
+
+    def best(run) -> tuple[float, pd.DataFrame]:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = run()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    baseline, expected = best(lambda: _aggregate(df, ["customer_id"], agg))
+    print(f"{args.rows:,} rows on {os.cpu_count()} cores")
+    print(f"pandas groupby       {baseline:7.2f}s")
+
+    def parallel(rows: pd.DataFrame, workers: int) -> pd.DataFrame:
+        return aggregate(
+            rows, "customer_id", agg, workers, min_rows=0, within_day=["order_id"]
+        )
+
+    for workers in args.workers:
+        parallel(df.head(workers * 2), workers)  # warm pool
+        seconds, result = best(lambda: parallel(df, workers))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+        print(
+            f"{workers:2d} worker(s)         {seconds:7.2f}s"
+            f"  speedup {baseline / seconds:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    # Run from the importable module, so workers can unpickle its functions
+    import parallel
+
+    parallel.main()
@@ -0,0 +1,327 @@
+# result_cache.py
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from storage import DATA_DIR
+
+# Results survive restarts here; override with GURU_CACHE_DIR
+CACHE_DIR = Path(os.getenv("GURU_CACHE_DIR", DATA_DIR / "cache"))
+CACHE_MEMORY_BYTES = int(os.getenv("GURU_CACHE_MEMORY_MB", 256)) * 2**20
+CACHE_DISK_BYTES = int(os.getenv("GURU_CACHE_DISK_MB", 1024)) * 2**20
+# Entries older than this are recomputed even if the data has not changed
+CACHE_TTL_SECONDS = int(os.getenv("GURU_CACHE_TTL_SECONDS", 24 * 3600))
+
+# Arrow schema metadata: what the file holds and when it was computed
+KIND_KEY = b"guru.kind"
+STORED_KEY = b"guru.stored_at"
+CACHE_SUFFIX = ".arrow"
+
+
+# ---------- KEYS ----------
+def _canonical(value):
+    """A JSON-able stand-in for an argument that is equal for equal values
+    (sets and dict keys sorted, dates as ISO strings, frames by content)."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        return ["frame", hashlib.sha256(digest.tobytes()).hexdigest()]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=str)}
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    raise TypeError(
+        f"Cannot key a cached result on {type(value).__name__}; "
+        "prefix the argument with _ to leave it out of the key"
+    )
+
+
+def _code_digest(fn) -> str:
+    """Hash of ``fn``'s source (its bytecode when the source is not
+    available), so results computed by older code never match."""
+    try:
+        code = inspect.getsource(fn).encode()
+    except (OSError, TypeError):
+        code = fn.__code__.co_code + repr(fn.__code__.co_names).encode()
+    return hashlib.sha256(code).hexdigest()
+
+
+def result_key(fn, args: tuple, kwargs: dict, version=None) -> str:
+    """Key for ``fn(*args, **kwargs)`` on data ``version``: the function's
+    file, qualified name and code, every argument not named with a leading
+    underscore, and the version stamp."""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    keyed = {
+        name: value
+        for name, value in bound.arguments.items()
+        if not name.startswith("_")
+    }
+    parts = [
+        os.path.basename(fn.__code__.co_filename),
+        fn.__qualname__,
+        _code_digest(fn),
+        _canonical(keyed),
+        _canonical(version),
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+# ---------- VALUES ----------
+# Cached results are DataFrames (filtered aggregates, chart data), bytes
+# (report files) or flat dicts of numbers / strings (KPI sets); each kind
+# is stored as one Arrow table. Files are Arrow IPC rather than Parquet so
+# every type (e.g. second-resolution timestamps) reads back unchanged.
+def _to_table(value) -> tuple[pa.Table, str]:
+    if isinstance(value, pd.DataFrame):
+        return pa.Table.from_pandas(value), "frame"
+    if isinstance(value, (bytes, bytearray)):
+        return pa.table({"data": pa.array([bytes(value)], pa.binary())}), "bytes"
+    if isinstance(value, dict):
+        return pa.Table.from_pylist([value]), "record"
+    raise TypeError(f"Cannot cache a {type(value).__name__} result")
+
+
+def _from_table(table: pa.Table, kind: str):
+    if kind == "frame":
+        return table.to_pandas()
+    if kind == "bytes":
+        return table.column("data")[0].as_py()
+    return table.to_pylist()[0]
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 64 * (len(value) + 1)
+
+
+class ResultCache:
+    """Two-tier cache of computed results.
+
+    Memory: least recently used entries are evicted once their total size
+    passes ``memory_bytes``. Disk: one Arrow file per entry under
+    ``directory``, kept across restarts; the least recently used files go
+    once they pass ``disk_bytes``. Entries older than ``ttl`` seconds are
+    expired in both tiers. Memory hits hand out the stored object itself;
+    with copy-on-write, callers modifying it get their own copy.
+
+    :attr:`counts` tracks memory / disk hits, misses, evictions and
+    expirations; :meth:`stats` adds the current tier sizes.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        memory_bytes: int = CACHE_MEMORY_BYTES,
+        disk_bytes: int = CACHE_DISK_BYTES,
+        ttl: float = CACHE_TTL_SECONDS,
+    ):
+        self.directory = Path(directory)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self.counts = Counter()
+        self._memory = OrderedDict()  # key -> (value, nbytes, stored_at)
+        self._memory_used = 0
+        self._disk_used = None  # scanned on first disk write
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    # ----- memory tier -----
+    def _remember(self, key: str, value, stored_at: float) -> None:
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._memory:
+                self._memory_used -= self._memory.pop(key)[1]
+            if size > self.memory_bytes:
+                return
+            self._memory[key] = (value, size, stored_at)
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, (_, evicted, _) = self._memory.popitem(last=False)
+                self._memory_used -= evicted
+                self.counts["memory_evictions"] += 1
+
+    def _recall(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, size, stored_at = entry
+            expired = time.time() - stored_at > self.ttl
+            if expired:
+                del self._memory[key]
+                self._memory_used -= size
+                self.counts["expirations"] += 1
+            else:
+                self._memory.move_to_end(key)
+                self.counts["memory_hits"] += 1
+        if expired:
+            self._unlink(self._path(key))  # the same entry on disk
+            return None
+        return entry
+
+    # ----- disk tier -----
+    def _write(self, key: str, value, stored_at: float) -> None:
+        table, kind = _to_table(value)
+        metadata = dict(table.schema.metadata or {})
+        metadata[KIND_KEY] = kind.encode()
+        metadata[STORED_KEY] = repr(stored_at).encode()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        table = table.replace_schema_metadata(metadata)
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        replaced = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+        self._track_disk(path.stat().st_size - replaced)
+
+    def _read(self, key: str):
+        path = self._path(key)
+        try:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, OSError, pa.ArrowInvalid):
+            return None
+        metadata = table.schema.metadata or {}
+        stored_at = float(metadata.get(STORED_KEY, b"0"))
+        if time.time() - stored_at > self.ttl:
+            self._unlink(path)
+            self._count("expirations")
+            return None
+        os.utime(path)  # recently used
+        self._count("disk_hits")
+        return _from_table(table, metadata[KIND_KEY].decode()), stored_at
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._disk_used is not None:
+                self._disk_used -= size
+
+    def _files(self) -> list[os.DirEntry]:
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        return [e for e in entries if e.name.endswith(CACHE_SUFFIX)]
+
+    def _track_disk(self, added: int) -> None:
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(e.stat().st_size for e in self._files())
+            else:
+                self._disk_used += added
+            over = self._disk_used > self.disk_bytes
+        if over:
+            # Oldest use first (hits touch the file)
+            for entry in sorted(self._files(), key=lambda e: e.stat().st_mtime):
+                if self._disk_used <= self.disk_bytes:
+                    break
+                self._unlink(Path(entry.path))
+                self._count("disk_evictions")
+
+    # ----- public API -----
+    def get(self, key: str):
+        """The cached value for ``key``, or ``None``."""
+        entry = self._recall(key)
+        if entry is not None:
+            return entry[0]
+        found = self._read(key)
+        if found is None:
+            self._count("misses")
+            return None
+        value, stored_at = found
+        self._remember(key, value, stored_at)
+        return value
+
+    def put(self, key: str, value) -> None:
+        stored_at = time.time()
+        self._write(key, value, stored_at)
+        self._remember(key, value, stored_at)
+
+    def cached(self, version=None):
+        """Decorator caching a function's result in both tiers.
+
+        ``version`` is called on every call for the data-version stamp
+        (e.g. ``storage.store_version``), so results computed before new
+        orders were ingested stop matching as soon as the stamp changes.
+        Arguments whose names start with ``_`` are passed through but left
+        out of the key, as with ``st.cache_data``.
+        """
+
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                stamp = version() if version is not None else None
+                key = result_key(fn, args, kwargs, stamp)
+                value = self.get(key)
+                if value is None:
+                    value = fn(*args, **kwargs)
+                    self.put(key, value)
+                return value
+
+            return wrapper
+
+        return decorate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        for entry in self._files():
+            self._unlink(Path(entry.path))
+
+    def stats(self) -> dict:
+        """Hit / miss / eviction / expiration counts and tier sizes."""
+        names = [
+            "memory_hits",
+            "disk_hits",
+            "misses",
+            "memory_evictions",
+            "disk_evictions",
+            "expirations",
+        ]
+        with self._lock:
+            stats = {name: self.counts[name] for name in names}
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_used
+            stats["disk_bytes"] = self._disk_used
+        return stats
+
+
+# One cache shared by every page and session of the app process
+RESULTS = ResultCache()
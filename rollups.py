@@ -0,0 +1,536 @@
+# rollups.py
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from metrics import MetricPlan
+from schema import CENTS_PER_DOLLAR
+
+
+# ---------- DAILY TRANSACTIONS CUBE ----------
+# Every KPI filter is one of these keys. Order totals are keyed by a coarse
+# band (``total_band``: bands start at TOTAL_BAND_EDGES, whole dollars), not
+# by amount, so a day has at most one cell per band and combination of the
+# other keys however many orders it holds. A "Min Order Total" threshold
+# takes the bands wholly above it from the cube, and only the orders in the
+# band it cuts through from the raw rows (see cube_kpis).
+TOTAL_BAND_EDGES = [0, 5, 10, 15, 20, 25, 30, 40, 50, 75, 100, 150, 200, 300, 500]
+
+CUBE_DIMENSIONS = [
+    "date",
+    "channel",
+    "category",
+    "status",
+    "customer_type",
+    "fulfillment_status",
+    "total_band",
+]
+
+
+def _summable(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """``df`` with the downcast integer ``columns`` widened to int64: grouped
+    sums can keep an int8/int16 dtype and silently overflow."""
+    return df.astype({col: np.int64 for col in columns})
+
+
+def total_bands(cents) -> np.ndarray:
+    """Band of each order total (cents): the last edge at or below it."""
+    edges = np.asarray(TOTAL_BAND_EDGES) * CENTS_PER_DOLLAR
+    band = np.searchsorted(edges, np.asarray(cents), side="right") - 1
+    return np.maximum(band, 0).astype(np.int8)
+
+
+def band_split(min_dollars: float) -> tuple[int, float | None]:
+    """The first band wholly at or above a minimum order total, and that
+    band's lower edge (dollars; ``None`` past the last edge). Orders from
+    ``min_dollars`` up to the edge lie in the band the threshold cuts
+    through; there are none when the threshold is itself an edge."""
+    band = int(np.searchsorted(TOTAL_BAND_EDGES, min_dollars, side="left"))
+    edge = TOTAL_BAND_EDGES[band] if band < len(TOTAL_BAND_EDGES) else None
+    return band, edge
+
+
+def build_daily_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Roll raw orders up to one row per observed combination of
+    :data:`CUBE_DIMENSIONS`, holding order count, total and largest order
+    total (cents) and units."""
+    cube = (
+        _summable(df, ["items_count"])
+        .assign(total_band=total_bands(df["total"]))
+        .groupby(CUBE_DIMENSIONS, observed=True, sort=True)
+        .agg(
+            orders=("total", "size"),
+            total=("total", "sum"),
+            max_total=("total", "max"),
+            items_count=("items_count", "sum"),
+        )
+        .reset_index()
+    )
+    return cube
+
+
+# How each cube measure combines when two cubes are merged
+CUBE_MEASURES = {
+    "orders": "sum",
+    "total": "sum",
+    "max_total": "max",
+    "items_count": "sum",
+}
+
+
+def merge_rollups(
+    base: pd.DataFrame | None,
+    delta: pd.DataFrame,
+    keys: list[str],
+    how: dict,
+) -> pd.DataFrame:
+    """Fold the rollup ``delta`` into ``base``.
+
+    Rows are matched on ``keys`` and each measure is combined with its
+    ``how`` aggregation (sum, max, min), so a rollup of new orders updates
+    a stored rollup without going back to the raw rows.
+    """
+    if base is None or base.empty:
+        return delta
+    return (
+        pd.concat([base, delta], ignore_index=True)
+        .groupby(keys, observed=True, sort=True)
+        .agg(how)
+        .reset_index()
+    )
+
+
+def merge_cube(cube: pd.DataFrame | None, delta: pd.DataFrame) -> pd.DataFrame:
+    return merge_rollups(cube, delta, CUBE_DIMENSIONS, CUBE_MEASURES)
+
+
+# ---------- DAILY ORDER-TOTAL SKETCH ----------
+# Order totals are counted per day in logarithmic buckets: bucket i holds
+# totals in (gamma**(i-1), gamma**i] cents, gamma = (1 + a) / (1 - a), so
+# any quantile read back is within a relative error ``a`` of an order
+# total at that rank. A few hundred buckets cover every total from a cent
+# to millions of dollars; days merge by adding counts, like the cube.
+# Stored sketches are built with this accuracy; rebuild them (delete
+# storage.SKETCH_FILE) after changing it.
+SKETCH_ACCURACY = 0.005
+
+SKETCH_MEASURES = {
+    "orders": "sum",
+    "min_total": "min",
+    "max_total": "max",
+}
+
+
+def _gamma(accuracy: float) -> float:
+    return (1 + accuracy) / (1 - accuracy)
+
+
+def build_total_sketch(
+    df: pd.DataFrame, accuracy: float = SKETCH_ACCURACY
+) -> pd.DataFrame:
+    """Order count and smallest / largest total (cents) per day and bucket."""
+    cents = np.maximum(df["total"].to_numpy(), 1)
+    bucket = np.ceil(np.log(cents) / np.log(_gamma(accuracy)) - 1e-9)
+    return (
+        df.assign(bucket=bucket.astype(np.int32))
+        .groupby(["date", "bucket"], sort=True)
+        .agg(
+            orders=("total", "size"),
+            min_total=("total", "min"),
+            max_total=("total", "max"),
+        )
+        .reset_index()
+    )
+
+
+def merge_total_sketch(
+    sketch: pd.DataFrame | None, delta: pd.DataFrame
+) -> pd.DataFrame:
+    return merge_rollups(sketch, delta, ["date", "bucket"], SKETCH_MEASURES)
+
+
+def sketch_quantile(
+    sketch: pd.DataFrame, q: float, accuracy: float = SKETCH_ACCURACY
+) -> float:
+    """Approximate ``q``-quantile of the order totals (cents) in ``sketch``
+    (any selection of days): the midpoint of the bucket holding that rank,
+    clamped to the totals actually seen in it."""
+    bucket = sketch["bucket"].to_numpy()
+    first = bucket.min()
+    slot = bucket - first
+    counts = np.bincount(slot, weights=sketch["orders"].to_numpy())
+    cumulative = np.cumsum(counts)
+    i = int(np.searchsorted(cumulative, q * cumulative[-1]))
+
+    in_bucket = slot == i
+    gamma = _gamma(accuracy)
+    midpoint = 2 * gamma ** (first + i) / (gamma + 1)
+    return float(
+        np.clip(
+            midpoint,
+            sketch["min_total"].to_numpy()[in_bucket].min(),
+            sketch["max_total"].to_numpy()[in_bucket].max(),
+        )
+    )
+
+
+def sketch_bounds(sketch: pd.DataFrame) -> tuple[int, int]:
+    """Exact smallest and largest order total (cents) in ``sketch``."""
+    return int(sketch["min_total"].min()), int(sketch["max_total"].max())
+
+
+# ---------- DISTINCT CUSTOMER SKETCH ----------
+# A HyperLogLog sketch of customer_id per day × channel × customer_type.
+# Each customer hashes to one of 2**HLL_PRECISION registers, and a register
+# keeps the largest "rank" (leading zero bits + 1 of the low 32 hash bits)
+# seen in it. Registers merge by taking the max, so the sketch of any date
+# range and channel / customer type selection is the register-wise max of
+# its cells, and the distinct count costs O(cells) whatever the number of
+# orders.
+# The estimate's relative standard error is 1.04 / sqrt(2**HLL_PRECISION),
+# 1.6% at precision 12: about 68% of estimates fall within 1.6% of the
+# true count, 95% within 3.3%, 99.7% within 4.9%. Counts below 2.5 × the
+# number of registers use linear counting, whose error is about as small
+# (1.1% at 200 customers).
+# Each cell stores its registers densely, one byte each (4 KiB at
+# precision 12), so the sketch grows with days × cells and never with the
+# number of orders.
+# Stored sketches use this precision; rebuild them (delete
+# storage.CUSTOMER_SKETCH_FILE) after changing it.
+HLL_PRECISION = 12
+
+HLL_DIMENSIONS = ["date", "channel", "customer_type"]
+
+
+def _hash64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finaliser: well-mixed 64-bit hashes of integer keys."""
+    h = values.astype(np.uint64)
+    with np.errstate(over="ignore"):
+        h = h + np.uint64(0x9E3779B97F4A7C15)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _registers(keys: np.ndarray, precision: int) -> tuple[np.ndarray, np.ndarray]:
+    """Register and rank of each key: the top ``precision`` hash bits pick
+    the register; the rank comes from the low 32 bits."""
+    h = _hash64(keys)
+    register = (h >> np.uint64(64 - precision)).astype(np.int32)
+    low = (h & np.uint64(0xFFFFFFFF)).astype(np.float64)  # exact in float64
+    _, bit_length = np.frexp(low)
+    return register, (33 - bit_length).astype(np.int8)
+
+
+def _register_matrix(sketch: pd.DataFrame, precision: int) -> np.ndarray:
+    """The registers of ``sketch``, one row per cell."""
+    packed = b"".join(sketch["registers"])
+    return np.frombuffer(packed, dtype=np.int8).reshape(-1, 1 << precision)
+
+
+def _fold_cells(cells: pd.DataFrame, fold, precision: int) -> pd.DataFrame:
+    """One sketch row per distinct cell of ``cells``. ``fold(registers,
+    codes)`` max-folds into the zeroed ``registers`` matrix, given each
+    row's cell number ``codes``."""
+    grouped = cells.groupby(HLL_DIMENSIONS, observed=True, sort=True)
+    registers = np.zeros((grouped.ngroups, 1 << precision), dtype=np.int8)
+    fold(registers, grouped.ngroup().to_numpy())
+    keys = grouped.size().reset_index()[HLL_DIMENSIONS]
+    return keys.assign(registers=[row.tobytes() for row in registers])
+
+
+def build_customer_sketch(
+    df: pd.DataFrame, precision: int = HLL_PRECISION
+) -> pd.DataFrame:
+    """Registers (``bytes``, one byte per register) per day × channel ×
+    customer_type."""
+    register, rank = _registers(df["customer_id"].to_numpy(), precision)
+    return _fold_cells(
+        df[HLL_DIMENSIONS],
+        lambda registers, codes: np.maximum.at(registers, (codes, register), rank),
+        precision,
+    )
+
+
+def merge_customer_sketch(
+    sketch: pd.DataFrame | None,
+    delta: pd.DataFrame,
+    precision: int = HLL_PRECISION,
+) -> pd.DataFrame:
+    """Cells of both sketches, registers of a cell in both max-merged."""
+    if sketch is None or sketch.empty:
+        return delta
+    both = pd.concat([sketch, delta], ignore_index=True)
+    matrix = _register_matrix(both, precision)
+    return _fold_cells(
+        both[HLL_DIMENSIONS],
+        lambda registers, codes: np.maximum.at(registers, codes, matrix),
+        precision,
+    )
+
+
+def distinct_customers(sketch: pd.DataFrame, precision: int = HLL_PRECISION) -> float:
+    """Estimated number of distinct customers across the rows of ``sketch``
+    (any selection of days, channels and customer types).
+
+    Relative standard error 1.04 / sqrt(2**precision); see above.
+    """
+    m = 1 << precision
+    registers = np.zeros(m, dtype=np.int8)
+    if len(sketch):
+        registers = _register_matrix(sketch, precision).max(axis=0)
+
+    empty = int(np.count_nonzero(registers == 0))
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    if estimate <= 2.5 * m and empty:
+        return m * float(np.log(m / empty))  # linear counting
+    return float(estimate)
+
+
+# ---------- RUNNING CUSTOMER / SKU TOTALS ----------
+CUSTOMER_MEASURES = {
+    "orders": "sum",
+    "net_spend": "sum",
+    "units_purchased": "sum",
+    "first_order": "min",
+    "last_order": "max",
+}
+
+SKU_MEASURES = {
+    "total_packs_sold": "sum",
+    "units_sold": "sum",
+    "revenue": "sum",
+}
+
+
+def build_customer_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Orders, net spend (cents, refunds negative), units and first/last
+    order date per ``customer_id``."""
+    return (
+        _summable(df, ["items_count"])
+        .assign(net_spend=np.where(df["is_refund"], -df["total"], df["total"]))
+        .groupby("customer_id", sort=True)
+        .agg(
+            orders=("order_id", "size"),
+            net_spend=("net_spend", "sum"),
+            units_purchased=("items_count", "sum"),
+            first_order=("date", "min"),
+            last_order=("date", "max"),
+        )
+        .reset_index()
+    )
+
+
+def build_sku_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Packs, units and revenue (cents) per ``sku_id`` over completed orders."""
+    return (
+        _summable(df[df["status"] == "Completed"], ["packs", "items_count"])
+        .groupby("sku_id", sort=True)
+        .agg(
+            total_packs_sold=("packs", "sum"),
+            units_sold=("items_count", "sum"),
+            revenue=("total", "sum"),
+        )
+        .reset_index()
+    )
+
+
+# Every Transactions KPI card (definitions in metrics.METRICS)
+TRANSACTION_KPIS = MetricPlan(
+    [
+        "net_revenue",
+        "total_orders",
+        "completed_orders",
+        "refund_orders",
+        "refund_rate",
+        "avg_order_value",
+        "late_orders",
+        "late_rate",
+        "new_share",
+        "units_sold",
+    ],
+    "transactions",
+)
+
+
+def transaction_kpis(frame: pd.DataFrame, count_col: str | None = None) -> dict:
+    """Every Transactions KPI card from one fused pass over ``frame``
+    (see :class:`metrics.MetricPlan`). ``count_col`` names a column of
+    pre-aggregated order counts (e.g. the daily cube); without it each
+    row is one order. Money KPIs are in cents."""
+    return TRANSACTION_KPIS.evaluate(frame, count_col)
+
+
+def cube_kpis(
+    cube: pd.DataFrame, min_total: float = 0, boundary: pd.DataFrame | None = None
+) -> dict:
+    """Transactions KPI cards for orders of at least ``min_total`` dollars,
+    from (a filtered slice of) the daily cube: its cells in the bands
+    wholly above the threshold, plus ``boundary``, the raw orders of the
+    same slice from ``min_total`` up to the next band edge (see
+    :func:`band_split`; not needed when the threshold is an edge)."""
+    band, _ = band_split(min_total)
+    sums = TRANSACTION_KPIS.sums(cube[cube["total_band"] >= band], count_col="orders")
+    if boundary is not None and len(boundary):
+        extra = TRANSACTION_KPIS.sums(boundary)
+        sums = {name: total + extra[name] for name, total in sums.items()}
+    return TRANSACTION_KPIS.derive(sums)
+
+
+# ---------- PREFIX SUMS FOR PERIOD COMPARISONS ----------
+class PrefixSums:
+    """Running daily totals of ``measures`` for every combination of ``dims``.
+
+    ``prefix[d]`` holds the totals of all days before calendar day ``d``
+    (days with no rows count as zero), so the total for any date range and
+    filter selection is two array lookups plus a sum over the selected
+    dimension cells — independent of how many rows or days there are.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        dims: list[str],
+        measures: list[str],
+        date_col: str = "date",
+    ):
+        self.dims = dims
+        self.measures = measures
+
+        day = df[date_col].to_numpy().astype("datetime64[D]")
+        self.first_day = day.min()
+        n_days = int((day.max() - self.first_day).astype(int)) + 1
+        self.days = self.first_day + np.arange(n_days)
+
+        # Flat cell index: day-major, then each dimension's code
+        self.values = {}
+        flat = (day - self.first_day).astype(np.int64)
+        shape = [n_days]
+        for dim in dims:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            self.values[dim] = list(uniques)
+            flat = flat * len(uniques) + codes
+            shape.append(len(uniques))
+
+        size = int(np.prod(shape))
+        daily = np.stack(
+            [
+                np.bincount(flat, weights=df[m].to_numpy(dtype=float), minlength=size)
+                for m in measures
+            ],
+            axis=-1,
+        ).reshape(*shape, len(measures))
+
+        self.prefix = np.concatenate(
+            [np.zeros((1, *shape[1:], len(measures))), daily.cumsum(axis=0)]
+        )
+
+    def _offset(self, day, side: str) -> int:
+        day = np.datetime64(pd.Timestamp(day).date(), "D")
+        return int(np.searchsorted(self.days, day, side=side))
+
+    def totals(self, start, end, selections: dict | None = None) -> dict:
+        """Sum of each measure from ``start`` through ``end`` inclusive.
+
+        ``selections`` maps a dimension to its selected values; dimensions
+        that are not mentioned are fully included.
+        """
+        lo, hi = self._offset(start, "left"), self._offset(end, "right")
+        window = self.prefix[max(hi, lo)] - self.prefix[lo]
+        for axis, dim in enumerate(self.dims):
+            selected = (selections or {}).get(dim)
+            if selected is not None:
+                keep = np.isin(self.values[dim], list(selected))
+                window = np.compress(keep, window, axis=axis)
+        sums = window.reshape(-1, len(self.measures)).sum(axis=0)
+        return dict(zip(self.measures, sums))
+
+    def compare(self, start, end, selections: dict | None = None) -> dict:
+        """Totals for the range, the equally long period right before it,
+        and the same dates one year earlier."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        one_day = pd.Timedelta(days=1)
+        length = end - start + one_day
+        year = pd.DateOffset(years=1)
+        return {
+            "current": self.totals(start, end, selections),
+            "previous": self.totals(start - length, start - one_day, selections),
+            "year_ago": self.totals(start - year, end - year, selections),
+        }
+
+
+# ---------- BENCHMARK ----------
+def _filtered_copy_kpis(filtered: pd.DataFrame) -> dict:
+    """The Transactions KPI block before :func:`transaction_kpis`: a
+    filtered copy per group of orders, each summed and counted."""
+    completed = filtered[filtered["status"] == "Completed"]
+    refunded = filtered[filtered["is_refund"]]
+    late_shipments = filtered[filtered["fulfillment_status"] == "Late"]
+    new_customers_orders = filtered[filtered["customer_type"] == "New"]
+    gross_revenue = completed["total"].sum()
+    total_orders = len(filtered)
+    completed_orders = len(completed)
+    return {
+        "net_revenue": gross_revenue - refunded["total"].sum(),
+        "total_orders": total_orders,
+        "completed_orders": completed_orders,
+        "refund_orders": len(refunded),
+        "refund_rate": len(refunded) / completed_orders if completed_orders else 0,
+        "avg_order_value": completed["total"].mean() if completed_orders else 0,
+        "late_orders": len(late_shipments),
+        "late_rate": len(late_shipments) / total_orders if total_orders else 0,
+        "new_share": (
+            len(new_customers_orders) / total_orders * 100 if total_orders else 0
+        ),
+        "units_sold": completed["items_count"].sum(),
+    }
+
+
+def main() -> None:
+    from mock_data import generate_mock_transactions
+    from schema import apply_transaction_schema
+
+    parser = argparse.ArgumentParser(
+        description="Latency and peak memory (tracemalloc) of the fused "
+        "transaction_kpis pass against the filtered-copy KPI block."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # A year of orders; two days a week get 1.3x the daily volume
+    per_day = args.rows / 365 / (1 + 0.3 * 2 / 7)
+    orders = apply_transaction_schema(
+        generate_mock_transactions(n_days=365, orders_per_day=per_day)
+    )
+
+    def measure(run) -> tuple[float, float, dict]:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = run(orders)
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        run(orders)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return min(times), peak / 2**20, result
+
+    print(f"{len(orders):,} orders")
+    results = {}
+    for name, run in {
+        "filtered copies": _filtered_copy_kpis,
+        "transaction_kpis": transaction_kpis,
+    }.items():
+        seconds, peak_mb, results[name] = measure(run)
+        print(f"{name:18s} {seconds * 1000:8.1f} ms  peak {peak_mb:7.1f} MB")
+    for kpi, value in results["filtered copies"].items():
+        assert np.isclose(results["transaction_kpis"][kpi], value), kpi
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# schema.py
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from mock_data import (
+    CHANNELS,
+    CUSTOMER_TYPES,
+    FULFILLMENT_STATUSES,
+    PAYMENT_METHODS,
+    SHIPPING_METHODS,
+    SODA_SKUS,
+    STATUSES,
+    TRAFFIC_CATEGORIES,
+    TRAFFIC_PRODUCTS,
+    generate_mock_traffic,
+    generate_mock_transactions,
+)
+
+
+def _distinct(values) -> list:
+    """Distinct values in first-seen order (same order ``pd.factorize`` uses)."""
+    return list(dict.fromkeys(values))
+
+
+# ---------- TRANSACTIONS ----------
+# Stored transaction (fact) columns, in store order. Customers and SKUs
+# are integer keys into the dimension tables (dimensions.py) and order ids
+# are stored as their number; ``category`` stays on every row because the
+# sidebar, partition scans and daily cube filter on it.
+TRANSACTION_COLUMNS = [
+    "order_id",
+    "date",
+    "customer_id",
+    "channel",
+    "payment_method",
+    "status",
+    "items_count",
+    "packs",
+    "sku_id",
+    "category",
+    "subtotal",
+    "discount",
+    "shipping",
+    "tax",
+    "total",
+    "is_refund",
+    "fulfillment_status",
+    "fulfillment_days",
+    "customer_type",
+    "shipping_method",
+]
+
+# Full orders, with the customer and SKU attributes: what the generator
+# and incoming order files provide, and what is displayed and exported
+ORDER_COLUMNS = [
+    "order_id",
+    "date",
+    "customer_name",
+    "channel",
+    "payment_method",
+    "status",
+    "items_count",
+    "packs",
+    "primary_sku",
+    "product_name",
+    "brand",
+    "flavor",
+    "category",
+    "pack_size",
+    "subtotal",
+    "discount",
+    "shipping",
+    "tax",
+    "total",
+    "is_refund",
+    "fulfillment_status",
+    "fulfillment_days",
+    "customer_type",
+    "shipping_method",
+]
+
+# Fixed category sets for the low-cardinality transaction columns
+TRANSACTION_CATEGORIES = {
+    "status": STATUSES,
+    "channel": CHANNELS,
+    "payment_method": PAYMENT_METHODS,
+    "category": _distinct(s["category"] for s in SODA_SKUS),
+    "brand": _distinct(s["brand"] for s in SODA_SKUS),
+    "flavor": _distinct(s["flavor"] for s in SODA_SKUS),
+    "shipping_method": SHIPPING_METHODS,
+    "fulfillment_status": FULFILLMENT_STATUSES,
+    "customer_type": CUSTOMER_TYPES,
+    "product_name": [s["product_name"] for s in SODA_SKUS],
+    "primary_sku": [s["sku"] for s in SODA_SKUS],
+}
+
+# Money is stored as integer cents (int64) and only turned into dollars
+# for display, so sums over any number of orders are exact
+MONEY_COLUMNS = ["subtotal", "discount", "shipping", "tax", "total"]
+CENTS_PER_DOLLAR = 100
+
+# Small integer columns (packs 1–5, pack sizes up to 24, at most 5 × 24
+# units), the dimension keys and the cent amounts
+TRANSACTION_INT_DTYPES = {
+    "customer_id": np.int32,
+    "sku_id": np.int32,
+    "packs": np.int8,
+    "pack_size": np.int8,
+    "fulfillment_days": np.int8,
+    "items_count": np.int16,
+    **{col: np.int64 for col in MONEY_COLUMNS},
+}
+
+
+# ---------- TRAFFIC ----------
+# traffic_source is configurable per dataset, so its categories are inferred
+TRAFFIC_CATEGORIES_BY_COLUMN = {
+    "traffic_source": None,
+    "category": TRAFFIC_CATEGORIES,
+    "product_name": TRAFFIC_PRODUCTS,
+}
+
+
+# ---------- TIME AXIS ----------
+DATE_COLUMN = "date"
+DATE_DTYPE = "datetime64[ns]"
+
+
+# ---------- MONEY ----------
+def to_cents(dollars):
+    """Dollars (a number or a Series) as integer cents, rounded to the cent."""
+    if isinstance(dollars, pd.Series):
+        return (dollars * CENTS_PER_DOLLAR).round().astype(np.int64)
+    return int(round(dollars * CENTS_PER_DOLLAR))
+
+
+def to_dollars(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """``df`` with the cent columns (default: every money column present)
+    as float dollars; for the rows about to be displayed or exported."""
+    columns = [c for c in (MONEY_COLUMNS if columns is None else columns) if c in df]
+    return df.assign(**{col: df[col] / CENTS_PER_DOLLAR for col in columns})
+
+
+def apply_schema(
+    df: pd.DataFrame,
+    categories: dict,
+    int_dtypes: dict | None = None,
+    sort: bool = True,
+) -> pd.DataFrame:
+    """Return ``df`` with a datetime64 ``date`` axis, sorted by date, plus
+    categorical and downcast integer columns.
+
+    Columns missing from ``df`` are skipped; a ``None`` category set means
+    the categories are taken from the data. Pass ``sort=False`` to keep
+    the existing row order (e.g. newest-first query results).
+    """
+    converted = {}
+    if DATE_COLUMN in df.columns:
+        converted[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN]).astype(DATE_DTYPE)
+    for col, cats in categories.items():
+        if col in df.columns:
+            dtype = "category" if cats is None else pd.CategoricalDtype(cats)
+            converted[col] = df[col].astype(dtype)
+    for col, dtype in (int_dtypes or {}).items():
+        if col in df.columns:
+            converted[col] = df[col].astype(dtype)
+    df = df.assign(**converted)
+    if (
+        sort
+        and DATE_COLUMN in df.columns
+        and not df[DATE_COLUMN].is_monotonic_increasing
+    ):
+        df = df.sort_values(DATE_COLUMN, kind="stable", ignore_index=True)
+    return df
+
+
+def apply_transaction_schema(df: pd.DataFrame, sort: bool = True) -> pd.DataFrame:
+    return apply_schema(df, TRANSACTION_CATEGORIES, TRANSACTION_INT_DTYPES, sort=sort)
+
+
+def apply_traffic_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(df, TRAFFIC_CATEGORIES_BY_COLUMN)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Per-column deep memory usage (bytes) of two versions of a frame."""
+    report = pd.DataFrame(
+        {
+            "before_bytes": before.memory_usage(index=False, deep=True),
+            "after_bytes": after.memory_usage(index=False, deep=True),
+        }
+    )
+    report.loc["TOTAL"] = report.sum()
+    report["saved_pct"] = np.where(
+        report["before_bytes"] > 0,
+        (1 - report["after_bytes"] / report["before_bytes"]) * 100,
+        0,
+    )
+    return report
+
+
+# ---------- BENCHMARK ----------
+def _benchmark_dates(rows: int, days: int = 730, seed: int = 0) -> pd.Series:
+    """Unsorted order dates over ``days`` days as datetime64[ns]."""
+    rng = np.random.default_rng(seed)
+    day = rng.integers(0, days, rows).astype("timedelta64[D]")
+    return pd.Series(np.datetime64("2024-01-01", "ns") + day, name=DATE_COLUMN)
+
+
+def _memory(n_days: int) -> None:
+    """Print :func:`memory_report` for the mock frames as read from CSV
+    (object strings, int64) against the same rows after apply_schema."""
+    for name, generate, apply in [
+        ("transactions", generate_mock_transactions, apply_transaction_schema),
+        ("traffic", generate_mock_traffic, apply_traffic_schema),
+    ]:
+        raw = pd.read_csv(io.StringIO(generate(n_days=n_days).to_csv(index=False)))
+        print(f"{name}: {len(raw):,} rows")
+        print(memory_report(raw, apply(raw)).round(1).to_string())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time a date-range filter, a sort by date and a daily "
+        "groupby on datetime.date objects against the datetime64[ns] axis "
+        "apply_schema gives every frame; with --memory, report the memory "
+        "apply_schema saves on the mock frames instead."
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1_000_000, 10_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory", action="store_true")
+    parser.add_argument(
+        "--days", type=int, default=365, help="days of mock data for --memory"
+    )
+    args = parser.parse_args()
+    if args.memory:
+        _memory(args.days)
+        return
+
+    def best(run) -> tuple[float, object]:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = run()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    for rows in args.rows:
+        dates = _benchmark_dates(rows)
+        total = np.random.default_rng(1).integers(100, 20_000, rows)
+        frames = {
+            "object dates": pd.DataFrame(
+                {DATE_COLUMN: dates.dt.date.astype(object), "total": total}
+            ),
+            DATE_DTYPE: apply_schema(
+                pd.DataFrame({DATE_COLUMN: dates, "total": total}), {}, sort=False
+            ),
+        }
+        start = (dates.max() - pd.Timedelta(days=29)).normalize()
+        print(f"{rows:,} rows")
+        timings = {}
+        for name, df in frames.items():
+            bound = start.date() if name == "object dates" else start
+            timings[name] = {
+                "filter": best(lambda: df[df[DATE_COLUMN] >= bound]),
+                "sort": best(lambda: df.sort_values(DATE_COLUMN, kind="stable")),
+                "daily groupby": best(lambda: df.groupby(DATE_COLUMN)["total"].sum()),
+            }
+        for op in timings[DATE_DTYPE]:
+            before, old = timings["object dates"][op]
+            after, new = timings[DATE_DTYPE][op]
+            assert len(old) == len(new)
+            print(
+                f"  {op:14s} {before:7.3f}s -> {after:7.3f}s"
+                f"  speedup {before / after:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# sql_backend.py
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from dimensions import DIMENSIONS, attribute_dimension
+from schema import (
+    DATE_COLUMN,
+    TRANSACTION_CATEGORIES,
+    TRANSACTION_COLUMNS,
+    apply_transaction_schema,
+    to_cents,
+)
+from storage import DATA_DIR
+
+# "pandas" (Parquet store + pandas), "sqlite" or "duckdb"
+TRANSACTIONS_BACKEND = os.getenv("GURU_TRANSACTIONS_BACKEND", "pandas").lower()
+SQL_ENGINES = ["sqlite", "duckdb"]
+
+TABLE = "transactions"
+INDEXED_COLUMNS = ["date", "status", "channel", "category", "customer_id"]
+
+
+def database_path(engine: str, data_dir: Path = DATA_DIR) -> Path:
+    return data_dir / f"transactions.{engine}"
+
+
+def connect(engine: str, path: Path):
+    """Open a connection; one per rerun, since connections are not shared
+    across Streamlit's session threads."""
+    if engine == "sqlite":
+        return sqlite3.connect(path)
+    if engine == "duckdb":
+        try:
+            import duckdb
+        except ImportError as exc:
+            raise RuntimeError(
+                "GURU_TRANSACTIONS_BACKEND=duckdb needs the duckdb package "
+                "(pip install duckdb)"
+            ) from exc
+        return duckdb.connect(str(path))
+    raise ValueError(f"Unknown SQL engine {engine!r}; expected one of {SQL_ENGINES}")
+
+
+# ---------- LOAD ----------
+def _insert(
+    conn, engine: str, df: pd.DataFrame, create: bool, name: str = TABLE
+) -> None:
+    """Create table ``name`` from ``df``, or append ``df`` to it."""
+    # Categoricals become plain text columns; dates become DATE (duckdb)
+    # or ISO text (sqlite), which both sort and compare chronologically
+    table = df.astype({c: str for c in TRANSACTION_CATEGORIES if c in df.columns})
+    dated = DATE_COLUMN in table.columns
+    if engine == "sqlite":
+        if dated:
+            table[DATE_COLUMN] = table[DATE_COLUMN].dt.strftime("%Y-%m-%d")
+        table.to_sql(
+            name,
+            conn,
+            index=False,
+            if_exists="fail" if create else "append",
+            chunksize=50_000,
+        )
+        return
+    conn.register("incoming", table)
+    select = "SELECT * FROM incoming"
+    if dated:
+        select = (
+            f"SELECT * REPLACE (CAST({DATE_COLUMN} AS DATE) AS {DATE_COLUMN}) "
+            "FROM incoming"
+        )
+    if create:
+        conn.execute(f"CREATE TABLE {name} AS {select}")
+    else:
+        conn.execute(f"INSERT INTO {name} BY NAME {select}")
+    conn.unregister("incoming")
+
+
+def build_database(
+    df: pd.DataFrame, engine: str, path: Path, dimensions: dict
+) -> None:
+    """(Re)create the indexed ``transactions`` fact table from ``df``, and
+    a table per dimension (``customers``, ``skus``) from ``dimensions``."""
+    path.unlink(missing_ok=True)
+    conn = connect(engine, path)
+    try:
+        _insert(conn, engine, df, create=True)
+        for col in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX idx_{TABLE}_{col} ON {TABLE} ({col})")
+        for name, dimension in dimensions.items():
+            key, _ = DIMENSIONS[name]
+            _insert(conn, engine, dimension, create=True, name=name)
+            conn.execute(f"CREATE INDEX idx_{name}_{key} ON {name} ({key})")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def append_rows(
+    df: pd.DataFrame, engine: str, path: Path, dimensions: dict | None = None
+) -> None:
+    """Insert new orders, and the new dimension rows they refer to, into an
+    existing database (indexes update in place)."""
+    conn = connect(engine, path)
+    try:
+        for name, rows in (dimensions or {}).items():
+            _insert(conn, engine, rows, create=False, name=name)
+        _insert(conn, engine, df, create=False)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ---------- QUERY COMPILATION ----------
+def compile_where(
+    engine: str,
+    start,
+    end,
+    filters: dict | None = None,
+    min_total: float | None = None,
+) -> tuple[str, list]:
+    """Sidebar filters (``min_total`` in dollars) as a parameterized SQL
+    ``WHERE`` clause.
+
+    Multiselects that include every known value are left out so the
+    engine can use the date index alone.
+    """
+    to_param = (lambda d: d.isoformat()) if engine == "sqlite" else (lambda d: d)
+    clauses = [f"{DATE_COLUMN} BETWEEN ? AND ?"]
+    params = [to_param(pd.Timestamp(start).date()), to_param(pd.Timestamp(end).date())]
+
+    for col, selected in (filters or {}).items():
+        if col not in TRANSACTION_CATEGORIES:
+            raise ValueError(f"Cannot filter on {col!r}")
+        if set(TRANSACTION_CATEGORIES[col]) <= set(selected):
+            continue
+        if not selected:
+            clauses.append("1 = 0")
+            continue
+        clauses.append(f"{col} IN ({', '.join('?' * len(selected))})")
+        params.extend(selected)
+
+    if min_total is not None:
+        clauses.append("total >= ?")
+        params.append(to_cents(min_total))
+
+    return " AND ".join(clauses), params
+
+
+def _query(conn, sql: str, params: list) -> pd.DataFrame:
+    cursor = conn.execute(sql, params)
+    if hasattr(cursor, "df"):  # duckdb hands back a typed DataFrame directly
+        return cursor.df()
+    columns = [d[0] for d in cursor.description]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+
+# ---------- PAGE QUERIES ----------
+def count_orders(
+    conn,
+    engine: str,
+    start,
+    end,
+    filters: dict | None = None,
+    min_total: float | None = None,
+) -> int:
+    where, params = compile_where(engine, start, end, filters, min_total)
+    sql = f"SELECT COUNT(*) FROM {TABLE} WHERE {where}"
+    return int(conn.execute(sql, params).fetchone()[0])
+
+
+def orders_page(
+    conn,
+    engine: str,
+    start,
+    end,
+    filters: dict | None = None,
+    min_total: float | None = None,
+    columns: list[str] | None = None,
+    sort_by: str = DATE_COLUMN,
+    descending: bool = True,
+    page: int = 0,
+    page_size: int = 50,
+) -> pd.DataFrame:
+    """One page (0-based) of the filtered orders (fact rows) sorted by
+    ``sort_by``, which may also be a dimension attribute such as
+    ``customer_name``; ties are ordered by ``order_id``."""
+    source = TABLE
+    if sort_by not in TRANSACTION_COLUMNS:
+        name = attribute_dimension(sort_by)
+        if name is None:
+            raise ValueError(f"Cannot sort on {sort_by!r}")
+        # Only the sort attribute is joined; its name is not a fact column
+        key, _ = DIMENSIONS[name]
+        source += f" JOIN (SELECT {key}, {sort_by} FROM {name}) AS d USING ({key})"
+    where, params = compile_where(engine, start, end, filters, min_total)
+    select = ", ".join(columns or TRANSACTION_COLUMNS)
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT {select} FROM {source} WHERE {where} "
+        f"ORDER BY {sort_by} {direction}, order_id {direction} "
+        f"LIMIT {int(page_size)} OFFSET {int(page) * int(page_size)}"
+    )
+    return apply_transaction_schema(_query(conn, sql, params), sort=False)
+
+
+def customer_summary(
+    conn,
+    engine: str,
+    start,
+    end,
+    filters: dict | None = None,
+    min_total: float | None = None,
+) -> pd.DataFrame:
+    """Orders, net spend (cents, refunds negative) and units per
+    ``customer_id``, unordered: pick the leaders with :func:`topk.top_rows`
+    and join names onto them with :func:`dimensions.with_attributes`."""
+    where, params = compile_where(engine, start, end, filters, min_total)
+    sql = f"""
+        SELECT
+            customer_id,
+            COUNT(DISTINCT order_id) AS orders,
+            CAST(SUM(CASE WHEN is_refund THEN -total ELSE total END) AS BIGINT)
+                AS net_spend,
+            CAST(SUM(items_count) AS BIGINT) AS units_purchased
+        FROM {TABLE}
+        WHERE {where}
+        GROUP BY customer_id
+    """
+    return _query(conn, sql, params)
+
+
+def sku_summary(
+    conn,
+    engine: str,
+    start,
+    end,
+    filters: dict | None = None,
+    min_total: float | None = None,
+) -> pd.DataFrame:
+    """Packs, units and revenue (cents) per ``sku_id`` over completed
+    orders, unordered."""
+    where, params = compile_where(engine, start, end, filters, min_total)
+    sql = f"""
+        SELECT
+            sku_id,
+            CAST(SUM(packs) AS BIGINT) AS total_packs_sold,
+            CAST(SUM(items_count) AS BIGINT) AS units_sold,
+            CAST(SUM(total) AS BIGINT) AS revenue
+        FROM {TABLE}
+        WHERE {where} AND status = 'Completed'
+        GROUP BY sku_id
+    """
+    return _query(conn, sql, params)
@@ -0,0 +1,277 @@
+# storage.py
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from dimensions import DIMENSIONS
+from schema import (
+    DATE_COLUMN,
+    TRANSACTION_CATEGORIES,
+    apply_schema,
+    apply_transaction_schema,
+    to_cents,
+)
+
+# Root of the on-disk stores; override with GURU_DATA_DIR
+DATA_DIR = Path(os.getenv("GURU_DATA_DIR", "data"))
+TRANSACTIONS_DIR = DATA_DIR / "transactions"
+
+PARTITION_COLUMN = "month"
+CUBE_FILE = "_cube.parquet"
+CUSTOMERS_FILE = "_customers.parquet"
+SKUS_FILE = "_skus.parquet"
+SKETCH_FILE = "_total_sketch.parquet"
+CUSTOMER_SKETCH_FILE = "_customer_sketch.parquet"
+# Dimension tables the orders' customer_id / sku_id refer to
+DIMENSION_FILES = {name: f"_dim_{name}.parquet" for name in DIMENSIONS}
+# Bumped after every append; cached readers key on it
+VERSION_FILE = "_version"
+
+# Rows per Parquet row group; row-group date statistics let a date filter
+# skip most of a month file
+ROW_GROUP_SIZE = 64_000
+
+
+def _month_labels(dates: pd.Series) -> pa.Array:
+    """``YYYY-MM`` partition labels, formatted once per distinct month."""
+    months, codes = np.unique(
+        dates.to_numpy().astype("datetime64[M]"), return_inverse=True
+    )
+    labels = pa.array(np.datetime_as_string(months, unit="M"))
+    return labels.take(pa.array(codes))
+
+
+# ---------- WRITE ----------
+def write_transactions(df: pd.DataFrame, root: Path = TRANSACTIONS_DIR) -> None:
+    """Write ``df`` as a month-partitioned (hive style) Parquet dataset.
+
+    Rows are written in date order so each file's row groups cover
+    contiguous days. Existing months present in ``df`` are replaced.
+    """
+    df = df.sort_values(DATE_COLUMN, kind="stable", ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column(PARTITION_COLUMN, _month_labels(df[DATE_COLUMN]))
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=[PARTITION_COLUMN],
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=ROW_GROUP_SIZE,
+    )
+
+
+def append_transactions(df: pd.DataFrame, root: Path = TRANSACTIONS_DIR) -> None:
+    """Add ``df`` to the store as new files in its month partitions.
+
+    Existing files are left untouched, so the cost depends only on the
+    size of ``df``. Columns are cast to the store's schema.
+    """
+    df = df.sort_values(DATE_COLUMN, kind="stable", ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = transaction_schema(root)
+    if schema is not None:
+        table = table.select(schema.names).cast(schema)
+    table = table.append_column(PARTITION_COLUMN, _month_labels(df[DATE_COLUMN]))
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=[PARTITION_COLUMN],
+        partitioning_flavor="hive",
+        basename_template=f"append-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=ROW_GROUP_SIZE,
+    )
+
+
+def write_rollup(frame: pd.DataFrame, root: Path, name: str) -> None:
+    """Write a side table (cube, running totals) next to the partitions.
+
+    The file is replaced atomically, so readers never see a partial write.
+    """
+    path = root / name
+    tmp = path.with_name(f".{name}.{uuid.uuid4().hex}.tmp")
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp)
+    os.replace(tmp, path)
+
+
+def write_cube(cube: pd.DataFrame, root: Path = TRANSACTIONS_DIR) -> None:
+    write_rollup(cube, root, CUBE_FILE)
+
+
+def write_dimensions(dimensions: dict, root: Path = TRANSACTIONS_DIR) -> None:
+    for name, dimension in dimensions.items():
+        write_rollup(dimension, root, DIMENSION_FILES[name])
+
+
+def bump_version(root: Path = TRANSACTIONS_DIR) -> int:
+    version = time.time_ns()
+    tmp = root / f".{VERSION_FILE}.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(str(version))
+    os.replace(tmp, root / VERSION_FILE)
+    return version
+
+
+# ---------- READ ----------
+def store_exists(root: Path = TRANSACTIONS_DIR) -> bool:
+    return root.is_dir() and any(root.glob(f"{PARTITION_COLUMN}=*"))
+
+
+def store_version(root: Path = TRANSACTIONS_DIR) -> int:
+    """Changes whenever orders are appended; 0 for a store never appended to."""
+    try:
+        return int((root / VERSION_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _dataset(root: Path) -> ds.Dataset:
+    return ds.dataset(root, format="parquet", partitioning="hive")
+
+
+def transaction_schema(root: Path = TRANSACTIONS_DIR) -> pa.Schema | None:
+    """Arrow schema of the stored orders (without the partition column)."""
+    if not store_exists(root):
+        return None
+    schema = _dataset(root).schema
+    return schema.remove(schema.get_field_index(PARTITION_COLUMN))
+
+
+def _filter_expression(
+    start, end, filters: dict | None, min_total=None, max_total=None
+):
+    """Partition, date, multiselect and order-total (dollars, from
+    ``min_total`` up to but excluding ``max_total``) predicates as one
+    dataset expression (``None`` when nothing filters)."""
+    expr = None
+
+    def _and(clause):
+        nonlocal expr
+        expr = clause if expr is None else expr & clause
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        _and(ds.field(PARTITION_COLUMN) >= start.strftime("%Y-%m"))
+        _and(ds.field(DATE_COLUMN) >= pa.scalar(start, pa.timestamp("ns")))
+    if end is not None:
+        end = pd.Timestamp(end)
+        _and(ds.field(PARTITION_COLUMN) <= end.strftime("%Y-%m"))
+        _and(ds.field(DATE_COLUMN) <= pa.scalar(end, pa.timestamp("ns")))
+    for col, selected in (filters or {}).items():
+        known = TRANSACTION_CATEGORIES.get(col)
+        if not selected:
+            # Nothing selected matches nothing, as compile_where's 1 = 0
+            _and(pc.scalar(False))
+        elif known is None or not set(known) <= set(selected):
+            _and(ds.field(col).isin(list(selected)))
+    if min_total is not None:
+        _and(ds.field("total") >= to_cents(min_total))
+    if max_total is not None:
+        _and(ds.field("total") < to_cents(max_total))
+    return expr
+
+
+def _stored_columns(dataset: ds.Dataset) -> list[str]:
+    return [c for c in dataset.schema.names if c != PARTITION_COLUMN]
+
+
+def read_transactions(
+    root: Path = TRANSACTIONS_DIR,
+    start=None,
+    end=None,
+    columns: list[str] | None = None,
+    filters: dict | None = None,
+    min_total: float | None = None,
+    max_total: float | None = None,
+) -> pd.DataFrame:
+    """Read transactions dated ``start`` through ``end`` (inclusive).
+
+    Only month partitions overlapping the range are opened, only
+    ``columns`` are decoded, and the date, ``filters`` (column ->
+    selected values) and order-total range (dollars, ``max_total``
+    excluded) predicates are pushed down to the Parquet scan. A filter
+    that selects every known value is not pushed down at all.
+    """
+    dataset = _dataset(root)
+    table = dataset.to_table(
+        columns=columns or _stored_columns(dataset),
+        filter=_filter_expression(start, end, filters, min_total, max_total),
+    )
+    return apply_transaction_schema(table.to_pandas())
+
+
+def count_transactions(
+    root: Path = TRANSACTIONS_DIR,
+    start=None,
+    end=None,
+    filters: dict | None = None,
+    min_total: float | None = None,
+) -> int:
+    return _dataset(root).count_rows(
+        filter=_filter_expression(start, end, filters, min_total)
+    )
+
+
+def scan_transactions(
+    root: Path = TRANSACTIONS_DIR,
+    start=None,
+    end=None,
+    columns: list[str] | None = None,
+    filters: dict | None = None,
+    min_total: float | None = None,
+    batch_rows: int = ROW_GROUP_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Like :func:`read_transactions` (plus a minimum order total), but
+    yields the matching rows at most ``batch_rows`` at a time, so memory
+    stays bounded however many rows match. Rows keep store order within
+    each month file."""
+    dataset = _dataset(root)
+    columns = columns or _stored_columns(dataset)
+    expr = _filter_expression(start, end, filters, min_total)
+    # One row group is decoded at a time; a dataset scanner would decode
+    # ahead of a slow consumer without limit
+    for fragment in dataset.get_fragments(filter=expr):
+        for row_group in fragment.split_by_row_group(expr, schema=dataset.schema):
+            table = row_group.to_table(
+                schema=dataset.schema, columns=columns, filter=expr
+            )
+            for batch in table.to_batches(max_chunksize=batch_rows):
+                if batch.num_rows:
+                    yield apply_transaction_schema(batch.to_pandas(), sort=False)
+
+
+def read_rollup(root: Path, name: str) -> pd.DataFrame | None:
+    """A stored side table; ``None`` when it is missing."""
+    path = root / name
+    if not path.exists():
+        return None
+    table = pq.read_table(path)
+    # Categories and the date axis only: summed measures such as items_count
+    # outgrow the per-order integer downcasts
+    return apply_schema(table.to_pandas(), TRANSACTION_CATEGORIES)
+
+
+def read_cube(root: Path = TRANSACTIONS_DIR) -> pd.DataFrame | None:
+    return read_rollup(root, CUBE_FILE)
+
+
+def read_dimensions(root: Path = TRANSACTIONS_DIR) -> dict:
+    """The stored dimension tables, by name (missing ones are left out)."""
+    dimensions = {}
+    for name, file in DIMENSION_FILES.items():
+        dimension = read_rollup(root, file)
+        if dimension is not None:
+            dimensions[name] = dimension
+    return dimensions
@@ -0,0 +1,147 @@
+# tests/test_analytics.py
+import pandas as pd
+import pytest
+
+import parallel
+from analytics import ANALYTICS_ENGINES, AnalyticsFrame, analytics_frame
+from indexing import DatePartitionedFrame
+from mock_data import generate_mock_traffic
+from schema import apply_traffic_schema
+
+
+@pytest.fixture(scope="module")
+def traffic():
+    return DatePartitionedFrame(
+        apply_traffic_schema(generate_mock_traffic(n_days=365)),
+        bitmap_columns=["traffic_source", "category"],
+    )
+
+
+@pytest.fixture(autouse=True)
+def force_parallel(monkeypatch):
+    """Send every pandas groupby through the process-pool map-reduce, which
+    the mock data is far too small to reach otherwise."""
+    monkeypatch.setattr(parallel, "CPUS", 4)
+    monkeypatch.setattr(parallel, "WORKERS", 3)
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_ROWS", 0)
+
+
+def _windows(traffic):
+    first, last = traffic.min_date, traffic.max_date
+    sources = list(traffic.bitmaps["traffic_source"].values)
+    categories = list(traffic.bitmaps["category"].values)
+    return [
+        (first, last, None),
+        (last - pd.Timedelta(days=29), last, {"traffic_source": sources[:2]}),
+        (last - pd.Timedelta(days=90), last, {"category": categories[1:]}),
+        (first, first, {"category": []}),
+        (first - pd.Timedelta(days=60), first - pd.Timedelta(days=1), None),
+    ]
+
+
+QUERIES = [
+    ("date", {"revenue": ("revenue", "sum"), "orders": ("orders", "sum")}, "orders"),
+    ("category", {"revenue": ("revenue", "sum"), "rows": ("date", "size")}, "rows"),
+    ("category", {"products": ("product_name", "nunique")}, "products"),
+    ("traffic_source", {"sessions": ("sessions", "sum")}, "sessions"),
+    (
+        ["product_name", "category"],
+        {
+            "orders": ("orders", "sum"),
+            "days": ("date", "nunique"),
+            "avg_revenue": ("revenue", "mean"),
+            "most_orders": ("orders", "max"),
+            "least_revenue": ("revenue", "min"),
+            "rows": ("revenue", "count"),
+        },
+        "orders",
+    ),
+]
+
+
+def _assert_same(got, want):
+    if isinstance(want, pd.DataFrame):
+        pd.testing.assert_frame_equal(got, want, rtol=1e-9)
+    elif isinstance(want, pd.Series):
+        pd.testing.assert_series_equal(got, want, rtol=1e-9)
+    else:
+        assert got == want
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda q: str(q[0]))
+def test_parallel_pandas_matches_groupby(traffic, query):
+    by, agg, _ = query
+    got = analytics_frame(traffic, "pandas").grouped(by, agg)
+    by = [by] if isinstance(by, str) else by
+    want = traffic.frame.groupby(by, observed=True).agg(**agg).reset_index()
+    pd.testing.assert_frame_equal(got, want, check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("engine", [e for e in ANALYTICS_ENGINES if e != "pandas"])
+@pytest.mark.parametrize("query", QUERIES, ids=lambda q: str(q[0]))
+def test_engines_conform_to_pandas(traffic, engine, query):
+    """Every operation on every window gives pandas' result."""
+    pytest.importorskip(engine)
+    by, agg, order_by = query
+    frame = analytics_frame(traffic, engine)
+    reference = analytics_frame(traffic, "pandas")
+    for start, end, filters in _windows(traffic):
+        got, want = frame.select(start, end, filters), reference.select(
+            start, end, filters
+        )
+        assert got.count() == want.count()
+        _assert_same(got.grouped(by, agg), want.grouped(by, agg))
+        _assert_same(got.top(by, agg, order_by, 5), want.top(by, agg, order_by, 5))
+        _assert_same(
+            got.top(by, agg, order_by, 5, largest=False),
+            want.top(by, agg, order_by, 5, largest=False),
+        )
+        _assert_same(pd.Series(got.totals(agg)), pd.Series(want.totals(agg)))
+        _assert_same(
+            pd.DataFrame(frame.compare(start, end, agg, filters)),
+            pd.DataFrame(reference.compare(start, end, agg, filters)),
+        )
+
+
+def test_unknown_engine_is_rejected(traffic):
+    with pytest.raises(ValueError, match="Unknown analytics engine"):
+        analytics_frame(traffic, "spark")
+
+
+@pytest.mark.parametrize("engine", ANALYTICS_ENGINES)
+def test_chained_selects(traffic, engine):
+    pytest.importorskip(engine)
+    by, agg, _ = QUERIES[-1]
+    frame = analytics_frame(traffic, engine)
+    reference = analytics_frame(traffic, "pandas")
+    first, last = traffic.min_date, traffic.max_date
+    sources = list(traffic.bitmaps["traffic_source"].values)
+
+    # Narrowing twice gives the rows of one combined select
+    chained = frame.select(last - pd.Timedelta(days=90), last).select(
+        last - pd.Timedelta(days=29), last, {"traffic_source": sources[:2]}
+    )
+    once = reference.select(
+        last - pd.Timedelta(days=29), last, {"traffic_source": sources[:2]}
+    )
+    assert chained.count() == once.count()
+    _assert_same(chained.grouped(by, agg), once.grouped(by, agg))
+
+    # An empty selection stays empty, whatever is selected from it next
+    empty = frame.select(first, first, {"category": []}).select(first, last)
+    assert empty.count() == 0
+    assert empty.select(first, last, {"traffic_source": sources}).count() == 0
+    assert len(empty.grouped(by, agg)) == 0
+    assert all(value == 0 for value in empty.totals(agg).values())
+
+
+def test_analytics_frame_is_abstract():
+    with pytest.raises(TypeError):
+        AnalyticsFrame()
+
+
+def test_unsupported_aggregation_is_rejected(traffic):
+    with pytest.raises(ValueError, match="unsupported aggregation"):
+        analytics_frame(traffic, "pandas").grouped(
+            "category", {"x": ("orders", "median")}
+        )
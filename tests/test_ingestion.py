@@ -0,0 +1,184 @@
+# tests/test_ingestion.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingestion
+from ingestion import (
+    LEADERBOARD_TOTALS,
+    REQUIRED_COLUMNS,
+    RunningLeaderboards,
+    ingest_drop_dir,
+    ingest_orders,
+)
+from mock_data import generate_mock_transactions
+from rollups import (
+    CUBE_DIMENSIONS,
+    build_customer_sketch,
+    build_customer_totals,
+    build_daily_cube,
+    build_sku_totals,
+    build_total_sketch,
+)
+from schema import to_dollars
+from storage import (
+    CUBE_FILE,
+    CUSTOMER_SKETCH_FILE,
+    CUSTOMERS_FILE,
+    SKETCH_FILE,
+    SKUS_FILE,
+    read_rollup,
+    read_transactions,
+    store_version,
+)
+
+
+def _incoming(orders: pd.DataFrame) -> pd.DataFrame:
+    """Generated orders as they arrive in a dropped file (money in dollars)."""
+    incoming = to_dollars(orders[REQUIRED_COLUMNS + ["customer_type"]])
+    for col in incoming.select_dtypes("category"):
+        incoming[col] = incoming[col].astype(str)
+    return incoming
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return _incoming(generate_mock_transactions(n_days=20))
+
+
+def _sorted(frame: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    return frame.sort_values(keys).reset_index(drop=True)
+
+
+def test_batches_update_rollups_like_one_build(tmp_path, orders):
+    root = tmp_path / "transactions"
+    half = len(orders) // 2
+    assert ingest_orders(orders.iloc[:half], root)["ingested"] == half
+    first_version = store_version(root)
+    assert ingest_orders(orders.iloc[half:], root)["ingested"] == len(orders) - half
+    assert store_version(root) != first_version
+
+    stored = read_transactions(root)
+    assert len(stored) == len(orders)
+    for name, build, keys in [
+        (CUBE_FILE, build_daily_cube, CUBE_DIMENSIONS),
+        (CUSTOMERS_FILE, build_customer_totals, ["customer_id"]),
+        (SKUS_FILE, build_sku_totals, ["sku_id"]),
+        (SKETCH_FILE, build_total_sketch, None),
+        (CUSTOMER_SKETCH_FILE, build_customer_sketch, None),
+    ]:
+        merged, rebuilt = read_rollup(root, name), build(stored)
+        if keys is None:
+            keys = list(rebuilt.columns)
+        pd.testing.assert_frame_equal(
+            _sorted(merged, keys), _sorted(rebuilt, keys), check_dtype=False,
+            check_categorical=False, check_column_type=False, obj=name,
+        )
+
+
+def test_invalid_and_repeated_orders_are_rejected(tmp_path, orders):
+    root = tmp_path / "transactions"
+    batch = orders.iloc[:50].astype({"date": object})
+    batch.loc[batch.index[0], "status"] = "Lost"
+    batch.loc[batch.index[1], "total"] = -1
+    batch.loc[batch.index[2], "date"] = "not a date"
+    result = ingest_orders(batch, root)
+    assert result["ingested"] == 47
+    assert list(result["rejected"]["error"]) == [
+        "unknown status", "negative total", "invalid date"
+    ]
+
+    again = ingest_orders(orders.iloc[40:60], root)
+    assert again["ingested"] == 10
+    assert set(again["rejected"]["error"]) == {"order_id already stored"}
+    assert len(read_transactions(root, columns=["order_id"])) == 57
+
+
+def test_missing_columns_raise(tmp_path, orders):
+    with pytest.raises(ValueError, match="missing columns"):
+        ingest_orders(orders.drop(columns="total"), tmp_path / "transactions")
+
+
+def _drop(drop_dir, orders: pd.DataFrame, name: str) -> None:
+    drop_dir.mkdir(exist_ok=True)
+    orders.to_json(drop_dir / name, orient="records", lines=True, date_format="iso")
+
+
+def test_drop_dir_moves_files_by_outcome(tmp_path, orders):
+    drop_dir, root = tmp_path / "incoming", tmp_path / "transactions"
+    batch = orders.iloc[:30].copy()
+    batch.loc[batch.index[0], "channel"] = "Fax"
+    _drop(drop_dir, batch, "a.jsonl")
+    _drop(drop_dir, orders.iloc[30:40].drop(columns="total"), "b.jsonl")
+
+    summary = ingest_drop_dir(drop_dir, root)
+    assert summary == {"files": 1, "ingested": 29, "rejected": 1, "failed": 1}
+    assert (drop_dir / "done" / "a.jsonl").exists()
+    assert len(pd.read_csv(drop_dir / "rejected" / "a.csv")) == 1
+    assert (drop_dir / "rejected" / "b.jsonl").exists()
+    error = (drop_dir / "rejected" / "b.jsonl.error.txt").read_text()
+    assert "missing columns" in error
+    assert not any((drop_dir / "processing").iterdir())
+
+
+def test_drop_dir_store_failures(tmp_path, orders, monkeypatch):
+    drop_dir, root = tmp_path / "incoming", tmp_path / "transactions"
+    _drop(drop_dir, orders.iloc[:10], "a.jsonl")
+    _drop(drop_dir, orders.iloc[10:20], "b.jsonl")
+
+    # A store locked by another writer: the file waits for the next pass
+    def locked(batch, root):
+        raise TimeoutError("store is locked")
+
+    monkeypatch.setattr(ingestion, "ingest_orders", locked)
+    summary = ingest_drop_dir(drop_dir, root)
+    assert summary == {"files": 0, "ingested": 0, "rejected": 0, "failed": 0}
+    assert (drop_dir / "a.jsonl").exists() and (drop_dir / "b.jsonl").exists()
+    assert not any((drop_dir / "processing").iterdir())
+
+    # Any other failure rejects the file instead of leaving it in processing/
+    def broken(batch, root):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ingestion, "ingest_orders", broken)
+    summary = ingest_drop_dir(drop_dir, root)
+    assert summary["failed"] == 2
+    assert "disk full" in (drop_dir / "rejected" / "a.jsonl.error.txt").read_text()
+    assert not any((drop_dir / "processing").iterdir())
+
+
+def _stored_leaders(root, name: str) -> pd.DataFrame:
+    file, _, key, measure = LEADERBOARD_TOTALS[name]
+    totals = read_rollup(root, file)
+    leaders = totals.iloc[np.lexsort((totals[key], -totals[measure]))[:10]]
+    return leaders[[key, measure]].reset_index(drop=True)
+
+
+def test_leaderboards_follow_ingested_batches(tmp_path, orders):
+    drop_dir, root = tmp_path / "incoming", tmp_path / "transactions"
+    ingest_orders(orders.iloc[:200], root)
+    leaderboards = RunningLeaderboards(root)
+    boards = leaderboards.boards
+
+    # Batches ingested here are folded in from their totals
+    _drop(drop_dir, orders.iloc[200:400], "a.jsonl")
+    _drop(drop_dir, orders.iloc[400:600], "b.jsonl")
+    results = []
+    ingest_drop_dir(drop_dir, root, on_ingested=results.append)
+    leaderboards.apply(results)
+    assert leaderboards.boards is boards
+    assert leaderboards.version == store_version(root)
+    for name in LEADERBOARD_TOTALS:
+        pd.testing.assert_frame_equal(
+            leaderboards.top(name), _stored_leaders(root, name), check_dtype=False
+        )
+
+    # A batch ingested elsewhere: the stored totals are read again
+    ingest_orders(orders.iloc[600:], root)
+    leaderboards.apply()
+    assert leaderboards.boards is not boards
+    assert leaderboards.version == store_version(root)
+    for name in LEADERBOARD_TOTALS:
+        pd.testing.assert_frame_equal(
+            leaderboards.top(name), _stored_leaders(root, name), check_dtype=False
+        )
@@ -0,0 +1,43 @@
+# tests/test_mock_data.py
+import pandas as pd
+import pytest
+
+from mock_data import (
+    CHANNELS,
+    CUSTOMER_TYPES,
+    SHIPPING_METHODS,
+    STATUSES,
+    generate_mock_transactions,
+)
+
+# Shares generate_mock_transactions draws each column from
+EXPECTED_SHARES = {
+    "status": dict(zip(STATUSES, [0.83, 0.06, 0.05, 0.04, 0.02])),
+    "channel": dict(zip(CHANNELS, [0.5, 0.25, 0.25])),
+    "customer_type": dict(zip(CUSTOMER_TYPES, [0.3, 0.7])),
+    "shipping_method": dict(zip(SHIPPING_METHODS, [0.5, 0.2, 0.2, 0.1])),
+}
+
+
+@pytest.fixture(scope="module")
+def orders():
+    # About 100k orders: shares land within ~0.5 percentage points
+    return generate_mock_transactions(n_days=2_000, orders_per_day=50)
+
+
+@pytest.mark.parametrize("column", EXPECTED_SHARES)
+def test_column_shares(orders, column):
+    expected = pd.Series(EXPECTED_SHARES[column])
+    shares = orders[column].value_counts(normalize=True).reindex(expected.index)
+    assert (shares - expected).abs().max() < 0.01
+
+
+def test_refunds_follow_status(orders):
+    refunded = orders["status"].isin(["Refunded", "Chargeback"])
+    assert (orders["is_refund"] == refunded).all()
+
+
+def test_seed_is_deterministic():
+    first = generate_mock_transactions(n_days=30, seed=7)
+    pd.testing.assert_frame_equal(first, generate_mock_transactions(n_days=30, seed=7))
+    assert not first.equals(generate_mock_transactions(n_days=30, seed=8))
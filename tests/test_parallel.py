@@ -0,0 +1,121 @@
+# tests/test_parallel.py
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parallel
+from parallel import _aggregate, aggregate, date_partitions
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = np.random.default_rng(7)
+    rows = 20_000
+    day = np.sort(rng.integers(0, 60, rows))
+    return pd.DataFrame(
+        {
+            "date": np.datetime64("2024-01-01", "ns") + day.astype("timedelta64[D]"),
+            "order_id": np.arange(rows, dtype=np.int64),
+            "customer_id": rng.integers(0, 50, rows, dtype=np.int32),
+            "sku_id": rng.integers(0, 8, rows, dtype=np.int32),
+            "total": rng.integers(100, 20_000, rows, dtype=np.int64),
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def several_cpus(monkeypatch):
+    """Use the pool even where the tests run on a single CPU."""
+    monkeypatch.setattr(parallel, "CPUS", 4)
+
+
+def _parallel(df, by, agg, **kwargs):
+    return aggregate(df, by, agg, workers=3, min_rows=0, **kwargs)
+
+
+def test_partitions_cut_at_day_boundaries(orders):
+    dates = orders["date"].to_numpy()
+    bounds = date_partitions(dates, 4)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(dates)
+    for (_, hi), (lo, _) in zip(bounds[:-1], bounds[1:]):
+        assert hi == lo and dates[lo - 1] != dates[lo]
+
+
+def test_matches_groupby(orders):
+    agg = {
+        "orders": ("order_id", "nunique"),
+        "days": ("date", "nunique"),
+        "spend": ("total", "sum"),
+        "avg_total": ("total", "mean"),
+        "rows": ("total", "size"),
+        "smallest": ("total", "min"),
+        "largest": ("total", "max"),
+    }
+    got = _parallel(orders, "customer_id", agg, within_day=["order_id"])
+    want = _aggregate(orders, ["customer_id"], agg)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
+
+
+def test_nunique_across_partitions_stays_exact(orders):
+    # Every SKU is sold in every partition: partial counts must not be summed
+    agg = {"skus": ("sku_id", "nunique")}
+    got = _parallel(orders, "customer_id", agg)
+    pd.testing.assert_frame_equal(got, _aggregate(orders, ["customer_id"], agg))
+    assert got["skus"].max() <= orders["sku_id"].nunique()
+
+
+def test_rejects_unsupported_aggregation(orders):
+    with pytest.raises(ValueError, match="median"):
+        _parallel(orders, "customer_id", {"m": ("total", "median")})
+
+
+def test_broken_pool_is_replaced(orders, monkeypatch):
+    agg = {"spend": ("total", "sum")}
+    _parallel(orders, "sku_id", agg)
+    broken = parallel._pool
+
+    def crash(*args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(broken, "submit", crash)
+    with pytest.raises(BrokenProcessPool):
+        _parallel(orders, "sku_id", agg)
+    monkeypatch.undo()
+    got = _parallel(orders, "sku_id", agg)
+    assert parallel._pool is not broken
+    pd.testing.assert_frame_equal(got, _aggregate(orders, ["sku_id"], agg))
+
+
+def test_single_cpu_stays_in_process(orders, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("started a process pool")
+
+    monkeypatch.setattr(parallel, "CPUS", 1)
+    monkeypatch.setattr(parallel, "_executor", no_pool)
+    agg = {"spend": ("total", "sum")}
+    got = _parallel(orders, "sku_id", agg)
+    pd.testing.assert_frame_equal(got, _aggregate(orders, ["sku_id"], agg))
+
+
+def test_concurrent_calls_share_one_pool(orders, monkeypatch):
+    parallel._discard_pool()
+    agg = {"spend": ("total", "sum")}
+    started = []
+    executor = parallel._executor
+
+    def recording(workers):
+        pool = executor(workers)
+        started.append(pool)
+        return pool
+
+    monkeypatch.setattr(parallel, "_executor", recording)
+    with ThreadPoolExecutor(4) as threads:
+        results = list(
+            threads.map(lambda _: _parallel(orders, "sku_id", agg), range(4))
+        )
+    assert len({id(pool) for pool in started}) == 1
+    for got in results:
+        pd.testing.assert_frame_equal(got, _aggregate(orders, ["sku_id"], agg))
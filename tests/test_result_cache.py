@@ -0,0 +1,56 @@
+# tests/test_result_cache.py
+import importlib.util
+
+from result_cache import ResultCache, result_key
+
+
+def _load(path, body: str):
+    """``summary(window)`` returning ``body``, defined in its own page.py
+    under ``path``, as a deploy of that page would define it."""
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "page.py").write_text(
+        "import pandas as pd\n\n\n"
+        f"def summary(window):\n    return pd.DataFrame({{'value': [{body}]}})\n"
+    )
+    spec = importlib.util.spec_from_file_location(f"page_{path.name}", path / "page.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.summary
+
+
+def test_key_follows_function_code(tmp_path):
+    old = _load(tmp_path / "v1", "window")
+    same = _load(tmp_path / "v2", "window")
+    changed = _load(tmp_path / "v3", "window * 2")
+    key = result_key(old, (1,), {}, version=5)
+    assert result_key(same, (1,), {}, version=5) == key
+    assert result_key(changed, (1,), {}, version=5) != key
+    assert result_key(old, (2,), {}, version=5) != key
+    assert result_key(old, (1,), {}, version=6) != key
+
+
+def test_key_without_source():
+    namespace = {}
+    exec("def summary(window):\n    return window\n", namespace)
+    exec("def other(window):\n    return -window\n", namespace)
+    summary, other = namespace["summary"], namespace["other"]
+    other.__qualname__ = "summary"
+    assert result_key(summary, (1,), {}) == result_key(summary, (1,), {})
+    assert result_key(other, (1,), {}) != result_key(summary, (1,), {})
+
+
+def test_disk_tier_misses_after_code_change(tmp_path):
+    # A fresh cache per "deploy": only the disk tier carries over
+    def deploy(release, body):
+        cache = ResultCache(tmp_path / "cache", memory_bytes=0)
+        summary = _load(tmp_path / release, body)
+        return cache.cached(version=lambda: 1)(summary), cache
+
+    summary, cache = deploy("v1", "window")
+    assert summary(3)["value"].item() == 3
+    summary, cache = deploy("v2", "window")
+    assert summary(3)["value"].item() == 3
+    assert cache.counts["disk_hits"] == 1
+    summary, cache = deploy("v3", "window * 2")
+    assert summary(3)["value"].item() == 6
+    assert cache.counts["misses"] == 1
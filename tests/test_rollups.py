@@ -0,0 +1,276 @@
+# tests/test_rollups.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from mock_data import generate_mock_traffic, generate_mock_transactions
+from rollups import (
+    CUBE_DIMENSIONS,
+    HLL_DIMENSIONS,
+    HLL_PRECISION,
+    SKETCH_ACCURACY,
+    TOTAL_BAND_EDGES,
+    PrefixSums,
+    band_split,
+    build_customer_sketch,
+    build_daily_cube,
+    build_total_sketch,
+    cube_kpis,
+    distinct_customers,
+    merge_customer_sketch,
+    merge_cube,
+    merge_total_sketch,
+    sketch_bounds,
+    sketch_quantile,
+    transaction_kpis,
+)
+from schema import apply_traffic_schema, apply_transaction_schema, to_cents
+
+DIMS = ["traffic_source", "category"]
+MEASURES = ["revenue", "orders", "sessions"]
+
+
+@pytest.fixture(scope="module")
+def traffic():
+    return apply_traffic_schema(generate_mock_traffic(n_days=400))
+
+
+@pytest.fixture(scope="module")
+def sums(traffic):
+    return PrefixSums(traffic, DIMS, MEASURES)
+
+
+def _brute_force(traffic, start, end, selections=None):
+    """What the Trends page computed before prefix sums: a boolean mask."""
+    mask = traffic["date"].between(pd.Timestamp(start), pd.Timestamp(end))
+    for dim, selected in (selections or {}).items():
+        mask &= traffic[dim].isin(list(selected))
+    return {m: traffic.loc[mask, m].sum() for m in MEASURES}
+
+
+def _assert_totals(got, want):
+    for measure in MEASURES:
+        assert got[measure] == pytest.approx(want[measure], rel=1e-9, abs=1e-6)
+
+
+def test_random_ranges_match_brute_force(traffic, sums):
+    rng = np.random.default_rng(3)
+    first, last = traffic["date"].min(), traffic["date"].max()
+    sources = traffic["traffic_source"].cat.categories
+    categories = traffic["category"].cat.categories
+    span = (last - first).days
+    for _ in range(200):
+        lo, hi = np.sort(rng.integers(-30, span + 30, 2))
+        start = first + pd.Timedelta(days=int(lo))
+        end = first + pd.Timedelta(days=int(hi))
+        selections = {
+            "traffic_source": list(
+                rng.choice(sources, rng.integers(0, 4), replace=False)
+            ),
+            "category": list(
+                rng.choice(categories, rng.integers(1, 4), replace=False)
+            ),
+        }
+        _assert_totals(
+            sums.totals(start, end, selections),
+            _brute_force(traffic, start, end, selections),
+        )
+
+
+def test_empty_selection_and_ranges_outside_the_data(traffic, sums):
+    first, last = traffic["date"].min(), traffic["date"].max()
+    zero = dict.fromkeys(MEASURES, 0)
+    _assert_totals(sums.totals(first, last, {"category": []}), zero)
+    before = first - pd.Timedelta(days=10)
+    _assert_totals(sums.totals(before, first - pd.Timedelta(days=1)), zero)
+    _assert_totals(sums.totals(before, first), _brute_force(traffic, first, first))
+    after = last + pd.Timedelta(days=1)
+    _assert_totals(sums.totals(after, after + pd.Timedelta(days=5)), zero)
+    # An inverted range is empty rather than negative
+    _assert_totals(sums.totals(last, first), zero)
+
+
+def test_compare_matches_brute_force(traffic, sums):
+    last = traffic["date"].max()
+    selections = {"traffic_source": ["Email", "Social"]}
+    for days in (1, 7, 30, 90):
+        start = last - pd.Timedelta(days=days - 1)
+        periods = sums.compare(start, last, selections)
+        length = pd.Timedelta(days=days)
+        year = pd.DateOffset(years=1)
+        _assert_totals(
+            periods["current"], _brute_force(traffic, start, last, selections)
+        )
+        _assert_totals(
+            periods["previous"],
+            _brute_force(traffic, start - length, last - length, selections),
+        )
+        # Only partly (or not at all) covered by the 400 days of data
+        _assert_totals(
+            periods["year_ago"],
+            _brute_force(traffic, start - year, last - year, selections),
+        )
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return generate_mock_transactions(n_days=120)
+
+
+# ---------- DAILY TRANSACTIONS CUBE ----------
+def _assert_kpis(got, want):
+    assert got.keys() == want.keys()
+    for name in want:
+        assert got[name] == pytest.approx(want[name], rel=1e-12), name
+
+
+@pytest.mark.parametrize("min_total", [0, 1, 4.5, 5, 17, 20, 49, 75, 151, 499, 600])
+def test_cube_kpis_match_raw_orders(orders, min_total):
+    orders = apply_transaction_schema(orders)
+    cube = build_daily_cube(orders)
+    selected = orders["channel"].isin(["Web", "Mobile App"]) & (
+        orders["date"] >= orders["date"].max() - pd.Timedelta(days=29)
+    )
+    cells = cube["channel"].isin(["Web", "Mobile App"]) & (
+        cube["date"] >= orders["date"].max() - pd.Timedelta(days=29)
+    )
+    rows = orders[selected & (orders["total"] >= to_cents(min_total))]
+    _, edge = band_split(min_total)
+    boundary = rows if edge is None else rows[rows["total"] < to_cents(edge)]
+    _assert_kpis(
+        cube_kpis(cube[cells], min_total, boundary), transaction_kpis(rows)
+    )
+
+
+def test_cube_size_follows_keys_not_orders():
+    busy = generate_mock_transactions(n_days=3, orders_per_day=20_000)
+    cube = build_daily_cube(busy)
+    # At most one cell per band and combination of the other keys
+    combinations = busy.groupby(CUBE_DIMENSIONS[:-1], observed=True).ngroups
+    assert len(cube) <= combinations * len(TOTAL_BAND_EDGES)
+    assert len(cube) < len(busy) / 10
+
+
+def test_cube_merge_matches_one_build(orders):
+    half = len(orders) // 2
+    merged = merge_cube(
+        build_daily_cube(orders.iloc[:half]), build_daily_cube(orders.iloc[half:])
+    )
+    pd.testing.assert_frame_equal(merged, build_daily_cube(orders), check_dtype=False)
+
+
+# ---------- ORDER-TOTAL SKETCH ----------
+
+def _exact_quantile(totals: np.ndarray, q: float) -> int:
+    """The order total at rank ceil(q * n), the rank the sketch looks up."""
+    ordered = np.sort(totals)
+    return int(ordered[max(int(np.ceil(q * len(ordered))), 1) - 1])
+
+
+@pytest.mark.parametrize("accuracy", [SKETCH_ACCURACY, 0.02])
+def test_sketch_quantiles_within_accuracy(orders, accuracy):
+    rng = np.random.default_rng(11)
+    skewed = pd.DataFrame(
+        {
+            "date": orders["date"],
+            "total": np.round(rng.lognormal(8, 1.5, len(orders))).astype(np.int64),
+        }
+    )
+    for frame in (orders, skewed):
+        sketch = build_total_sketch(frame, accuracy)
+        totals = frame["total"].to_numpy()
+        for q in np.linspace(0.01, 0.99, 99):
+            exact = _exact_quantile(totals, q)
+            estimate = sketch_quantile(sketch, q, accuracy)
+            assert abs(estimate - exact) <= accuracy * exact + 1e-9, q
+
+
+def test_sketch_merges_like_one_build(orders):
+    half = len(orders) // 2
+    # The halves share the middle day, whose buckets must add up
+    merged = merge_total_sketch(
+        build_total_sketch(orders.iloc[:half]), build_total_sketch(orders.iloc[half:])
+    )
+    pd.testing.assert_frame_equal(
+        merged, build_total_sketch(orders), check_dtype=False
+    )
+
+
+def test_sketch_bounds_are_exact(orders):
+    sketch = build_total_sketch(orders)
+    assert sketch_bounds(sketch) == (orders["total"].min(), orders["total"].max())
+    last_month = orders["date"] >= orders["date"].max() - pd.Timedelta(days=29)
+    window = sketch[sketch["date"] >= orders["date"].max() - pd.Timedelta(days=29)]
+    assert sketch_bounds(window) == (
+        orders.loc[last_month, "total"].min(),
+        orders.loc[last_month, "total"].max(),
+    )
+
+
+# ---------- DISTINCT CUSTOMER SKETCH ----------
+# Three relative standard errors, 1.04 / sqrt(2**precision) each: 4.9% at
+# precision 12, exceeded by about 0.3% of estimates
+HLL_BOUND = 3 * 1.04 / np.sqrt(2**HLL_PRECISION)
+
+
+def _customer_orders(ids: np.ndarray, seed: int = 0) -> pd.DataFrame:
+    """Orders by ``ids`` (each placing one to three), spread over days,
+    channels and customer types."""
+    rng = np.random.default_rng(seed)
+    ids = np.repeat(ids, rng.integers(1, 4, len(ids)))
+    return pd.DataFrame(
+        {
+            "date": np.datetime64("2025-01-01", "ns")
+            + rng.integers(0, 30, len(ids)).astype("timedelta64[D]"),
+            "channel": rng.choice(["Web", "Mobile App", "In-Store POS"], len(ids)),
+            "customer_type": rng.choice(["New", "Returning"], len(ids)),
+            "customer_id": ids,
+        }
+    )
+
+
+@pytest.mark.parametrize("n", [200, 5_000, 30_000, 250_000])
+def test_distinct_customers_within_bound(n):
+    rng = np.random.default_rng(n)
+    ids = rng.choice(2**40, n, replace=False)
+    estimate = distinct_customers(build_customer_sketch(_customer_orders(ids)))
+    assert abs(estimate - n) <= HLL_BOUND * n
+
+
+def test_small_counts_use_linear_counting():
+    sketch = build_customer_sketch(_customer_orders(np.arange(1_000)))
+    m = 2**HLL_PRECISION
+    cells = np.frombuffer(b"".join(sketch["registers"]), np.int8).reshape(-1, m)
+    empty = int(np.count_nonzero(cells.max(axis=0) == 0))
+    assert distinct_customers(sketch) == pytest.approx(m * np.log(m / empty))
+
+
+def test_customer_sketch_size_follows_cells_not_orders():
+    orders = _customer_orders(np.arange(200_000), seed=4)
+    sketch = build_customer_sketch(orders)
+    cells = orders.groupby(HLL_DIMENSIONS).ngroups
+    assert len(sketch) == cells
+    assert {len(registers) for registers in sketch["registers"]} == {2**HLL_PRECISION}
+    # A selection with no cells counts nobody
+    assert distinct_customers(sketch.iloc[:0]) == 0
+
+
+def test_customer_sketch_merges_by_max():
+    first = _customer_orders(np.arange(0, 40_000), seed=1)
+    second = _customer_orders(np.arange(20_000, 60_000), seed=2)
+    merged = merge_customer_sketch(
+        build_customer_sketch(first), build_customer_sketch(second)
+    )
+    whole = build_customer_sketch(pd.concat([first, second], ignore_index=True))
+    pd.testing.assert_frame_equal(merged, whole, check_dtype=False)
+    # Customers in both halves are counted once
+    assert abs(distinct_customers(merged) - 60_000) <= HLL_BOUND * 60_000
+
+
+def test_selection_of_cells_counts_its_customers():
+    orders = _customer_orders(np.arange(50_000), seed=3)
+    sketch = build_customer_sketch(orders)
+    web = orders["channel"] == "Web"
+    exact = orders.loc[web, "customer_id"].nunique()
+    estimate = distinct_customers(sketch[sketch["channel"] == "Web"])
+    assert abs(estimate - exact) <= HLL_BOUND * exact
@@ -0,0 +1,47 @@
+# tests/test_storage.py
+import pytest
+
+from dimensions import split_orders
+from mock_data import generate_mock_transactions
+from schema import apply_transaction_schema
+from storage import (
+    count_transactions,
+    read_transactions,
+    scan_transactions,
+    write_transactions,
+)
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    root = tmp_path_factory.mktemp("transactions")
+    orders = apply_transaction_schema(generate_mock_transactions(n_days=40))
+    facts, _ = split_orders(orders)
+    write_transactions(facts, root)
+    return root, facts
+
+
+@pytest.mark.parametrize("column", ["status", "channel", "category"])
+def test_empty_multiselect_matches_nothing(store, column):
+    root, _ = store
+    filters = {column: []}
+    assert read_transactions(root, filters=filters).empty
+    assert count_transactions(root, filters=filters) == 0
+    assert list(scan_transactions(root, filters=filters)) == []
+
+
+def test_multiselect_matches_pandas_mask(store):
+    root, facts = store
+    filters = {"status": ["Completed", "Pending"], "channel": ["Web"]}
+    mask = facts["status"].isin(filters["status"]) & facts["channel"].isin(
+        filters["channel"]
+    )
+    assert count_transactions(root, filters=filters) == int(mask.sum())
+    assert len(read_transactions(root, filters=filters)) == int(mask.sum())
+
+
+def test_integer_key_filter(store):
+    root, facts = store
+    ids = [int(i) for i in facts["order_id"].iloc[[0, 5, 9]]]
+    found = read_transactions(root, columns=["order_id"], filters={"order_id": ids})
+    assert sorted(found["order_id"]) == sorted(ids)
@@ -0,0 +1,46 @@
+# tests/test_topk.py
+import numpy as np
+import pytest
+
+from topk import Leaderboard, top_k
+
+
+@pytest.mark.parametrize("largest", [True, False])
+@pytest.mark.parametrize("k", [0, 1, 10, 500, 2_000])
+def test_top_k_matches_a_full_sort(k, largest):
+    # Few distinct values: lots of ties, which rank the earlier position first
+    values = np.random.default_rng(k).integers(-50, 50, 1_000)
+    order = np.argsort(-values if largest else values, kind="stable")
+    np.testing.assert_array_equal(top_k(values, k, largest), order[:k])
+
+
+def _full_sort(totals: np.ndarray, k: int) -> np.ndarray:
+    # Largest total first, then smaller key
+    return np.lexsort((np.arange(len(totals)), -totals))[:k]
+
+
+def test_leaderboard_matches_a_full_sort_after_every_update():
+    rng = np.random.default_rng(7)
+    totals = rng.integers(0, 100, 200)
+    board = Leaderboard(totals, k=10)
+    for _ in range(500):
+        # Refunds, repeated keys, new keys and lots of ties
+        n = int(rng.integers(1, 20))
+        keys = rng.integers(0, len(board.totals) + 5, n)
+        deltas = rng.integers(-60, 60, n)
+        expected = board.totals.copy()
+        expected.resize(max(len(expected), keys.max() + 1))
+        np.add.at(expected, keys, deltas)
+
+        leaders = board.update(keys, deltas)
+        np.testing.assert_array_equal(board.totals, expected)
+        np.testing.assert_array_equal(leaders, _full_sort(expected, 10))
+    np.testing.assert_array_equal(
+        board.top()["total"], np.sort(board.totals)[::-1][:10]
+    )
+
+
+def test_leaderboard_with_fewer_keys_than_k():
+    board = Leaderboard(np.zeros(0, dtype=np.int64), k=5)
+    assert board.top().empty
+    np.testing.assert_array_equal(board.update([2, 0], [3, 4]), [0, 2, 1])
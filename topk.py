@@ -0,0 +1,87 @@
+# topk.py
+import numpy as np
+import pandas as pd
+
+from paging import ranked_positions
+
+
+def top_k(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """Positions of the ``k`` largest (or smallest) ``values``, best first;
+    equal values rank the earlier position first.
+
+    Selection is ``np.argpartition`` plus a sort of the ``k`` winners, so
+    the cost is O(n + k log k) rather than a full O(n log n) sort.
+    """
+    values = np.asarray(values)
+    return ranked_positions(-values if largest else values, 0, k)
+
+
+def top_rows(
+    frame: pd.DataFrame, by: str, k: int = 10, largest: bool = True
+) -> pd.DataFrame:
+    """The ``k`` rows of ``frame`` with the largest (or smallest) numeric
+    ``by``, in order; e.g. the top groups of an aggregation, in place of
+    ``sort_values(by).head(k)``."""
+    return frame.iloc[top_k(frame[by].to_numpy(), k, largest)]
+
+
+# ---------- INCREMENTAL LEADERBOARD ----------
+class Leaderboard:
+    """The ``k`` keys with the largest running totals, kept current as new
+    orders change some of the totals.
+
+    Keys are dense integers (e.g. ``customer_id`` / ``sku_id``) and
+    ``totals[key]`` is each key's total. Ties rank the smaller key first.
+    :meth:`update` re-ranks only the current leaders and the keys that
+    changed, O(changed + k log k). It falls back to a full O(n) selection
+    only when leaders dropped so far that an unchanged key might now
+    outrank them.
+    """
+
+    def __init__(self, totals: np.ndarray, k: int = 10):
+        self.k = k
+        self.totals = np.array(totals)
+        self._select_all()
+
+    def _select_all(self) -> None:
+        self._set_leaders(top_k(self.totals, self.k))
+
+    def _set_leaders(self, leaders: np.ndarray) -> None:
+        self.leaders = leaders
+        # Every key outside the leaders ranks below the last leader's
+        # (total, key)
+        if len(leaders):
+            self._boundary = (self.totals[leaders[-1]], leaders[-1])
+
+    def update(self, keys: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+        """Add ``deltas`` to the totals of ``keys`` (which may repeat or be
+        new) and return the new leaders, best first."""
+        keys = np.asarray(keys, dtype=np.int64)
+        changed = keys
+        if keys.size and keys.max() >= len(self.totals):
+            # Keys skipped over by new ones start at zero, so they count as
+            # changed too
+            changed = np.concatenate([keys, np.arange(len(self.totals), keys.max())])
+            grown = np.zeros(keys.max() + 1, dtype=self.totals.dtype)
+            grown[: len(self.totals)] = self.totals
+            self.totals = grown
+        np.add.at(self.totals, keys, deltas)
+
+        if len(self.leaders) < self.k:
+            self._select_all()  # fewer keys than k: every key is a leader
+            return self.leaders
+
+        candidates = np.union1d(self.leaders, changed)
+        values = self.totals[candidates]
+        value, key = self._boundary
+        still_ahead = (values > value) | ((values == value) & (candidates <= key))
+        if np.count_nonzero(still_ahead) >= self.k:
+            # candidates is sorted by key, so position ties follow key order
+            self._set_leaders(candidates[top_k(values, self.k)])
+        else:
+            self._select_all()
+        return self.leaders
+
+    def top(self) -> pd.DataFrame:
+        """Leaders and their totals, best first."""
+        return pd.DataFrame({"key": self.leaders, "total": self.totals[self.leaders]})
@@ -1,6 +1,8 @@
 # utils.py
 import streamlit as st
 
+from schema import to_dollars
+
 
 def apply_custom_theme() -> None:
     """Apply global dark theme and layout for the entire app."""
@@ -52,3 +54,36 @@ section[data-testid="stSidebar"] {
 """,
         unsafe_allow_html=True,
     )
+
+
+def render_table(
+    df,
+    currency=(),
+    percent=(),
+    cents=(),
+    column_config: dict | None = None,
+    **kwargs,
+):
+    """``st.dataframe`` with money and rate columns formatted at render time.
+
+    The columns stay numeric (so the grid sorts them as numbers) and only
+    the rows on screen are formatted by the browser. ``currency`` is a list
+    of columns shown as ``$1,234.56``, or a dict of column -> decimals;
+    ``cents`` columns hold integer cents and are shown the same way, after
+    converting just these rows to dollars; ``percent`` columns hold
+    fractions and show as ``12.34%``.
+    """
+    if not isinstance(currency, dict):
+        currency = dict.fromkeys(currency, 2)
+    if cents:
+        df = to_dollars(df, cents)
+        currency = {**currency, **dict.fromkeys(cents, 2)}
+    config = {
+        col: st.column_config.NumberColumn(format=f"$%,.{decimals}f")
+        for col, decimals in currency.items()
+    }
+    config.update(
+        {col: st.column_config.NumberColumn(format="percent") for col in percent}
+    )
+    config.update(column_config or {})
+    return st.dataframe(df, column_config=config, **kwargs)